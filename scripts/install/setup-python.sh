@@ -89,7 +89,8 @@ create_virtual_environment() {
 	    libopenjp2-7 \
 	    zlib1g-dev \
 	    libtiff-dev \
-	    libatlas-base-dev
+	    libatlas-base-dev \
+	    python3-numpy
 	
     if [ $? -eq 0 ]; then
         print_success "Dépendances système installées"
@@ -235,6 +236,7 @@ install_critical_dependencies() {
         "luma.oled==3.12.0"      # Driver OLED
         "pygame==2.1.0"          # Audio
         "pydub==0.25.1"          # Traitement audio
+        "numpy>=1.20.0"          # Effets vintage et détection de parole (moteur numpy)
     )
     
     failed_deps=()
@@ -279,6 +281,7 @@ test_python_imports() {
         "luma.oled.device"
         "luma.core.render"
         "smbus2"
+        "numpy"
     )
     
     failed_imports=()
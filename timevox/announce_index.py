@@ -0,0 +1,104 @@
+# announce_index.py
+"""
+Index des annonces de la clé USB (dossier Annonce)
+Le dossier est listé une fois, puis relisté seulement quand il change (inotify, sinon mtime
+du dossier vérifié périodiquement) par un thread de fond: le choix d'une annonce pendant
+l'appel ne touche pas au système de fichiers.
+Rotation mélangée sans répétition: chaque annonce passe une fois avant qu'une autre série
+soit tirée, et une série ne commence jamais par l'annonce qui vient d'être jouée.
+"""
+
+import os
+import random
+import threading
+from config import CONFIG_POLL_INTERVAL
+from file_watcher import IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_DELETE, get_signature, watch_directory
+
+# Pas IN_CREATE: une annonce en cours de copie n'est indexée qu'une fois écrite
+ANNOUNCE_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+
+def is_announce_file(name):
+    return name.lower().endswith(".mp3") and not name.startswith(".")
+
+
+class AnnounceIndex:
+    def __init__(self, announce_dir):
+        self.announce_dir = announce_dir
+        self.lock = threading.Lock()
+        self.files = []
+        self.deck = []  # Annonces restant à jouer dans la série en cours
+        self.last_played = None
+        self.signature = None  # (mtime_ns, taille) du dossier indexé
+        self.watch_thread = None
+        self.watch_stop = None
+
+    def refresh(self):
+        """Relit le dossier; retourne le nombre d'annonces indexées"""
+        signature = get_signature(self.announce_dir)
+        try:
+            with os.scandir(self.announce_dir) as entries:
+                files = sorted(entry.path for entry in entries
+                               if is_announce_file(entry.name) and entry.is_file())
+        except OSError as e:
+            print(f"Dossier Annonce illisible: {e}")
+            files = []
+
+        with self.lock:
+            self.signature = signature
+            if files != self.files:
+                # Les annonces retirées quittent la série en cours, les nouvelles entrent dans la suivante
+                kept = set(files)
+                self.deck = [path for path in self.deck if path in kept]
+                self.files = files
+                print(f"📢 {len(files)} annonce(s) indexée(s) dans {self.announce_dir}")
+        return len(files)
+
+    def check_for_changes(self):
+        if get_signature(self.announce_dir) != self.signature:
+            self.refresh()
+
+    def get_path(self):
+        """Annonce suivante de la rotation, None si le dossier n'en contient aucune"""
+        with self.lock:
+            if not self.files:
+                return None
+            if not self.deck:
+                self.deck = list(self.files)
+                random.shuffle(self.deck)
+                # La série est jouée depuis la fin: pas deux fois la même annonce à la suite
+                if len(self.deck) > 1 and self.deck[-1] == self.last_played:
+                    self.deck[0], self.deck[-1] = self.deck[-1], self.deck[0]
+            self.last_played = self.deck.pop()
+            return self.last_played
+
+    def get_files(self):
+        with self.lock:
+            return list(self.files)
+
+    def get_count(self):
+        with self.lock:
+            return len(self.files)
+
+    # --- Surveillance du dossier --------------------------------------------
+
+    def start_watching(self):
+        """Indexe le dossier puis le surveille en arrière-plan"""
+        if self.watch_thread is not None:
+            return
+        self.refresh()
+        self.watch_stop = threading.Event()
+        self.watch_thread = threading.Thread(target=self.watch_loop, name="timevox-annonces", daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        if self.watch_stop:
+            self.watch_stop.set()
+        self.watch_thread = None
+
+    def watch_loop(self):
+        stop = self.watch_stop
+        if not watch_directory(self.announce_dir, stop, self.refresh, accept=is_announce_file, mask=ANNOUNCE_MASK):
+            print(f"⚠️ inotify indisponible - vérification du dossier Annonce toutes les {CONFIG_POLL_INTERVAL}s")
+            while not stop.wait(CONFIG_POLL_INTERVAL):
+                self.check_for_changes()
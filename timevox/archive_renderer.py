@@ -0,0 +1,146 @@
+# archive_renderer.py
+"""
+Ré-application du filtre vintage à toute l'archive des messages (après un changement de config.json)
+Chaque message est rendu depuis sa source sans effet la plus fidèle (master wav/flac, sinon
+_original.mp3) par un pool de processus qui occupe tous les cœurs du Pi.
+Le fichier d'état RERENDER_STATE_FILE (dans Messages/) mémorise le filtre appliqué à chaque
+message: les messages déjà à jour sont sautés et un rendu interrompu reprend là où il s'était arrêté.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import MASTER_SUFFIX, RERENDER_STATE_FILE, POSTPROCESS_NICE
+
+# Sources sans effet, de la plus fidèle à la moins fidèle
+SOURCE_SUFFIXES = [f"{MASTER_SUFFIX}.flac", f"{MASTER_SUFFIX}.wav", "_original.mp3"]
+
+_worker_effects = None  # AudioEffects propre à chaque processus du pool
+
+
+def get_filter_hash(config):
+    """Empreinte du filtre (type + intensité) appliqué à un message"""
+    key = f"{config['type']}:{config['intensity']:.3f}" if config["enabled"] else "aucun"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def find_messages(messages_dir):
+    """
+    Retourne la liste triée des (source sans effet, message final) de l'archive
+    et le nombre de messages sans source sans effet (impossibles à re-rendre)
+    """
+    sources = {}
+    finals = set()
+    for root, dirs, files in os.walk(messages_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            for rank, suffix in enumerate(SOURCE_SUFFIXES):
+                if name.endswith(suffix):
+                    output_file = path[:-len(suffix)] + ".mp3"
+                    if output_file not in sources or rank < sources[output_file][0]:
+                        sources[output_file] = (rank, path)
+                    break
+            else:
+                if name.endswith(".mp3"):
+                    finals.add(path)
+
+    messages = sorted((source, output_file) for output_file, (_, source) in sources.items())
+    return messages, len(finals - set(sources))
+
+
+def load_state(state_file):
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"État de rendu illisible ({e}) - tous les messages seront re-rendus")
+        return {}
+
+
+def save_state(state_file, state):
+    """Écriture atomique: un arrêt brutal ne laisse jamais un état tronqué"""
+    partial_file = f"{state_file}.part"
+    with open(partial_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(partial_file, state_file)
+
+
+def render_one(source_file, output_file, config):
+    """Rendu d'un message dans un processus du pool"""
+    global _worker_effects
+    if _worker_effects is None:
+        from audio_effects import AudioEffects
+        _worker_effects = AudioEffects(None)
+    return _worker_effects.render_archive_file(source_file, output_file, config, POSTPROCESS_NICE)
+
+
+def rerender_archive(messages_dir, config, workers=None):
+    """
+    Re-rend tous les messages qui n'ont pas encore le filtre config
+    Retourne un résumé (total, déjà à jour, rendus, échecs, débit en fichiers/min)
+    """
+    state_file = os.path.join(messages_dir, RERENDER_STATE_FILE)
+    state = load_state(state_file)
+    filter_hash = get_filter_hash(config)
+    filter_name = f"{config['type']} ({config['intensity']:.2f})" if config["enabled"] else "aucun"
+
+    messages, orphans = find_messages(messages_dir)
+    todo = [(source, output_file) for source, output_file in messages
+            if state.get(os.path.relpath(output_file, messages_dir)) != filter_hash
+            or not os.path.exists(output_file)]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"🎚️ Re-rendu de l'archive avec le filtre {filter_name}")
+    print(f"   {len(messages)} messages, {len(messages) - len(todo)} déjà à jour, "
+          f"{len(todo)} à rendre ({workers} processus)")
+    if orphans:
+        print(f"   {orphans} message(s) sans original ni master ignoré(s)")
+
+    rendered = failed = 0
+    start = time.monotonic()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(render_one, source, output_file, config): output_file
+                   for source, output_file in todo}
+        for future in as_completed(futures):
+            output_file = futures[future]
+            relative_path = os.path.relpath(output_file, messages_dir)
+            try:
+                success = future.result()
+            except Exception as e:
+                print(f"❌ Erreur rendu {relative_path}: {e}")
+                success = False
+
+            if success:
+                rendered += 1
+                state[relative_path] = filter_hash
+                save_state(state_file, state)  # Reprise possible après chaque message
+            else:
+                failed += 1
+
+            done = rendered + failed
+            rate = done / max(time.monotonic() - start, 1e-6) * 60
+            remaining = (len(todo) - done) / rate if rate else 0
+            print(f"[{done}/{len(todo)}] {relative_path} - {rate:.1f} fichiers/min, "
+                  f"reste ~{remaining:.1f} min")
+    except KeyboardInterrupt:
+        print("⏹️ Interrompu - relancer la commande pour reprendre")
+        pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        pool.shutdown(wait=True)
+
+    elapsed = time.monotonic() - start
+    files_per_min = (rendered + failed) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"✅ {rendered} message(s) re-rendu(s), {failed} échec(s) en {elapsed:.1f}s "
+          f"({files_per_min:.1f} fichiers/min)")
+    return {
+        "total": len(messages),
+        "skipped": len(messages) - len(todo),
+        "rendered": rendered,
+        "failed": failed,
+        "files_per_min": round(files_per_min, 1)
+    }
@@ -6,9 +6,14 @@ Applique des filtres "radio années 50" et autres effets vintage
 
 import subprocess
 import os
+import re
+import shutil
+import math
+import wave
+import array
 import tempfile
-from pydub import AudioSegment
-from pydub.effects import normalize, compress_dynamic_range
+from config import FFMPEG_AUDIO_CODEC, FFMPEG_BITRATE, EFFECTS_ENGINE, DSP_VINTAGE_TEXTURE
+from wav_utils import get_wav_duration
 
 
 class AudioEffects:
@@ -70,29 +75,103 @@ class AudioEffects:
         
         return config
     
+    def get_radio_50s_band(self, intensity=0.7):
+        """Retourne la bande passante (passe-haut, passe-bas) du filtre radio 50s"""
+        effect_params = self.default_effects["radio_50s"]
+        highpass_freq = int(effect_params["highpass_freq"] * (0.7 + intensity * 0.8))  # Plus agressif
+        lowpass_freq = int(effect_params["lowpass_freq"] * (1.3 - intensity * 0.7))    # Plus restrictif
+        return highpass_freq, lowpass_freq
+    
+    def get_radio_50s_filter(self, intensity=0.7):
+        """Construit la chaîne de filtres ffmpeg du filtre radio années 50"""
+        effect_params = self.default_effects["radio_50s"]
+        highpass_freq, lowpass_freq = self.get_radio_50s_band(intensity)
+        volume_boost = 1.0 + (effect_params["volume_boost"] - 1.0) * intensity
+        
+        # Filtre plus complexe avec distorsion et EQ vintage
+        return (
+            f"highpass=f={highpass_freq},"                    # Coupe grave aggressive
+            f"lowpass=f={lowpass_freq},"                      # Coupe aigu pour effet radio
+            f"equalizer=f=800:width_type=h:width=100:g=3,"    # Boost médiums (voix)
+            f"equalizer=f=2000:width_type=h:width=200:g=-2,"  # Légère coupe aigu
+            f"compand=attacks=0.05:decays=0.2:points=-80/-80|-30/-20|-10/-5|0/-1,"  # Compression forte
+            f"volume={volume_boost},"                         # Boost volume
+            f"aformat=sample_fmts=s16:sample_rates=22050"
+        )
+    
+    def get_vintage_extreme_band(self, intensity=0.7):
+        """Retourne la bande passante (passe-haut, passe-bas) du filtre vintage extrême"""
+        highpass_freq = int(500 + intensity * 300)  # 500-800Hz
+        lowpass_freq = int(2500 - intensity * 500)  # 2500-2000Hz
+        return highpass_freq, lowpass_freq
+    
+    def get_vintage_extreme_filter(self, intensity=0.7):
+        """Construit la chaîne de filtres ffmpeg du filtre vintage extrême"""
+        highpass_freq, lowpass_freq = self.get_vintage_extreme_band(intensity)
+        
+        # Filtre multi-étapes pour effet radio vintage extrême
+        return (
+            f"highpass=f={highpass_freq},"                      # Coupe grave très agressive
+            f"lowpass=f={lowpass_freq},"                        # Coupe aigu très agressive  
+            f"equalizer=f=1000:width_type=h:width=500:g=6,"     # Boost médiums très fort
+            f"equalizer=f=300:width_type=h:width=100:g=-6,"     # Coupe graves
+            f"equalizer=f=4000:width_type=h:width=1000:g=-4,"   # Coupe aigus
+            f"compand=attacks=0.02:decays=0.1:points=-80/-80|-20/-10|-5/0|0/5," # Compression extrême
+            f"volume=1.6,"                                      # Boost fort
+            f"aformat=sample_fmts=s16:sample_rates=22050"
+        )
+    
+    def get_telephone_filter(self, intensity=0.7, peak_gain_db=0.0):
+        """
+        Construit la chaîne ffmpeg du filtre téléphone, dans l'ordre de la chaîne pydub:
+        compression -> rééchantillonnage 8 kHz -> normalisation -> boost
+        peak_gain_db: gain de normalisation (remplace normalize()), mesuré sur le PCM brut en
+        une seule passe: la crête finale peut rester un peu sous 0 dBFS après la compression
+        """
+        filters = []
+        
+        if intensity > 0.3:
+            # Compression dynamique (threshold=-20dB, ratio=3, attack=5ms, release=50ms)
+            filters.append("acompressor=threshold=0.1:ratio=3:attack=5:release=50")
+        
+        if intensity > 0.5:
+            # Réduction de la qualité (simulation téléphone)
+            filters.append("aresample=8000,aresample=22050")
+        
+        filters.append(f"volume={peak_gain_db:.2f}dB")  # Normalisation crête
+        
+        # Boost du volume selon l'intensité
+        volume_change = int(20 * intensity * 0.3)  # Max +6dB
+        if volume_change > 0:
+            filters.append(f"volume={volume_change}dB")
+        
+        filters.append("aformat=sample_fmts=s16:sample_rates=22050")
+        return ",".join(filters)
+    
+    def build_filter_chain(self, filter_type, intensity=0.7, peak_gain_db=0.0):
+        """
+        Retourne la chaîne de filtres ffmpeg correspondant au type configuré
+        Même sélection que process_audio_file(), None si type non reconnu
+        """
+        if filter_type == "radio_50s":
+            # Choisir entre version normale et extrême selon l'intensité
+            if intensity >= 0.8:
+                return self.get_vintage_extreme_filter(intensity)
+            return self.get_radio_50s_filter(intensity)
+        elif filter_type == "telephone":
+            return self.get_telephone_filter(intensity, peak_gain_db)
+        elif filter_type == "gramophone":
+            return self.get_radio_50s_filter(intensity * 0.8)
+        return None
+    
     def apply_radio_50s_filter_ffmpeg(self, input_file, output_file, intensity=0.7):
         """
         Applique un filtre radio années 50 avec ffmpeg - Version effet prononcé
         intensity: 0.0 à 1.0 (intensité de l'effet)
         """
         try:
-            effect_params = self.default_effects["radio_50s"].copy()
-            
-            # Ajuster les paramètres selon l'intensité (plus agressif)
-            highpass_freq = int(effect_params["highpass_freq"] * (0.7 + intensity * 0.8))  # Plus agressif
-            lowpass_freq = int(effect_params["lowpass_freq"] * (1.3 - intensity * 0.7))    # Plus restrictif
-            volume_boost = 1.0 + (effect_params["volume_boost"] - 1.0) * intensity
-            
-            # Filtre plus complexe avec distorsion et EQ vintage
-            audio_filter = (
-                f"highpass=f={highpass_freq},"                    # Coupe grave aggressive
-                f"lowpass=f={lowpass_freq},"                      # Coupe aigu pour effet radio
-                f"equalizer=f=800:width_type=h:width=100:g=3,"    # Boost médiums (voix)
-                f"equalizer=f=2000:width_type=h:width=200:g=-2,"  # Légère coupe aigu
-                f"compand=attacks=0.05:decays=0.2:points=-80/-80|-30/-20|-10/-5|0/-1,"  # Compression forte
-                f"volume={volume_boost},"                         # Boost volume
-                f"aformat=sample_fmts=s16:sample_rates=22050"
-            )
+            highpass_freq, lowpass_freq = self.get_radio_50s_band(intensity)
+            audio_filter = self.get_radio_50s_filter(intensity)
             
             # Commande ffmpeg
             cmd = [
@@ -126,21 +205,8 @@ class AudioEffects:
         Version extrême du filtre vintage radio pour un effet très prononcé
         """
         try:
-            # Paramètres très agressifs
-            highpass_freq = int(500 + intensity * 300)  # 500-800Hz
-            lowpass_freq = int(2500 - intensity * 500)  # 2500-2000Hz
-            
-            # Filtre multi-étapes pour effet radio vintage extrême
-            audio_filter = (
-                f"highpass=f={highpass_freq},"                      # Coupe grave très agressive
-                f"lowpass=f={lowpass_freq},"                        # Coupe aigu très agressive  
-                f"equalizer=f=1000:width_type=h:width=500:g=6,"     # Boost médiums très fort
-                f"equalizer=f=300:width_type=h:width=100:g=-6,"     # Coupe graves
-                f"equalizer=f=4000:width_type=h:width=1000:g=-4,"   # Coupe aigus
-                f"compand=attacks=0.02:decays=0.1:points=-80/-80|-20/-10|-5/0|0/5," # Compression extrême
-                f"volume=1.6,"                                      # Boost fort
-                f"aformat=sample_fmts=s16:sample_rates=22050"
-            )
+            highpass_freq, lowpass_freq = self.get_vintage_extreme_band(intensity)
+            audio_filter = self.get_vintage_extreme_filter(intensity)
             
             cmd = [
                 "ffmpeg", "-y",
@@ -173,6 +239,10 @@ class AudioEffects:
         Applique un filtre téléphone avec pydub (méthode alternative)
         """
         try:
+            # pydub n'est utilisé que par cette méthode alternative
+            from pydub import AudioSegment
+            from pydub.effects import normalize, compress_dynamic_range
+            
             print(f"Application filtre téléphone avec pydub (intensité: {intensity})")
             
             # Charger l'audio
@@ -309,6 +379,269 @@ class AudioEffects:
                 os.rename(original_file, input_file)
             return input_file
     
+    def get_wav_info(self, wav_file, start=0.0, length=None):
+        """
+        Retourne (durée totale en secondes, crête en dBFS) d'un fichier WAV PCM 16 bits
+        La crête n'est mesurée qu'entre start et start + length (partie gardée après la coupe)
+        """
+        # En-tête d'une capture interrompue non fiable: durée d'après la taille du fichier
+        duration = get_wav_duration(wav_file)
+        peak = 0
+        with wave.open(wav_file, "rb") as wav:
+            sample_rate = wav.getframerate()
+            frame_size = wav.getnchannels() * wav.getsampwidth()
+            wav.setpos(min(int(start * sample_rate), int(duration * sample_rate)))
+            remaining = None if length is None else int(round(length * sample_rate))
+            # Lecture par blocs d'une seconde pour limiter la mémoire
+            while remaining is None or remaining > 0:
+                frames = wav.readframes(sample_rate if remaining is None else min(sample_rate, remaining))
+                if not frames:
+                    break
+                if remaining is not None:
+                    remaining -= len(frames) // frame_size
+                samples = array.array("h", frames[:len(frames) - len(frames) % 2])
+                if samples:
+                    peak = max(peak, max(samples), -min(samples))
+        
+        peak_db = 20 * math.log10(peak / 32768.0) if peak > 0 else -96.0
+        return duration, peak_db
+    
+    def get_master_args(self, master_file):
+        """Arguments ffmpeg d'une sortie master sans perte (.flac ou .wav), sans effet"""
+        if not master_file:
+            return []
+        codec = "flac" if master_file.endswith(".flac") else "pcm_s16le"
+        return ["-map", "0:a", "-acodec", codec, master_file]
+    
+    def render_message(self, raw_file, output_file, trim_start=0.0, trim_end=0.0, config=None,
+                       nice_level=None, master_file=None):
+        """
+        Produit le message final depuis la capture PCM brute en un seul passage ffmpeg
+        Coupe + filtre + encodage MP3 en une fois, avec la copie _original si configurée
+        trim_start / trim_end: secondes à retirer au début et à la fin
+        nice_level: priorité CPU de ffmpeg (ex. 19 pour un rendu en arrière-plan)
+        master_file: copie sans perte (.wav/.flac) du message coupé, sans effet, dans le même passage
+        Retourne le chemin du fichier final, ou None si erreur
+        """
+        if not os.path.exists(raw_file) or os.path.getsize(raw_file) == 0:
+            print(f"Capture brute inexistante ou vide: {raw_file}")
+            return None
+        
+        if config is None:
+            config = self.get_filter_config()
+        
+        try:
+            duration = get_wav_duration(raw_file)
+            
+            # Points de coupe (on garde tout si le message est trop court)
+            start = max(0.0, trim_start)
+            length = duration - start - max(0.0, trim_end)
+            if length <= 0:
+                print(f"Message trop court pour être coupé ({duration:.2f}s) - conservé entier")
+                start, length = 0.0, duration
+            
+            # Crête de la partie gardée: ni l'amorce ni le choc du raccrochage ne fixent la normalisation
+            _, peak_db = self.get_wav_info(raw_file, start, length)
+        except Exception as e:
+            print(f"Erreur lecture capture brute: {e}")
+            return None
+        
+        # Chaîne d'effets (None si filtres désactivés)
+        filter_chain = None
+        if config["enabled"]:
+            filter_chain = self.build_filter_chain(
+                config["type"], config["intensity"], peak_gain_db=-0.1 - peak_db
+            )
+            if filter_chain is None:
+                print(f"Type de filtre non reconnu: {config['type']} - encodage sans effet")
+        
+        base_name, ext = os.path.splitext(output_file)
+        original_file = f"{base_name}_original{ext}"
+        keep_original = filter_chain is not None and config["keep_original"]
+        encode_args = ["-acodec", FFMPEG_AUDIO_CODEC, "-ab", FFMPEG_BITRATE]
+        master_args = self.get_master_args(master_file)
+        
+        nice_prefix = [] if nice_level is None else ["nice", "-n", str(nice_level)]
+        cmd = nice_prefix + [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+            "-i", raw_file
+        ]
+        
+        if filter_chain and EFFECTS_ENGINE == "numpy":
+            # Effets calculés en processus, ffmpeg ne fait que l'encodage
+            if self.render_message_dsp(raw_file, output_file, start, length, filter_chain, config, nice_prefix):
+                if not keep_original and not master_file:
+                    print(f"✅ Message final: {output_file}")
+                    return output_file
+                # Original et master encodés sans effet, depuis la même capture
+                original_args = [*encode_args, original_file] if keep_original else []
+                try:
+                    result = subprocess.run(cmd + original_args + master_args, capture_output=True, text=True,
+                                            timeout=120)
+                    error = result.stderr if result.returncode != 0 else None
+                except subprocess.TimeoutExpired:
+                    error = "timeout"
+                if error is None:
+                    if keep_original:
+                        print(f"Original sauvegardé: {original_file}")
+                    if master_file:
+                        print(f"Master sauvegardé: {master_file}")
+                    print(f"✅ Message final: {output_file}")
+                    return output_file
+                # Sans original ni master la capture brute ne doit pas être supprimée: rendu complet par ffmpeg
+                print(f"❌ Erreur encodage original/master: {error} - rendu complet par ffmpeg")
+            else:
+                print("Moteur numpy indisponible - rendu des effets par ffmpeg")
+        
+        if keep_original:
+            # Un seul décodage, deux sorties encodées une seule fois chacune
+            cmd += [
+                "-filter_complex", f"[0:a]asplit=2[orig][filt];[filt]{filter_chain}[out]",
+                "-map", "[out]", *encode_args, output_file,
+                "-map", "[orig]", *encode_args, original_file
+            ]
+        elif filter_chain:
+            cmd += ["-af", filter_chain, *encode_args, output_file]
+        else:
+            cmd += [*encode_args, output_file]
+        cmd += master_args
+        
+        print(f"Rendu du message en un passage: {start:.2f}s -> {start + length:.2f}s "
+              f"(filtre: {config['type'] if filter_chain else 'aucun'})")
+        
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+        except subprocess.TimeoutExpired:
+            print("❌ Timeout lors du rendu du message")
+            return None
+        
+        if result.returncode != 0 or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            print(f"❌ Erreur rendu ffmpeg: {result.stderr}")
+            if filter_chain:
+                # Repli: message coupé sans effet plutôt que pas de message
+                print("Nouvel essai sans effet...")
+                fallback_config = dict(config, enabled=False)
+                return self.render_message(raw_file, output_file, trim_start, trim_end, fallback_config,
+                                           nice_level, master_file)
+            return None
+        
+        if keep_original:
+            print(f"Original sauvegardé: {original_file}")
+        if master_file:
+            print(f"Master sauvegardé: {master_file}")
+        print(f"✅ Message final: {output_file}")
+        return output_file
+    
+    def measure_peak_db(self, input_file, start=0.0, length=None):
+        """Crête (dBFS) d'un fichier audio quelconque entre start et start + length, via ffmpeg volumedetect"""
+        if input_file.endswith(".wav"):
+            return self.get_wav_info(input_file, start, length)[1]
+        window = ["-ss", f"{start:.3f}"] + ([] if length is None else ["-t", f"{length:.3f}"])
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostats", *window, "-i", input_file,
+             "-af", "volumedetect", "-f", "null", "-"],
+            capture_output=True, text=True, timeout=120
+        )
+        match = re.search(r"max_volume:\s*(-?[\d.]+) dB", result.stderr)
+        return float(match.group(1)) if match else 0.0
+    
+    def render_archive_file(self, source_file, output_file, config, nice_level=None):
+        """
+        Re-rend un message archivé depuis sa source sans effet (master ou _original.mp3)
+        Le message n'est remplacé qu'une fois le nouveau rendu complet
+        Retourne True si le rendu a réussi
+        """
+        filter_chain = None
+        if config["enabled"]:
+            # Source déjà coupée (master ou _original): tout le fichier est la partie gardée
+            peak_db = self.measure_peak_db(source_file, 0.0, None) if config["type"] == "telephone" else 0.0
+            filter_chain = self.build_filter_chain(config["type"], config["intensity"],
+                                                   peak_gain_db=-0.1 - peak_db)
+        
+        partial_file = f"{output_file}.part"
+        if filter_chain is None and source_file.endswith(".mp3"):
+            # Sans effet: simple copie, pas de ré-encodage MP3
+            shutil.copyfile(source_file, partial_file)
+        else:
+            nice_prefix = [] if nice_level is None else ["nice", "-n", str(nice_level)]
+            cmd = nice_prefix + ["ffmpeg", "-y", "-loglevel", "error", "-i", source_file]
+            if filter_chain:
+                cmd += ["-af", filter_chain]
+            cmd += ["-acodec", FFMPEG_AUDIO_CODEC, "-ab", FFMPEG_BITRATE, "-f", "mp3", partial_file]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            if result.returncode != 0 or not os.path.exists(partial_file) or os.path.getsize(partial_file) == 0:
+                print(f"❌ Erreur rendu {os.path.basename(source_file)}: {result.stderr.strip()}")
+                if os.path.exists(partial_file):
+                    os.remove(partial_file)
+                return False
+        
+        os.replace(partial_file, output_file)
+        return True
+    
+    def get_dsp_texture(self, config):
+        """Niveaux (saturation, bruit rose) ajoutés par le moteur numpy, None si désactivés"""
+        if not DSP_VINTAGE_TEXTURE or config["type"] not in self.default_effects:
+            return None
+        effect_params = self.default_effects[config["type"]]
+        return (effect_params["saturation_level"] * config["intensity"],
+                effect_params["noise_level"] * config["intensity"])
+    
+    def can_stream_effects(self, config):
+        """
+        Indique si les effets peuvent être appliqués pendant la capture
+        Le filtre téléphone normalise sur la crête de tout le message: rendu après l'appel
+        """
+        return not (config["enabled"] and config["type"] == "telephone")
+    
+    def start_pcm_encoder(self, sample_rate, output_file, nice_prefix=None):
+        """Lance ffmpeg pour encoder en MP3 du PCM 16 bits mono reçu sur son entrée standard"""
+        return subprocess.Popen(
+            (nice_prefix or []) + [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "-",
+                "-acodec", FFMPEG_AUDIO_CODEC, "-ab", FFMPEG_BITRATE, output_file
+            ],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    
+    def render_message_dsp(self, raw_file, output_file, start, length, filter_chain, config, nice_prefix):
+        """
+        Applique la chaîne d'effets avec le moteur numpy (vintage_dsp) par blocs d'une seconde
+        et envoie le PCM obtenu à ffmpeg pour l'encodage MP3
+        Retourne True si le message a été produit
+        """
+        try:
+            # numpy n'est chargé que si le moteur en processus est utilisé
+            import vintage_dsp
+        except ImportError as e:
+            print(f"Moteur numpy non disponible: {e}")
+            return False
+        
+        texture = self.get_dsp_texture(config)
+        
+        print(f"Rendu du message (moteur numpy): {start:.2f}s -> {start + length:.2f}s "
+              f"(filtre: {config['type']})")
+        
+        process = None
+        try:
+            chain, pcm_blocks = vintage_dsp.render_pcm(raw_file, filter_chain, start, length, texture)
+            process = self.start_pcm_encoder(chain.output_rate, output_file, nice_prefix)
+            for pcm in pcm_blocks:
+                process.stdin.write(pcm)
+            _, stderr = process.communicate(timeout=120)
+        except Exception as e:
+            print(f"❌ Erreur moteur numpy: {e}")
+            if process and process.poll() is None:
+                process.kill()
+                process.wait()
+            return False
+        
+        if process.returncode != 0 or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            print(f"❌ Erreur encodage ffmpeg: {stderr.decode(errors='replace')}")
+            return False
+        return True
+    
     def get_available_filters(self):
         """Retourne la liste des filtres disponibles"""
         return list(self.default_effects.keys())
\ No newline at end of file
@@ -5,13 +5,123 @@ Version portable avec gestion automatique des chemins et volume configurable
 Version corrigée avec retry audio pour démarrage système
 """
 
-import pygame
 import os
+import threading
 import time
 from config import (
     PYGAME_FREQUENCY, PYGAME_SIZE, PYGAME_CHANNELS, PYGAME_BUFFER,
-    SEARCH_CORRESPONDANT_FILE, BIP_FILE, ensure_directories
+    SEARCH_CORRESPONDANT_FILE, BIP_FILE, SERVICE_NUMBERS, ensure_directories,
+    is_special_audio_number, get_special_audio_file_path, SIMULATION, SIMULATION_AUDIO_OUT
 )
+from clip_cache import ClipCache
+from call_tracer import call_tracer
+from lazy_import import lazy_import
+
+# pygame est chargé à l'initialisation du mixer (étape audio du démarrage), pas à l'import
+pygame = lazy_import("pygame")
+
+
+class PlaybackSequence:
+    """
+    Enchaînement de sons sans blanc sur un canal du mixer (Channel.queue)
+    Un thread de surveillance met le son suivant en file dès que le précédent démarre
+    et horodate (time.monotonic) la fin de chaque son, c'est-à-dire le début du suivant
+    """
+
+    POLL_INTERVAL = 0.005  # secondes entre deux vérifications du canal
+
+    def __init__(self, paths, sounds, channel, gpio_manager, on_clip_finished=None):
+        self.paths = paths
+        self.sounds = sounds
+        self.channel = channel
+        self.gpio_manager = gpio_manager
+        self.on_clip_finished = on_clip_finished  # on_clip_finished(index, path, horodatage)
+
+        self.started_at = None
+        self.finished_at = [None] * len(sounds)
+        self.clip_events = [threading.Event() for _ in sounds]
+        self.done = threading.Event()
+        self.interrupted = False
+        self.current = 0
+        self.queued = False
+        self.thread = None
+
+    def start(self, volume):
+        for sound in self.sounds:
+            sound.set_volume(volume)
+        self.channel.play(self.sounds[0])
+        self.started_at = time.monotonic()
+        self.queue_next()
+        self.thread = threading.Thread(target=self.monitor_loop, name="timevox-playlist", daemon=True)
+        self.thread.start()
+
+    def queue_next(self):
+        self.queued = self.current + 1 < len(self.sounds)
+        if self.queued:
+            self.channel.queue(self.sounds[self.current + 1])
+
+    def monitor_loop(self):
+        while not self.done.is_set():
+            time.sleep(self.POLL_INTERVAL)
+
+            if self.gpio_manager.is_phone_on_hook():
+                print("Raccrochage détecté pendant lecture")
+                self.channel.stop()
+                self.finish(interrupted=True)
+                return
+
+            busy = self.channel.get_busy()
+            if busy and self.queued and self.channel.get_queue() is None:
+                # Le son en file vient de démarrer: le précédent est terminé
+                self.clip_finished(self.current, time.monotonic())
+                self.current += 1
+                self.queue_next()
+            elif not busy:
+                # Canal arrêté avant la fin de la liste: lecture interrompue (stop_audio)
+                interrupted = self.current < len(self.sounds) - 1
+                if not interrupted:
+                    self.clip_finished(self.current, time.monotonic())
+                self.finish(interrupted)
+                return
+
+    def clip_finished(self, index, timestamp):
+        self.finished_at[index] = timestamp
+        self.clip_events[index].set()
+        if self.on_clip_finished:
+            try:
+                self.on_clip_finished(index, self.paths[index], timestamp)
+            except Exception as e:
+                print(f"Erreur notification fin de lecture: {e}")
+
+    def finish(self, interrupted):
+        self.interrupted = interrupted
+        for event in self.clip_events:
+            event.set()  # Les sons non joués restent sans horodatage (None)
+        self.done.set()
+
+    def wait_clip(self, index, timeout=None):
+        """Attend la fin du son index; retourne son horodatage de fin, None si la lecture a été interrompue"""
+        self.clip_events[index].wait(timeout)
+        return self.finished_at[index]
+
+    def wait(self, timeout=None):
+        """Attend la fin de la liste; retourne True si elle a été jouée entièrement"""
+        self.done.wait(timeout)
+        return self.done.is_set() and not self.interrupted
+
+    def get_remaining(self):
+        """Durée estimée (secondes) avant la fin du dernier son"""
+        if self.done.is_set():
+            return 0.0
+        current_start = self.finished_at[self.current - 1] if self.current else self.started_at
+        remaining = current_start + self.sounds[self.current].get_length() - time.monotonic()
+        remaining += sum(sound.get_length() for sound in self.sounds[self.current + 1:])
+        return max(0.0, remaining)
+
+    def stop(self):
+        """Interrompt la lecture"""
+        if not self.done.is_set():
+            self.channel.stop()
 
 
 class AudioManager:
@@ -19,6 +129,9 @@ class AudioManager:
         self.gpio_manager = gpio_manager
         self.usb_manager = usb_manager
         self.mixer_initialized = False  # FLAG pour savoir si pygame fonctionne
+        self.volume = 0.02
+        # Sons décodés une seule fois, joués sans relire la clé; bip et tonalité jamais évincés
+        self.clip_cache = ClipCache(pinned=[BIP_FILE, SEARCH_CORRESPONDANT_FILE])
         
         # NOUVEAU: Logger sur USB pour diagnostic
         self.log_to_usb("=== TIMEVOX AUDIO INIT START ===")
@@ -102,8 +215,15 @@ class AudioManager:
         """Initialise pygame mixer avec retry pour attendre que l'audio soit prêt"""
         self.log_to_usb("🔊 Début initialisation audio...")
         
-        # Déterminer le bon périphérique audio à utiliser
-        audio_device = self.get_best_audio_device()
+        if SIMULATION:
+            # Pas de carte son: le mixer écrit son PCM dans un fichier, au rythme réel (pilote SDL "disk")
+            os.environ['SDL_AUDIODRIVER'] = 'disk'
+            os.environ['SDL_DISKAUDIOFILE'] = SIMULATION_AUDIO_OUT
+            audio_device = None
+            max_attempts = 1
+        else:
+            # Déterminer le bon périphérique audio à utiliser
+            audio_device = self.get_best_audio_device()
         self.log_to_usb(f"Périphérique audio sélectionné: {audio_device}")
         
         for attempt in range(max_attempts):
@@ -183,22 +303,9 @@ class AudioManager:
         return False
 
     def log_to_usb(self, message):
-        """Log des messages de diagnostic sur la clé USB"""
-        try:
-            if self.usb_manager and self.usb_manager.is_usb_available():
-                import datetime
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                log_entry = f"{timestamp} - {message}\n"
-                
-                log_dir = os.path.join(self.usb_manager.usb_path, "Logs")
-                if not os.path.exists(log_dir):
-                    os.makedirs(log_dir)
-                
-                log_file = os.path.join(log_dir, "audio_debug.log")
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(log_entry)
-        except Exception as e:
-            print(f"Erreur log USB: {e}")  # Fallback console
+        """Log des messages de diagnostic sur la clé USB (écriture différée)"""
+        if self.usb_manager:
+            self.usb_manager.log_line("audio_debug.log", message)
     
     def check_alsa_ready(self):
         """Vérifier que ALSA est prêt avant d'initialiser pygame"""
@@ -252,6 +359,7 @@ class AudioManager:
             print("Clé USB non disponible - utilisation du volume par défaut (2%)")
         
         # Appliquer le volume à pygame avec vérification
+        self.volume = volume_pygame
         try:
             if self.mixer_initialized:
                 pygame.mixer.music.set_volume(volume_pygame)
@@ -317,6 +425,11 @@ class AudioManager:
                 print("Fichier vide")
                 return False
 
+            # Son déjà décodé (ou décodable en mémoire): lecture immédiate
+            sound = self.clip_cache.get(path)
+            if sound is not None:
+                return self.play_sound(sound)
+
             # Arrêter toute musique en cours
             pygame.mixer.music.stop()
             time.sleep(0.1)
@@ -336,6 +449,7 @@ class AudioManager:
                 print("Échec démarrage lecture")
                 return False
 
+            call_tracer.mark("tonalite", once=True)
             print("Lecture en cours...")
             while pygame.mixer.music.get_busy():
                 if self.gpio_manager.is_phone_on_hook():
@@ -352,6 +466,80 @@ class AudioManager:
             print(f"Type erreur: {type(e)}")
             return False
     
+    def play_sound(self, sound):
+        """
+        Joue un son décodé du cache et surveille le raccrochage
+        Retourne True si la lecture s'est bien déroulée, False si interrompue
+        """
+        pygame.mixer.music.stop()
+        sound.set_volume(self.volume)
+        channel = sound.play()
+        if channel is None:
+            print("Échec démarrage lecture (aucun canal libre)")
+            return False
+
+        call_tracer.mark("tonalite", once=True)
+        print("Lecture en cours (cache)...")
+        while channel.get_busy():
+            if self.gpio_manager.is_phone_on_hook():
+                print("Raccrochage détecté pendant lecture")
+                channel.stop()
+                return False
+            time.sleep(0.02)
+
+        print("Lecture terminée.")
+        return True
+    
+    def play_sequence(self, paths, on_clip_finished=None):
+        """
+        Lance sans blanc une suite de sons (ex. tonalité -> annonce -> bip) et rend la main aussitôt
+        Retourne la PlaybackSequence en cours, ou None si un des sons n'est pas disponible en cache
+        (l'appelant se rabat alors sur play_audio() son par son)
+        """
+        if not self.mixer_initialized or not paths:
+            return None
+        with call_tracer.measure("chargement_annonce"):
+            sounds = [self.clip_cache.get(path) for path in paths]
+        if any(sound is None for sound in sounds):
+            print("Lecture enchaînée impossible (son non décodable en mémoire)")
+            return None
+
+        try:
+            pygame.mixer.music.stop()
+            channel = pygame.mixer.find_channel(True)
+            sequence = PlaybackSequence(paths, sounds, channel, self.gpio_manager, on_clip_finished)
+            sequence.start(self.volume)
+            call_tracer.mark("tonalite", once=True)
+        except Exception as e:
+            print(f"Erreur lecture enchaînée: {e}")
+            return None
+
+        print(f"Lecture enchaînée: {' -> '.join(os.path.basename(path) for path in paths)}")
+        return sequence
+    
+    def get_preload_paths(self):
+        """Sons joués à chaque appel, par ordre de priorité: bip, tonalité, annonces, numéros spéciaux"""
+        paths = [BIP_FILE, SEARCH_CORRESPONDANT_FILE]
+        usb_path = self.usb_manager.usb_path if self.usb_manager else None
+        if usb_path:
+            announce_index = self.usb_manager.get_announce_index()
+            if announce_index:
+                paths += announce_index.get_files()
+            paths += [
+                get_special_audio_file_path(number, usb_path)
+                for number in SERVICE_NUMBERS if is_special_audio_number(number)
+            ]
+        return paths
+    
+    def preload_clips(self):
+        """Décode à l'avance les sons des appels (tâche de fond au démarrage)"""
+        if not self.mixer_initialized:
+            return 0
+        loaded = self.clip_cache.preload(self.get_preload_paths())
+        status = self.clip_cache.get_status()
+        print(f"🎵 {loaded} son(s) préchargé(s) - {status['memory_mb']}/{status['max_mb']} Mo")
+        return loaded
+    
     def stop_audio(self):
         """Arrête la lecture audio en cours"""
         if not self.mixer_initialized:
@@ -362,5 +550,8 @@ class AudioManager:
             if pygame.mixer.music.get_busy():
                 pygame.mixer.music.stop()
                 print("Musique arrêtée")
+            if pygame.mixer.get_busy():
+                pygame.mixer.stop()
+                print("Son arrêté")
         except Exception as e:
             print(f"Erreur arrêt audio: {e}")
\ No newline at end of file
@@ -0,0 +1,175 @@
+# call_tracer.py
+"""
+Mesure des latences de chaque appel (où passe le temps entre le décroché et le message sauvegardé)
+Les modules notent des instants (time.monotonic) et des durées dans l'appel en cours; le rendu
+en arrière-plan retrouve son appel par le fichier du message. Chaque appel terminé est gardé
+dans un tampon circulaire (p50/p95 du menu 0000) et écrit en une ligne JSON dans Logs/.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from config import TRACE_ENABLED, TRACE_RING_SIZE, TRACE_LOG_FILE
+
+# Durées mesurées, dans l'ordre de l'appel, avec leur libellé court pour l'écran
+SPAN_LABELS = OrderedDict([
+    ("decroche_premier_chiffre", "Decroche>chiffre"),
+    ("dernier_chiffre_tonalite", "Chiffre>tonalite"),
+    ("chargement_annonce", "Chargt annonce"),
+    ("bip_capture", "Bip>capture"),
+    ("raccroche_sauvegarde", "Raccroche>sauve"),
+    ("detection_parole", "Detect. parole"),
+    ("rendu", "Coupe+filtre"),
+])
+
+# Durées déduites des instants notés: nom -> (instant de début, instant de fin)
+MARK_SPANS = {
+    "decroche_premier_chiffre": ("decroche", "premier_chiffre"),
+    "dernier_chiffre_tonalite": ("dernier_chiffre", "tonalite"),
+}
+
+
+def get_percentile(values, percent):
+    """Percentile au rang le plus proche d'une liste triée"""
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class CallTracer:
+    def __init__(self, enabled=TRACE_ENABLED, ring_size=TRACE_RING_SIZE):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.usb_manager = None  # Écriture des lignes JSON dans Logs/
+        self.current = None  # Appel en cours (entre décroché et raccroché)
+        self.calls_by_file = OrderedDict()  # Fichier du message -> appel dont le rendu est en attente
+        self.completed = deque(maxlen=ring_size)
+        self.call_count = 0
+
+    def set_usb_manager(self, usb_manager):
+        self.usb_manager = usb_manager
+
+    # --- Appel en cours -----------------------------------------------------
+
+    def begin_call(self):
+        """Décroché: nouvel appel"""
+        if not self.enabled:
+            return
+        if self.current is not None:
+            self.end_call()  # Raccroché puis redécroché avant la fin du raccrochage précédent
+        with self.lock:
+            self.call_count += 1
+            self.current = {
+                "call": self.call_count,
+                "start": datetime.now().isoformat(timespec="seconds"),
+                "marks": {"decroche": time.monotonic()},
+                "spans": {},
+                "pending": None,
+            }
+
+    def mark(self, name, once=False):
+        """Note l'instant name dans l'appel en cours (once: garde le premier)"""
+        with self.lock:
+            if self.current is not None and not (once and name in self.current["marks"]):
+                self.current["marks"][name] = time.monotonic()
+
+    def get_call(self, output_file):
+        # Appelé avec le verrou; un message repris d'un démarrage précédent n'a pas d'appel
+        if output_file is not None:
+            return self.calls_by_file.get(output_file)
+        return self.current
+
+    def record(self, name, seconds, output_file=None):
+        """Note une durée (secondes) dans l'appel du message output_file, sinon l'appel en cours"""
+        with self.lock:
+            call = self.get_call(output_file)
+            if call is not None:
+                call["spans"][name] = round(seconds * 1000.0, 1)
+
+    def span(self, name, start, output_file=None):
+        """Note la durée écoulée depuis start (time.monotonic)"""
+        self.record(name, time.monotonic() - start, output_file)
+
+    @contextmanager
+    def measure(self, name, output_file=None):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.span(name, start, output_file)
+
+    def attach_file(self, output_file):
+        """Le message output_file de l'appel en cours sera sauvegardé plus tard (rendu en arrière-plan)"""
+        with self.lock:
+            if self.current is None:
+                return
+            self.current["pending"] = output_file
+            self.calls_by_file[output_file] = self.current
+            while len(self.calls_by_file) > self.completed.maxlen:
+                self.calls_by_file.popitem(last=False)
+
+    def file_saved(self, output_file, saved=True):
+        """Message sauvegardé (ou rendu abandonné): durée depuis le raccrochage, appel terminé si raccroché"""
+        with self.lock:
+            call = self.calls_by_file.pop(output_file, None)
+            if call is None:
+                return
+            call["pending"] = None
+            marks = call["marks"]
+            start = marks.get("raccroche", marks.get("fin_capture"))
+            if saved and start is not None:
+                call["spans"]["raccroche_sauvegarde"] = round((time.monotonic() - start) * 1000.0, 1)
+            call["saved"] = saved
+            finished = call is not self.current
+        if finished:
+            self.finish(call)
+
+    def end_call(self):
+        """Raccroché: l'appel est écrit maintenant, ou à la sauvegarde de son message"""
+        with self.lock:
+            call = self.current
+            self.current = None
+            if call is None:
+                return
+            call["marks"].setdefault("raccroche", time.monotonic())
+            pending = call["pending"] is not None
+        if not pending:
+            self.finish(call)
+
+    # --- Résultats ----------------------------------------------------------
+
+    def finish(self, call):
+        marks = call.pop("marks")
+        call.pop("pending", None)
+        for name, (start, end) in MARK_SPANS.items():
+            if start in marks and end in marks and marks[end] >= marks[start]:
+                call["spans"].setdefault(name, round((marks[end] - marks[start]) * 1000.0, 1))
+        if not call["spans"]:
+            return  # Décroché puis raccroché sans rien mesurer
+
+        with self.lock:
+            self.completed.append(call)
+        if self.usb_manager and self.usb_manager.usb_path:
+            self.usb_manager.usb_logger.log(TRACE_LOG_FILE, json.dumps(call, ensure_ascii=False))
+
+    def get_percentiles(self):
+        """Retourne {durée: (p50 ms, p95 ms, nombre d'appels)} sur les derniers appels"""
+        with self.lock:
+            calls = list(self.completed)
+        values = {}
+        for call in calls:
+            for name, value in call["spans"].items():
+                values.setdefault(name, []).append(value)
+        result = OrderedDict()
+        for name in list(SPAN_LABELS) + sorted(set(values) - set(SPAN_LABELS)):
+            if name in values:
+                ordered = sorted(values[name])
+                result[name] = (get_percentile(ordered, 50), get_percentile(ordered, 95), len(ordered))
+        return result
+
+
+# Instance partagée par le contrôleur, l'audio, l'enregistrement et les effets
+call_tracer = CallTracer()
@@ -0,0 +1,251 @@
+# capture_service.py
+"""
+Capture micro pré-armée
+Le micro USB est ouvert (ffmpeg -f alsa, PCM sur stdout) dès le début de l'annonce: à la fin
+du bip, le flux tourne déjà. Les dernières secondes reçues sont gardées dans un tampon
+circulaire horodaté et le message est écrit à partir de l'échantillon qui correspond
+exactement à la fin du bip, au lieu de démarrer ffmpeg puis de couper une seconde à l'aveugle.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+import wave
+from config import CAPTURE_RING_SECONDS, CAPTURE_STARTUP_TIMEOUT, SIMULATION
+from wav_utils import read_wav_header
+
+
+def get_capture_input_args(device):
+    """Arguments d'entrée ffmpeg du micro (simulation: device est un WAV mono lu en boucle au rythme réel)"""
+    if SIMULATION:
+        return ["-re", "-stream_loop", "-1", "-i", device]
+    return ["-f", "alsa", "-ac", "1", "-i", device]
+
+
+class CaptureService:
+    def __init__(self):
+        self.process = None
+        self.reader_thread = None
+        self.writer_thread = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()  # En-tête reçu: débit connu
+        self.message_done = threading.Event()
+        self.message_done.set()
+        self.reset()
+
+    def reset(self):
+        self.ready.clear()
+        self.sample_rate = None
+        self.frames_total = 0  # Échantillons reçus depuis l'ouverture du micro
+        self.origin = None  # Horodatage (time.monotonic) de l'échantillon 0
+        self.ring = bytearray()  # Dernières secondes reçues (PCM 16 bits mono)
+        self.ring_start = 0  # Index du premier échantillon du tampon
+        self.message_queue = None  # Blocs PCM du message en cours vers le thread d'écriture
+        self.next_frame = 0
+        self.end_frame = 0
+        self.frames_written = 0
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, device):
+        """Ouvre le micro et commence à remplir le tampon (sans effet si déjà ouvert)"""
+        if self.is_running():
+            return True
+        if not device:
+            return False
+
+        self.stop()
+        self.reset()
+        cmd = [
+            "ffmpeg", *get_capture_input_args(device),
+            "-f", "wav", "-acodec", "pcm_s16le", "-loglevel", "error", "pipe:1"
+        ]
+        try:
+            self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        except Exception as e:
+            print(f"Erreur ouverture micro: {e}")
+            self.process = None
+            return False
+
+        self.reader_thread = threading.Thread(target=self.reader_loop, args=(self.process,),
+                                              name="timevox-capture", daemon=True)
+        self.reader_thread.start()
+        print(f"🎙️ Micro ouvert en avance: {device}")
+        return True
+
+    def reader_loop(self, process):
+        try:
+            sample_rate, _ = read_wav_header(process.stdout)
+        except Exception as e:
+            print(f"Erreur flux micro: {e}")
+            return
+        self.sample_rate = sample_rate
+        self.ready.set()
+
+        pending = b""
+        try:
+            while True:
+                data = process.stdout.read1(65536)
+                now = time.monotonic()
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % 2
+                pending = data[usable:]
+                if usable:
+                    self.receive(data[:usable], now)
+        except Exception as e:
+            print(f"Erreur lecture micro: {e}")
+
+        # Micro fermé ou ffmpeg arrêté: le message en cours s'arrête là
+        with self.lock:
+            self.close_message()
+
+    def receive(self, data, now):
+        """Horodate un bloc reçu et le range dans le tampon ou dans le message en cours"""
+        frames = len(data) // 2
+        with self.lock:
+            first = self.frames_total
+            self.frames_total += frames
+            # Le dernier échantillon arrive au plus tôt quand il est capturé: le minimum
+            # observé de (arrivée - position) élimine la gigue de lecture du pipe
+            origin = now - self.frames_total / self.sample_rate
+            if self.origin is None or origin < self.origin:
+                self.origin = origin
+
+            if self.message_queue is not None:
+                self.push_frames(data, first)
+                return
+
+            self.ring += data
+            excess = len(self.ring) // 2 - int(CAPTURE_RING_SECONDS * self.sample_rate)
+            if excess > 0:
+                del self.ring[:excess * 2]
+                self.ring_start += excess
+
+    def push_frames(self, data, first):
+        """Transmet la partie d'un bloc comprise dans le message (appelé avec le verrou)"""
+        low = max(self.next_frame, first)
+        high = min(self.end_frame, first + len(data) // 2)
+        if high > low:
+            self.message_queue.put(bytes(data[(low - first) * 2:(high - first) * 2]))
+            self.next_frame = high
+        if self.next_frame >= self.end_frame:
+            self.close_message()
+
+    def close_message(self):
+        # Appelé avec le verrou
+        if self.message_queue is not None:
+            self.message_queue.put(None)
+            self.message_queue = None
+
+    def get_frame_at(self, timestamp):
+        """Index de l'échantillon capturé à un instant time.monotonic() donné"""
+        return int(round((timestamp - self.origin) * self.sample_rate))
+
+    def start_message(self, output_file, start_time, duration, renderer=None, trimmer=None):
+        """
+        Écrit dans output_file (WAV) la capture à partir de start_time (time.monotonic)
+        pendant duration secondes; le début peut être déjà dans le tampon
+        renderer: rendu en continu (StreamingRenderer) alimenté avec le même PCM
+        trimmer: détection de parole (SpeechTrimmer) alimentée avec le même PCM
+        """
+        if not self.ready.wait(CAPTURE_STARTUP_TIMEOUT) or not self.is_running():
+            print("Micro pré-armé indisponible")
+            return False
+
+        try:
+            wav = wave.open(output_file, "wb")
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+        except Exception as e:
+            print(f"Erreur création capture: {e}")
+            return False
+        if renderer and not renderer.start(self.sample_rate, 1):
+            renderer = None
+        if trimmer:
+            # Début de parole fixé au plus tôt seulement si un rendu en continu l'attend
+            trimmer.start(self.sample_rate, lock_start=renderer is not None)
+
+        with self.lock:
+            start_frame = self.get_frame_at(start_time)
+            if start_frame < self.ring_start:
+                print(f"⚠️ Début du message hors tampon: {(self.ring_start - start_frame) * 1000 // self.sample_rate} ms perdus")
+                start_frame = self.ring_start
+            self.next_frame = start_frame
+            self.end_frame = start_frame + int(duration * self.sample_rate)
+            self.frames_written = 0
+            self.message_queue = queue.Queue()
+            self.message_done.clear()
+            self.writer_thread = threading.Thread(target=self.writer_loop,
+                                                  args=(self.message_queue, wav, renderer, trimmer),
+                                                  name="timevox-capture-write", daemon=True)
+            self.writer_thread.start()
+            # Partie du message déjà reçue
+            self.push_frames(self.ring, self.ring_start)
+            self.ring = bytearray()
+            self.ring_start = self.frames_total
+
+        delay = (self.frames_total - start_frame) / self.sample_rate
+        print(f"Enregistrement depuis le tampon micro ({max(0.0, delay):.2f}s déjà capturées)")
+        return True
+
+    def writer_loop(self, blocks, wav, renderer, trimmer):
+        """Écrit le message sur la clé hors du thread de lecture (le pipe du micro ne doit pas saturer)"""
+        try:
+            while True:
+                data = blocks.get()
+                if data is None:
+                    break
+                wav.writeframes(data)
+                self.frames_written += len(data) // 2
+                speech_start = trimmer.feed(data) if trimmer else None
+                if renderer:
+                    if speech_start is not None:
+                        # Début de parole trouvé: le rendu en continu peut commencer à cet endroit
+                        renderer.set_trim_start(speech_start)
+                    renderer.feed(data)
+        except Exception as e:
+            print(f"Erreur écriture capture: {e}")
+        finally:
+            try:
+                wav.close()
+            except Exception as e:
+                print(f"Erreur fermeture capture: {e}")
+            self.message_done.set()
+
+    def is_message_active(self):
+        return not self.message_done.is_set()
+
+    def stop_message(self):
+        """Termine le message en cours (raccrochage) et attend la fin de son écriture"""
+        with self.lock:
+            self.close_message()
+        self.message_done.wait(10)
+        return self.get_message_duration()
+
+    def get_message_duration(self):
+        if not self.sample_rate:
+            return 0.0
+        return self.frames_written / self.sample_rate
+
+    def stop(self):
+        """Ferme le micro"""
+        process = self.process
+        self.process = None
+        if process is not None:
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+            if self.reader_thread:
+                self.reader_thread.join(timeout=2)
+        with self.lock:
+            self.close_message()
+            self.ring = bytearray()
@@ -0,0 +1,154 @@
+# clip_cache.py
+"""
+Cache des sons décodés (annonces, bip, tonalité de recherche, numéros spéciaux)
+Chaque MP3 n'est décodé qu'une fois en PCM prêt pour le mixer (pygame.mixer.Sound);
+une entrée est invalidée si la date de modification ou la taille du fichier change.
+La mémoire est plafonnée (CLIP_CACHE_MAX_MB), les sons les moins récemment joués sont évincés,
+sauf les sons épinglés (bip, tonalité de recherche) joués à chaque appel.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from config import CLIP_CACHE_MAX_MB
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
+
+
+class ClipCache:
+    def __init__(self, max_bytes=CLIP_CACHE_MAX_MB * 1024 * 1024, pinned=()):
+        self.max_bytes = max_bytes
+        self.pinned = set(pinned)  # Chemins jamais évincés (un fichier modifié est tout de même redécodé)
+        self.entries = OrderedDict()  # chemin -> (signature, Sound, octets), ordre LRU
+        self.total_bytes = 0
+        self.oversized = {}  # chemin -> signature des fichiers trop gros, lus en streaming
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_signature(self, path):
+        """(mtime_ns, taille) du fichier, None s'il n'existe pas"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get_sound_bytes(self, sound):
+        """Taille en mémoire du PCM décodé d'un son"""
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+    def get(self, path, evict=True):
+        """
+        Retourne le son décodé correspondant au fichier, en le décodant si nécessaire
+        None si le fichier est absent, non décodable ou plus gros que le cache
+        evict=False: le son n'est gardé que s'il tient sans évincer d'autres sons
+        """
+        signature = self.get_signature(path)
+        if signature is None:
+            return None
+
+        with self.lock:
+            if self.oversized.get(path) == signature:
+                return None
+            entry = self.entries.get(path)
+            if entry and entry[0] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                # Fichier modifié sur la clé: l'ancien décodage n'est plus valable
+                self.remove_entry(path)
+            self.misses += 1
+
+        return self.load(path, signature, evict)
+
+    def load(self, path, signature, evict=True):
+        """Décode un fichier (hors verrou: le décodage d'un MP3 prend du temps)"""
+        if not pygame.mixer.get_init():
+            return None
+        try:
+            sound = pygame.mixer.Sound(path)
+        except Exception as e:
+            print(f"Décodage impossible pour le cache ({os.path.basename(path)}): {e}")
+            return None
+
+        size = self.get_sound_bytes(sound)
+        if size > self.max_bytes:
+            # Déjà décodé pour cette lecture; les suivantes passeront par pygame.mixer.music
+            print(f"Son trop volumineux pour le cache ({size // 1024} Ko): {os.path.basename(path)}")
+            with self.lock:
+                self.oversized[path] = signature
+            return sound
+
+        with self.lock:
+            if path in self.entries:
+                self.remove_entry(path)
+            if self.total_bytes + size > self.max_bytes:
+                # Sons évinçables, du moins récemment joué au plus récent
+                candidates = [entry for entry in self.entries if entry not in self.pinned]
+                freeable = sum(self.entries[entry][2] for entry in candidates)
+                if not evict or self.total_bytes - freeable + size > self.max_bytes:
+                    # Pas de place: joué cette fois sans être gardé
+                    return sound
+                for evicted in candidates:
+                    if self.total_bytes + size <= self.max_bytes:
+                        break
+                    self.remove_entry(evicted)
+                    self.evictions += 1
+            self.entries[path] = (signature, sound, size)
+            self.total_bytes += size
+
+        print(f"🎵 Son mis en cache: {os.path.basename(path)} ({size // 1024} Ko, "
+              f"cache {self.total_bytes // (1024 * 1024)}/{self.max_bytes // (1024 * 1024)} Mo)")
+        return sound
+
+    def remove_entry(self, path):
+        # Appelé avec le verrou
+        _, _, size = self.entries.pop(path)
+        self.total_bytes -= size
+
+    def preload(self, paths):
+        """
+        Décode à l'avance une liste de fichiers, par ordre de priorité (tâche de fond au démarrage)
+        S'arrête au premier son qui ne tient plus: les sons déjà chargés ne sont jamais évincés
+        """
+        loaded = 0
+        for path in paths:
+            if not path:
+                continue
+            with self.lock:
+                cached = path in self.entries
+            if cached:
+                continue
+            if self.get(path, evict=False) is None:
+                continue
+            with self.lock:
+                if path not in self.entries:
+                    if path not in self.oversized:
+                        break  # Cache plein
+                    continue
+            loaded += 1
+        return loaded
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.oversized.clear()
+            self.total_bytes = 0
+
+    def get_status(self):
+        """Retourne l'état du cache (diagnostics)"""
+        with self.lock:
+            return {
+                "clips": len(self.entries),
+                "memory_mb": round(self.total_bytes / (1024 * 1024), 1),
+                "max_mb": self.max_bytes // (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
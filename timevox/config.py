@@ -9,6 +9,21 @@ import os
 # Chemin de base de l'application (dossier contenant ce fichier config.py)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Simulation sans matériel (PC de développement, CI): python3 main.py --simulation [scenario.json]
+# GPIO rejoués par un scénario, écran en mémoire, audio et micro dans des fichiers, RTC simulé
+SIMULATION = os.environ.get("TIMEVOX_SIMULATION", "0") not in ("", "0")
+SIMULATION_DIR = os.environ.get("TIMEVOX_SIMULATION_DIR", os.path.join(BASE_DIR, "simulation_data"))
+SIMULATION_USB_PATH = os.path.join(SIMULATION_DIR, "usb")  # Clé USB simulée (simple dossier)
+SIMULATION_AUDIO_OUT = os.path.join(SIMULATION_DIR, "sortie_audio.raw")  # PCM du mixer (pilote SDL "disk")
+SIMULATION_MIC_FILE = os.path.join(SIMULATION_DIR, "micro.wav")  # Micro simulé: WAV mono 16 bits lu en boucle
+SIMULATION_FRAMES_DIR = os.path.join(SIMULATION_DIR, "ecran")  # Images de l'écran (PNG) en fin de simulation
+SIMULATION_MAX_FRAMES = 500  # images de l'écran gardées en mémoire
+SIMULATION_PULSE_LOW = 0.06  # secondes d'impulsion du cadran (10 impulsions/s, rapport 60/40)
+SIMULATION_PULSE_HIGH = 0.04  # secondes de repos entre deux impulsions
+SIMULATION_DIGIT_PAUSE = 0.8  # secondes entre deux chiffres (retour du cadran)
+SIMULATION_SHUTDOWN_HOLD = 3.5  # secondes d'appui simulé sur le bouton d'arrêt
+SIMULATION_READY_TIMEOUT = 60  # secondes max d'attente du contrôleur avant de lancer le scénario
+
 # Configuration GPIO
 BUTTON_GPIO = 17
 HOOK_GPIO = 27
@@ -18,6 +33,9 @@ SOUND_GPIO = 25  # Max98357A SD pin
 REST_TIME = 0.3
 MIN_IMPULSE_TIME = 0.05
 TIMEOUT_RESET = 10
+PULSE_BOUNCE_TIME = 10  # millisecondes d'anti-rebond sur les fronts du cadran
+HOOK_BOUNCE_TIME = 50  # millisecondes d'anti-rebond sur le combiné et le bouton d'arrêt
+STARTUP_TIME_BUDGET = 10  # secondes visées entre le lancement et le téléphone utilisable
 
 # Numéros de service (fixes, courts) - vérifiés dès qu'on atteint leur longueur exacte
 SERVICE_NUMBERS = {
@@ -39,20 +57,68 @@ SEARCH_CORRESPONDANT_FILE = os.path.join(SOUNDS_DIR, "search_correspondant.mp3")
 BIP_FILE = os.path.join(SOUNDS_DIR, "bip.mp3")
 
 # Configuration USB - Point de montage fixe pour le montage automatique
-USB_MOUNT_PATH = "/media/timevox/usb"  # Point de montage fixe pour TimeVox
+USB_MOUNT_PATH = SIMULATION_USB_PATH if SIMULATION else "/media/timevox/usb"  # Point de montage fixe pour TimeVox
 SPECIAL_NUMBERS_DIR = "Numeros speciaux"  # Dossier sur la clé USB contenant les fichiers MP3 spéciaux
 RECORD_DURATION = 60  # secondes (valeur par défaut, peut être surchargée par la config USB)
+CONFIG_POLL_INTERVAL = 5  # secondes entre deux vérifications de config.json si inotify est indisponible
+
+# Journaux sur la clé USB (Logs/), écrits par lots par un thread de fond
+LOG_FLUSH_INTERVAL = 5.0  # secondes maximum avant l'écriture des lignes en attente
+LOG_FLUSH_BYTES = 16 * 1024  # écriture immédiate au-delà de ce volume en attente
+LOG_MAX_BYTES = 1024 * 1024  # taille d'un journal avant rotation (fichier.1, fichier.2...)
+LOG_BACKUP_COUNT = 3  # anciens journaux conservés par fichier
+LOG_QUEUE_SIZE = 2000  # lignes en attente au maximum (au-delà elles sont comptées comme perdues)
+TRACE_ENABLED = True  # Mesure des latences de chaque appel (une ligne JSON par appel dans Logs/)
+TRACE_RING_SIZE = 100  # derniers appels gardés en mémoire pour les p50/p95 du menu 0000
+TRACE_LOG_FILE = "latences_appels.jsonl"
+
+# Configuration RTC (DS3231)
+RTC_DEVICE_PATH = "/dev/rtc0"
+RTC_I2C_BUS = 1
+RTC_I2C_ADDRESS = 0x68
+RTC_STATUS_CACHE_TTL = 300  # secondes avant relecture du RTC pour get_status_info
 
 # Configuration audio
 PYGAME_FREQUENCY = 22050
 PYGAME_SIZE = -16
 PYGAME_CHANNELS = 2
 PYGAME_BUFFER = 512
+CLIP_CACHE_MAX_MB = 48  # Mémoire max des sons décodés en cache (Pi Zero 2W: 512 Mo au total)
 
 # Configuration enregistrement
 FFMPEG_AUDIO_CODEC = "libmp3lame"
 FFMPEG_BITRATE = "128k"
-AUDIO_CUT_DURATION = 1000  # millisecondes à couper au début et fin
+AUDIO_CUT_DURATION = 1000  # millisecondes à couper en fin de message (et au début sans micro pré-armé)
+CAPTURE_PREWARM = True  # Ouvre le micro pendant l'annonce: le message démarre exactement à la fin du bip
+CAPTURE_RING_SECONDS = 3.0  # secondes de micro gardées en mémoire avant le début du message
+CAPTURE_PREROLL = 0.3  # secondes d'avant la fin du bip ajoutées au début du message (invité qui parle sur le bip)
+VAD_ENABLED = True  # Coupe début/fin sur la parole détectée au lieu de AUDIO_CUT_DURATION
+VAD_FRAME_MS = 20  # Durée d'une trame d'analyse du niveau
+VAD_MARGIN_DB = 12  # Écart au-dessus du bruit de fond pour considérer une trame comme parole
+VAD_MIN_LEVEL_DB = -50  # Seuil minimum de parole (dBFS), même sur un micro très silencieux
+VAD_MIN_SPEECH_MS = 120  # Durée minimale au-dessus du seuil (ignore clics et chocs brefs)
+VAD_PADDING_MS = 250  # Marge gardée avant et après la parole (attaques et fins de mots)
+VAD_HANGUP_GUARD_MS = 500  # Fin de capture ignorée après un raccrochage (choc du combiné)
+CAPTURE_STARTUP_TIMEOUT = 3  # secondes max d'attente du flux micro pré-armé
+RAW_CAPTURE_SUFFIX = "_raw.wav"  # Capture PCM brute avant rendu final (coupe + effets)
+AVAILABLE_CAPTURE_FORMATS = ["wav", "flac", "mp3"]  # format_capture de config.json
+DEFAULT_CAPTURE_FORMAT = "mp3"  # mp3: rendu dès le raccrochage; wav/flac: master sans perte + MP3 encodé au repos
+DEFAULT_KEEP_MASTER = True  # Garde le master wav/flac après l'encodage MP3
+MASTER_SUFFIX = "_master"  # Master sans perte (coupé, sans effet) à côté du MP3
+RERENDER_STATE_FILE = ".rerender_state.json"  # Dans Messages/: filtre appliqué à chaque message (--rerender-archive)
+CATALOG_FILE = ".catalog.sqlite"  # Dans Messages/: catalogue SQLite des messages (reconstruit s'il manque)
+POSTPROCESS_WORKERS = 1  # Rendus MP3 simultanés en arrière-plan (le Pi Zero garde des cœurs pour l'appel suivant)
+POSTPROCESS_NICE = 19  # Priorité CPU des rendus en arrière-plan (19 = la plus basse)
+SHUTDOWN_POSTPROCESS_WAIT = 30  # secondes max d'attente des rendus en cours avant l'extinction
+EFFECTS_ENGINE = "ffmpeg"  # Moteur des effets vintage: "ffmpeg" (filtres ffmpeg) ou "numpy" (vintage_dsp, en processus)
+DSP_BLOCK_DURATION = 1.0  # secondes de signal traitées par bloc par le moteur numpy
+# Écart max (dB) toléré par filtre entre le moteur numpy et ffmpeg (--check-dsp)
+# Mesuré sur la capture de référence: ~-75 dB (radio, gramophone), ~-48 dB (téléphone: compand et rééchantillonnage)
+DSP_MATCH_TOLERANCE_DB = {"radio_50s": -60, "telephone": -40, "gramophone": -60}
+DSP_MATCH_DEFAULT_TOLERANCE_DB = -40  # Filtre absent du tableau ci-dessus
+DSP_FIXTURE_SEED = 1234  # Capture de référence de --check-dsp sans fichier: signal identique à chaque vérification
+DSP_VINTAGE_TEXTURE = False  # Moteur numpy: ajoute saturation et bruit rose (niveaux de default_effects)
+STREAMING_EFFECTS = False  # Applique les effets (moteur numpy) pendant la capture: seul l'encodage reste à finir au raccrochage
 
 # Configuration affichage
 DEFAULT_FONT_SIZE = 12
@@ -0,0 +1,296 @@
+# config_store.py
+"""
+Configuration utilisateur (Parametres/config.json) gardée en mémoire
+Chargée une seule fois, rechargée uniquement quand le fichier change (inotify, sinon mtime)
+"""
+
+import os
+import json
+import threading
+from config import (
+    RECORD_DURATION, AVAILABLE_FILTERS, DEFAULT_FILTER_TYPE, DEFAULT_FILTER_INTENSITY,
+    DEFAULT_KEEP_ORIGINAL, CONFIG_POLL_INTERVAL, AVAILABLE_CAPTURE_FORMATS, DEFAULT_CAPTURE_FORMAT,
+    DEFAULT_KEEP_MASTER
+)
+from file_watcher import get_signature, watch_directory
+
+
+class ConfigStore:
+    def __init__(self):
+        self.config_file = None
+        self.signature = None  # (mtime_ns, taille) du fichier chargé
+        self.loaded = False
+        self.version = 0  # Incrémenté à chaque rechargement
+        self.lock = threading.RLock()
+        self.listeners = []
+
+        self.watch_thread = None
+        self.watch_stop = None
+        self.watching = False
+
+        self.reset_defaults()
+
+    def reset_defaults(self):
+        """Valeurs par défaut (pas de clé USB ou fichier illisible)"""
+        self.numero_principal = "1234567890"  # Valeur par défaut (10 chiffres)
+        self.longueur_numero_principal = 10
+        self.duree_enregistrement = RECORD_DURATION
+        self.volume_audio = 2  # Pourcentage (2%)
+        self.filtre_vintage = False
+        self.type_filtre = DEFAULT_FILTER_TYPE
+        self.intensite_filtre = DEFAULT_FILTER_INTENSITY
+        self.conserver_original = DEFAULT_KEEP_ORIGINAL
+        self.format_capture = DEFAULT_CAPTURE_FORMAT
+        self.conserver_master = DEFAULT_KEEP_MASTER
+
+    # --- Chargement -------------------------------------------------------
+
+    def load(self, config_file):
+        """Lit et valide config.json; retourne True si le fichier a pu être chargé"""
+        with self.lock:
+            self.config_file = config_file
+            signature = get_signature(config_file)
+            self.signature = signature
+            self.reset_defaults()
+
+            if signature is None:
+                self.loaded = False
+                return False
+
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
+                self.apply_config(config_data)
+                self.loaded = True
+            except Exception as e:
+                print(f"Erreur lecture config.json: {e}")
+                print("Utilisation des valeurs par défaut")
+                self.loaded = False
+
+            self.version += 1
+
+        self.notify_listeners()
+        return self.loaded
+
+    def check_for_changes(self):
+        """Recharge la configuration si le fichier a changé (mtime/taille); retourne True si rechargée"""
+        with self.lock:
+            if not self.config_file:
+                return False
+            if get_signature(self.config_file) == self.signature:
+                return False
+            print("🔄 config.json modifié - rechargement de la configuration")
+            self.load(self.config_file)
+            return True
+
+    def validate_numero_principal_config(self, numero, longueur):
+        """Valide la cohérence entre le numéro principal et sa longueur déclarée"""
+        numero_str = str(numero)
+        actual_length = len(numero_str)
+
+        # Vérifier que le numéro ne contient que des chiffres
+        if not numero_str.isdigit():
+            print(f"ERREUR CONFIG: Le numéro principal '{numero}' doit contenir uniquement des chiffres")
+            return False
+
+        # Vérifier la cohérence de longueur
+        if actual_length != longueur:
+            print(f"ERREUR CONFIG: Le numéro principal '{numero}' fait {actual_length} chiffres")
+            print(f"                mais longueur_numero_principal est configuré à {longueur}")
+            print(f"                Ces valeurs doivent être cohérentes!")
+            return False
+
+        # Vérifier que la longueur est dans une plage raisonnable
+        if longueur < 4 or longueur > 15:
+            print(f"ERREUR CONFIG: longueur_numero_principal ({longueur}) doit être entre 4 et 15")
+            return False
+
+        print(f"✅ Configuration numéro principal valide: {numero} ({longueur} chiffres)")
+        return True
+
+    def apply_config(self, config_data):
+        """Valide les valeurs lues et les convertit en attributs typés"""
+        # Numéro principal et sa longueur
+        numero_config = None
+        longueur_config = None
+
+        if 'numero_principal' in config_data:
+            numero_config = str(config_data['numero_principal'])
+        else:
+            print("Clé 'numero_principal' non trouvée dans config.json")
+
+        if 'longueur_numero_principal' in config_data:
+            try:
+                longueur_config = int(config_data['longueur_numero_principal'])
+            except (ValueError, TypeError):
+                print("Valeur longueur_numero_principal invalide (doit être un entier)")
+                longueur_config = None
+        else:
+            print("Clé 'longueur_numero_principal' non trouvée dans config.json")
+
+        if numero_config is not None and longueur_config is not None:
+            if self.validate_numero_principal_config(numero_config, longueur_config):
+                self.numero_principal = numero_config
+                self.longueur_numero_principal = longueur_config
+                print(f"Configuration numéro principal chargée: {self.numero_principal} ({self.longueur_numero_principal} chiffres)")
+            else:
+                print("Utilisation des valeurs par défaut à cause d'erreurs de configuration")
+        elif numero_config is not None:
+            # Seulement le numéro est présent, calculer la longueur automatiquement
+            if numero_config.isdigit():
+                self.numero_principal = numero_config
+                self.longueur_numero_principal = len(numero_config)
+                print(f"Numéro principal chargé: {self.numero_principal}")
+                print(f"Longueur calculée automatiquement: {self.longueur_numero_principal}")
+                print("⚠️  Ajoutez 'longueur_numero_principal' dans config.json pour expliciter cette valeur")
+            else:
+                print(f"Numéro principal invalide: {numero_config}")
+
+        # Durée d'enregistrement
+        if 'duree_enregistrement' in config_data:
+            try:
+                self.duree_enregistrement = int(config_data['duree_enregistrement'])
+                print(f"Durée d'enregistrement chargée depuis USB: {self.duree_enregistrement}s")
+            except (ValueError, TypeError):
+                print(f"Valeur duree_enregistrement invalide ({config_data['duree_enregistrement']}) - utilisation valeur par défaut")
+        else:
+            print("Clé 'duree_enregistrement' non trouvée dans config.json - utilisation valeur par défaut")
+
+        # Volume audio
+        if 'volume_audio' in config_data:
+            volume_value = config_data['volume_audio']
+            if isinstance(volume_value, (int, float)) and not isinstance(volume_value, bool) and 0 <= volume_value <= 100:
+                self.volume_audio = volume_value
+                print(f"Volume audio chargé depuis USB: {self.volume_audio}%")
+            else:
+                print(f"Valeur volume_audio invalide ({volume_value}) - doit être entre 0 et 100%")
+                print("Utilisation de la valeur par défaut (2%)")
+        else:
+            print("Clé 'volume_audio' non trouvée dans config.json - utilisation valeur par défaut (2%)")
+
+        # Filtre vintage
+        if 'filtre_vintage' in config_data:
+            filtre_value = config_data['filtre_vintage']
+            if isinstance(filtre_value, bool):
+                self.filtre_vintage = filtre_value
+                print(f"Filtre vintage chargé depuis USB: {'Activé' if filtre_value else 'Désactivé'}")
+            else:
+                print(f"Valeur filtre_vintage invalide ({filtre_value}) - doit être true/false")
+
+        if 'type_filtre' in config_data:
+            type_filtre = config_data['type_filtre']
+            if type_filtre in AVAILABLE_FILTERS:
+                self.type_filtre = type_filtre
+                print(f"Type de filtre chargé depuis USB: {type_filtre}")
+            else:
+                print(f"Type de filtre invalide ({type_filtre}) - types valides: {AVAILABLE_FILTERS}")
+
+        if 'intensite_filtre' in config_data:
+            intensite_value = config_data['intensite_filtre']
+            if isinstance(intensite_value, (int, float)) and not isinstance(intensite_value, bool) and 0.0 <= intensite_value <= 1.0:
+                self.intensite_filtre = float(intensite_value)
+                print(f"Intensité filtre chargée depuis USB: {intensite_value}")
+            else:
+                print(f"Valeur intensite_filtre invalide ({intensite_value}) - doit être entre 0.0 et 1.0")
+
+        if 'conserver_original' in config_data:
+            conserver_value = config_data['conserver_original']
+            if isinstance(conserver_value, bool):
+                self.conserver_original = conserver_value
+                print(f"Conserver original chargé depuis USB: {'Oui' if conserver_value else 'Non'}")
+            else:
+                print(f"Valeur conserver_original invalide ({conserver_value}) - doit être true/false")
+
+        # Format de capture et master sans perte
+        if 'format_capture' in config_data:
+            format_value = config_data['format_capture']
+            if format_value in AVAILABLE_CAPTURE_FORMATS:
+                self.format_capture = format_value
+                print(f"Format de capture chargé depuis USB: {format_value}")
+            else:
+                print(f"Format de capture invalide ({format_value}) - formats valides: {AVAILABLE_CAPTURE_FORMATS}")
+
+        if 'conserver_master' in config_data:
+            master_value = config_data['conserver_master']
+            if isinstance(master_value, bool):
+                self.conserver_master = master_value
+                print(f"Conserver master chargé depuis USB: {'Oui' if master_value else 'Non'}")
+            else:
+                print(f"Valeur conserver_master invalide ({master_value}) - doit être true/false")
+
+    # --- Accès ------------------------------------------------------------
+
+    def get_filter_config(self):
+        """Retourne la configuration des filtres au format AudioEffects"""
+        with self.lock:
+            return {
+                "enabled": self.filtre_vintage,
+                "type": self.type_filtre,
+                "intensity": self.intensite_filtre,
+                "keep_original": self.conserver_original
+            }
+
+    def get_capture_config(self):
+        """Retourne le format de capture et la conservation du master"""
+        with self.lock:
+            return {
+                "format": self.format_capture,
+                "keep_master": self.conserver_master
+            }
+
+    def as_dict(self):
+        """Retourne toutes les valeurs typées (clés identiques à config.json)"""
+        with self.lock:
+            return {
+                "numero_principal": self.numero_principal,
+                "longueur_numero_principal": self.longueur_numero_principal,
+                "duree_enregistrement": self.duree_enregistrement,
+                "volume_audio": self.volume_audio,
+                "filtre_vintage": self.filtre_vintage,
+                "type_filtre": self.type_filtre,
+                "intensite_filtre": self.intensite_filtre,
+                "conserver_original": self.conserver_original,
+                "format_capture": self.format_capture,
+                "conserver_master": self.conserver_master
+            }
+
+    def add_listener(self, listener):
+        """Ajoute une fonction (sans argument) appelée après chaque rechargement"""
+        self.listeners.append(listener)
+
+    def notify_listeners(self):
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"Erreur notification rechargement config: {e}")
+
+    # --- Surveillance du fichier --------------------------------------------
+
+    def start_watching(self):
+        """Surveille config.json en arrière-plan (inotify, sinon vérification mtime périodique)"""
+        if self.watching or not self.config_file:
+            return
+        self.watching = True
+        self.watch_stop = threading.Event()
+        self.watch_thread = threading.Thread(target=self.watch_loop, daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        """Arrête la surveillance du fichier"""
+        self.watching = False
+        if self.watch_stop:
+            self.watch_stop.set()
+
+    def watch_loop(self):
+        stop = self.watch_stop
+        if not self.watch_inotify(stop):
+            print(f"⚠️ inotify indisponible - vérification de config.json toutes les {CONFIG_POLL_INTERVAL}s")
+            while not stop.wait(CONFIG_POLL_INTERVAL):
+                self.check_for_changes()
+
+    def watch_inotify(self, stop):
+        """Attend les événements inotify du dossier Parametres; retourne False si inotify est indisponible"""
+        name = os.path.basename(self.config_file)
+        return watch_directory(os.path.dirname(self.config_file), stop, self.check_for_changes,
+                               accept=lambda event_name: event_name == name)
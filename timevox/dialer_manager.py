@@ -5,9 +5,9 @@ Version avec gestion flexible des numéros : service (courts) et principal (long
 """
 
 import time
-from datetime import datetime, timedelta
-from config import REST_TIME, MIN_IMPULSE_TIME, TIMEOUT_RESET, SERVICE_NUMBERS, is_service_number
+from config import TIMEOUT_RESET, SERVICE_NUMBERS, is_service_number
 from display_manager import DisplayManager
+from pulse_decoder import PulseDecoder
 
 class DialerManager:
     def __init__(self, gpio_manager, display_manager, usb_manager):
@@ -16,18 +16,18 @@ class DialerManager:
         self.usb_manager = usb_manager  # Référence au gestionnaire USB pour les paramètres
         
         # État de composition
-        self.count = 0
-        self.printed = True
-        self.pressed = False
-        self.rest_start = datetime.now()
-        self.last_impulse_time = time.time()
-        self.first_impulse_time = None
         self.composed_number = ""
         self.last_digit_time = time.time()
         
+        # Décodage des impulsions sur interruptions GPIO (chiffres mis en file)
+        self.pulse_decoder = PulseDecoder(self.gpio_manager)
+        self.pulse_decoder.start()
+        
         # Obtenir les paramètres du numéro principal
         self.numero_principal = self.usb_manager.get_numero_principal()
         self.longueur_numero_principal = self.usb_manager.get_longueur_numero_principal()
+        # Prise en compte à chaud d'une modification de config.json
+        self.usb_manager.config_store.add_listener(self.refresh_config)
         
         self.menu_mode = False  # Nouveau flag pour mode menu
         
@@ -38,10 +38,8 @@ class DialerManager:
     def reset_dialing(self, clear_display=True):
         """Remet à zéro la composition en cours"""
         self.composed_number = ""
-        self.count = 0
-        self.printed = True
-        self.pressed = False
         self.last_digit_time = time.time()
+        self.pulse_decoder.clear()
         if clear_display:
             self.display_manager.clear_display()
             self.display_manager.reset_timevox_flag()
@@ -50,10 +48,12 @@ class DialerManager:
     def clear_dialing_state(self):
         """Nettoie seulement l'état de composition sans toucher à l'affichage"""
         self.composed_number = ""
-        self.count = 0
-        self.printed = True
-        self.pressed = False
         self.last_digit_time = time.time()
+        self.pulse_decoder.clear()
+    
+    def discard_pending_digits(self):
+        """Ignore les chiffres composés pendant le traitement d'un appel"""
+        self.pulse_decoder.clear()
     
     def check_service_number_match(self, current_number):
         """
@@ -117,90 +117,73 @@ class DialerManager:
     
     def process_dialing(self):
         """
-        Traite les impulsions du cadran avec logique flexible
+        Consomme les chiffres décodés par le PulseDecoder (non bloquant)
         En mode normal: retourne le numéro composé complet si un numéro cible est atteint
         En mode menu: retourne chaque chiffre dès qu'il est composé
         """
-        current_time = time.time()
-        
-        # Traitement des impulsions du cadran (code existant inchangé)
-        if (self.gpio_manager.is_phone_off_hook() and 
-            self.gpio_manager.is_button_pressed()):
-            
-            if not self.pressed and current_time - self.last_impulse_time > MIN_IMPULSE_TIME:
-                self.count += 1
-                self.pressed = True
-                self.printed = False
-                self.last_impulse_time = current_time
-                if self.count == 1:
-                    self.first_impulse_time = current_time
-        else:
-            if self.pressed:
-                self.rest_start = datetime.now()
-            self.pressed = False
+        digit = self.pulse_decoder.get_digit()
+        if digit is not None:
+            return self.handle_digit(digit)
 
-        # Traitement des chiffres composés
-        if (datetime.now() - self.rest_start > timedelta(seconds=REST_TIME) and 
-            not self.printed):
-            
-            if self.count == 1 and (time.time() - self.first_impulse_time) < 0.15:
-                self.count = 0
-            else:
-                digit = self.count % 10
-                
-                # === NOUVEAU CODE POUR MODE MENU ===
-                if self.menu_mode:
-                    # Mode menu: retourner immédiatement le chiffre
-                    print(f"Mode menu - Chiffre détecté: {digit}")
-                    self.count = 0
-                    self.printed = True
-                    return str(digit)
-                
-                # === CODE EXISTANT POUR MODE NORMAL ===
-                self.composed_number += str(digit)
-                self.last_digit_time = time.time()
-                print(f"Numéro composé: {self.composed_number}")
-                self.display_manager.show_calling_number(self.composed_number)
-                
-                # Logique existante pour vérifier les numéros complets...
-                service_match = self.check_service_number_match(self.composed_number)
-                if service_match:
-                    completed_number = service_match
-                    self.reset_dialing()
-                    return completed_number
-                
-                main_match = self.check_main_number_match(self.composed_number)
-                if main_match:
-                    completed_number = main_match
-                    self.reset_dialing()
-                    return completed_number
-                
-                if self.is_number_too_long(self.composed_number):
-                    print(f"❌ Numéro trop long: {self.composed_number}")
-                    self.display_manager.show_unknown_message()
-                    time.sleep(3)
-                    self.reset_dialing()
-                    return None
-                
-                possible_lengths = self.get_expected_lengths_for_current_number(self.composed_number)
-                if possible_lengths:
-                    print(f"📞 Composition en cours - longueurs possibles: {possible_lengths}")
-                else:
-                    print(f"❌ Aucune correspondance possible pour: {self.composed_number}")
-                    self.display_manager.show_unknown_message()
-                    time.sleep(3)
-                    self.reset_dialing()
-                    return None
-                
-                self.count = 0
-            self.printed = True
-
-        # Timeout - reset si pas d'activité (code existant)
+        self.check_timeout()
+        return None
+    
+    def check_timeout(self):
+        """Timeout - reset si pas d'activité. Retourne True si la composition a été annulée"""
         if (self.composed_number and 
             (time.time() - self.last_digit_time) > TIMEOUT_RESET):
             print(f"⏰ Timeout - Reset: {self.composed_number}")
             self.reset_dialing()
-
+            return True
+        return False
+    
+    def has_pending_digits(self):
+        """Retourne True si des chiffres décodés n'ont pas encore été traités"""
+        return self.pulse_decoder.has_pending_digits()
+    
+    def handle_digit(self, digit):
+        """Ajoute un chiffre décodé au numéro en cours et vérifie les correspondances"""
+        # === MODE MENU ===
+        if self.menu_mode:
+            # Mode menu: retourner immédiatement le chiffre
+            print(f"Mode menu - Chiffre détecté: {digit}")
+            return digit
+        
+        # === MODE NORMAL ===
+        self.composed_number += digit
+        self.last_digit_time = time.time()
+        print(f"Numéro composé: {self.composed_number}")
+        self.display_manager.show_calling_number(self.composed_number)
+        
+        service_match = self.check_service_number_match(self.composed_number)
+        if service_match:
+            completed_number = service_match
+            self.reset_dialing()
+            return completed_number
+        
+        main_match = self.check_main_number_match(self.composed_number)
+        if main_match:
+            completed_number = main_match
+            self.reset_dialing()
+            return completed_number
+        
+        if self.is_number_too_long(self.composed_number):
+            print(f"❌ Numéro trop long: {self.composed_number}")
+            self.display_manager.show_unknown_message()
+            time.sleep(3)
+            self.reset_dialing()
+            return None
+        
+        possible_lengths = self.get_expected_lengths_for_current_number(self.composed_number)
+        if possible_lengths:
+            print(f"📞 Composition en cours - longueurs possibles: {possible_lengths}")
+        else:
+            print(f"❌ Aucune correspondance possible pour: {self.composed_number}")
+            self.display_manager.show_unknown_message()
+            time.sleep(3)
+            self.reset_dialing()
+            return None
+        
         return None
     
     def get_composed_number(self):
@@ -209,7 +192,7 @@ class DialerManager:
     
     def is_composing(self):
         """Retourne True si un numéro est en cours de composition"""
-        return bool(self.composed_number)
+        return bool(self.composed_number) or self.pulse_decoder.is_dialing()
     
     def refresh_config(self):
         """Met à jour les paramètres depuis le gestionnaire USB (utile pour rechargement à chaud)"""
@@ -245,7 +228,7 @@ class DialerManager:
 
     def wait_for_menu_digit(self, timeout_seconds=15):
         """
-        Attend un chiffre en mode menu en utilisant process_dialing()
+        Attend un chiffre en mode menu sur la file du décodeur d'impulsions
         """
         print(f"🎛️ Attente chiffre menu pendant {timeout_seconds}s...")
         
@@ -263,13 +246,12 @@ class DialerManager:
                     print("📞 Téléphone raccroché")
                     return None
                 
-                # Utiliser la vraie logique qui fonctionne
-                result = self.process_dialing()
-                if result is not None:
+                # Attente bloquante sur la file des chiffres décodés
+                digit = self.pulse_decoder.get_digit(timeout=0.1)
+                if digit is not None:
+                    result = self.handle_digit(digit)
                     print(f"✅ Chiffre reçu en mode menu: {result}")
                     return result
-                
-                time.sleep(0.01)  # Petite pause
             
             print("⏰ Timeout menu")
             return None
@@ -3,12 +3,19 @@
 Gestionnaire de l'affichage OLED
 """
 
-from oled_display import afficher as afficher_texte
 from config import (
     MSG_TIMEVOX, MSG_CALLING, MSG_SAVING, MSG_CALL_ENDED, MSG_SECONDS,
     TIMEVOX_FONT_SIZE, CALLING_FONT_SIZE, COUNTDOWN_FONT_SIZE,
     SAVING_FONT_SIZE, CALL_ENDED_FONT_SIZE
 )
+from lazy_import import lazy_import
+
+# luma/PIL et l'initialisation I2C de l'écran sont chargés au premier affichage
+oled_display = lazy_import("oled_display")
+
+
+def afficher_texte(l1="", l2="", l3="", taille=12, align="gauche"):
+    oled_display.afficher(l1, l2, l3, taille=taille, align=align)
 
 
 class DisplayManager:
@@ -92,4 +99,8 @@ class DisplayManager:
         elif line2:
             afficher_texte(line1, line2, "", taille=size, align=align)
         else:
-            afficher_texte("", line1, "", taille=size, align=align)
\ No newline at end of file
+            afficher_texte("", line1, "", taille=size, align=align)
+
+    def get_display_stats(self):
+        """Retourne les statistiques I2C de l'écran (images ignorées, octets envoyés)"""
+        return oled_display.stats_affichage()
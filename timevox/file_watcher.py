@@ -0,0 +1,78 @@
+# file_watcher.py
+"""
+Surveillance inotify d'un dossier de la clé USB (config.json, dossier Annonce)
+En l'absence d'inotify, les appelants se rabattent sur une vérification mtime périodique
+"""
+
+import os
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# Événements inotify utiles (écriture terminée, remplacement, création, suppression)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+DEFAULT_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_INOTIFY_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def get_signature(path):
+    """Retourne (mtime_ns, taille) du fichier ou dossier, None s'il n'existe pas"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def watch_directory(directory, stop, on_change, accept=None, mask=DEFAULT_MASK):
+    """
+    Appelle on_change() après chaque lot d'événements inotify du dossier jusqu'à stop
+    accept(nom): ne retient que les fichiers concernés (tous par défaut)
+    Retourne False si inotify est indisponible
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            return False
+    except Exception:
+        return False
+
+    try:
+        if libc.inotify_add_watch(fd, directory.encode(), mask) < 0:
+            return False
+
+        print(f"Surveillance inotify de {directory}")
+        # Réveil toutes les secondes uniquement pour pouvoir s'arrêter proprement
+        while not stop.is_set():
+            readable, _, _ = select.select([fd], [], [], 1.0)
+            if not readable:
+                continue
+            try:
+                buffer = os.read(fd, 4096)
+            except BlockingIOError:
+                continue
+
+            changed = False
+            offset = 0
+            while offset + _INOTIFY_HEADER.size <= len(buffer):
+                _, _, _, length = _INOTIFY_HEADER.unpack_from(buffer, offset)
+                offset += _INOTIFY_HEADER.size
+                event_name = buffer[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if accept is None or accept(event_name.decode(errors="replace")):
+                    changed = True
+
+            if changed:
+                on_change()
+        return True
+    except Exception as e:
+        print(f"Erreur surveillance inotify {directory}: {e}")
+        return False
+    finally:
+        os.close(fd)
@@ -232,6 +232,7 @@ class FilterMenuManager:
             # Sauvegarder
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=2, ensure_ascii=False)
+            self.usb_manager.refresh_config()
             
             # Recharger la config dans le gestionnaire d'effets
             self.audio_effects = AudioEffects(self.usb_manager)
@@ -3,8 +3,13 @@
 Gestionnaire des GPIO pour le téléphone TimeVox
 """
 
-import RPi.GPIO as GPIO
-from config import BUTTON_GPIO, HOOK_GPIO, SOUND_GPIO
+from config import BUTTON_GPIO, HOOK_GPIO, SOUND_GPIO, SIMULATION
+
+if SIMULATION:
+    # GPIO en mémoire, pilotés par le scénario de simulation (pas de Raspberry Pi)
+    from simulation import simulated_gpio as GPIO
+else:
+    import RPi.GPIO as GPIO
 
 
 class GPIOManager:
@@ -69,6 +74,30 @@ class GPIOManager:
         except:
             return False
 
+    def add_edge_callback(self, pin, callback, edge="both", bouncetime=None):
+        """
+        Déclenche callback(pin) sur les fronts d'un GPIO (thread GPIO dédié)
+        edge: "both", "falling" ou "rising" - bouncetime: anti-rebond en ms
+        Retourne False si la détection de fronts n'est pas disponible
+        """
+        edges = {"both": GPIO.BOTH, "falling": GPIO.FALLING, "rising": GPIO.RISING}
+        try:
+            if bouncetime:
+                GPIO.add_event_detect(pin, edges[edge], callback=callback, bouncetime=bouncetime)
+            else:
+                GPIO.add_event_detect(pin, edges[edge], callback=callback)
+            return True
+        except Exception as e:
+            print(f"Erreur détection de fronts GPIO {pin}: {e}")
+            return False
+
+    def remove_edge_callback(self, pin):
+        """Supprime la détection de fronts d'un GPIO"""
+        try:
+            GPIO.remove_event_detect(pin)
+        except:
+            pass
+
     def gpio_write(self, pin, value):
         """Écrit sur un GPIO"""
         try:
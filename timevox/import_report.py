@@ -0,0 +1,84 @@
+# import_report.py
+"""
+Diagnostic du coût des imports au démarrage
+Lance un interpréteur avec -X importtime et résume le temps d'import par module de premier niveau
+Usage: python3 main.py --import-report
+"""
+
+import subprocess
+import sys
+from config import BASE_DIR
+
+
+def parse_importtime(output):
+    """
+    Analyse la sortie de -X importtime
+    Retourne une liste (module, temps propre en µs, temps cumulé en µs)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue  # Ligne d'en-tête
+        entries.append((parts[2].strip(), self_us, cumulative_us))
+    return entries
+
+
+def summarize_by_package(entries):
+    """Regroupe les temps propres par module de premier niveau (pygame.mixer -> pygame)"""
+    totals = {}
+    for name, self_us, _ in entries:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def generate_import_report(module="phone_controller"):
+    """
+    Mesure l'import d'un module dans un interpréteur neuf
+    Retourne (total en µs, liste (module, µs) triée) ou None en cas d'échec
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=BASE_DIR, timeout=120
+        )
+    except Exception as e:
+        print(f"Erreur mesure des imports: {e}")
+        return None
+
+    entries = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        print(f"❌ Import de {module} en échec:")
+        for line in errors[-5:]:
+            print(f"   {line}")
+
+    if not entries:
+        return None
+
+    total_us = sum(self_us for _, self_us, _ in entries)
+    return total_us, summarize_by_package(entries)
+
+
+def print_import_report(module="phone_controller", top=20):
+    """Affiche les modules les plus coûteux à importer"""
+    print(f"=== Temps d'import de {module} ===")
+    report = generate_import_report(module)
+    if report is None:
+        print("Aucune mesure disponible")
+        return None
+
+    total_us, packages = report
+    print(f"Total: {total_us / 1000:.1f} ms ({len(packages)} modules de premier niveau)")
+    for package, self_us in packages[:top]:
+        share = 100.0 * self_us / total_us if total_us else 0.0
+        print(f"  {package:<28} {self_us / 1000:8.1f} ms  {share:5.1f}%")
+    return report
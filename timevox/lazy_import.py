@@ -0,0 +1,37 @@
+# lazy_import.py
+"""
+Import différé des dépendances lourdes (pygame, requests, luma/PIL...)
+Le module n'est réellement importé qu'au premier accès à l'un de ses attributs,
+ce qui sort son coût du démarrage de l'interpréteur
+"""
+
+import importlib
+import sys
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        # import_module gère déjà les imports concurrents (verrou par module)
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def is_loaded(self):
+        """Retourne True si le module a déjà été importé"""
+        return self._module is not None or self._name in sys.modules
+
+    def __repr__(self):
+        state = "chargé" if self.is_loaded() else "différé"
+        return f"<module {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """Retourne un module importé au premier usage"""
+    return LazyModule(name)
@@ -3,10 +3,15 @@
 """
 Point d'entrée principal pour le système TimeVox
 Téléphone à cadran avec enregistrement de messages
+Option --import-report: affiche le temps d'import par module puis quitte
+Option --check-dsp [fichier.wav]: compare le moteur d'effets numpy à ffmpeg (capture de référence par défaut) puis quitte
+Option --rerender-archive [dossier Messages]: ré-applique le filtre de config.json à toute l'archive
+Option --simulation [scenario.json]: téléphone complet sans matériel (GPIO, écran, audio et RTC simulés)
 """
 
-from phone_controller import PhoneController
 import os
+import sys
+import time
 import warnings
 
 # Supprimer les warnings pygame
@@ -17,13 +22,72 @@ warnings.filterwarnings("ignore", message=".*pkg_resources.*")
 
 def main():
     """Fonction principale"""
+    if "--import-report" in sys.argv:
+        from import_report import print_import_report
+        print_import_report()
+        return
+
+    if "--check-dsp" in sys.argv:
+        args = sys.argv[sys.argv.index("--check-dsp") + 1:]
+        from vintage_dsp import check_dsp_engine
+        sys.exit(0 if check_dsp_engine(args[0] if args else None) else 1)
+
+    if "--rerender-archive" in sys.argv:
+        rerender_archive_command(sys.argv[sys.argv.index("--rerender-archive") + 1:])
+        return
+
+    if "--simulation" in sys.argv:
+        simulation_command(sys.argv[sys.argv.index("--simulation") + 1:])
+        return
+
     print("=== TimeVox - Système de téléphone à messages ===")
     print("Démarrage du système...")
-    
+
+    # Les dépendances lourdes (pygame, luma/PIL, requests, pydub) sont chargées au premier usage
+    import_start = time.monotonic()
+    from phone_controller import PhoneController
+    print(f"⏱️ Import des modules: {time.monotonic() - import_start:.2f}s")
+
     # Créer et lancer le contrôleur principal
     controller = PhoneController()
     controller.run()
 
 
+def simulation_command(args):
+    """Rejoue un scénario (ou un appel au numéro principal) sur les périphériques simulés"""
+    # Lu par config.py: à définir avant le premier import des modules TimeVox
+    os.environ["TIMEVOX_SIMULATION"] = "1"
+    scenario_file = args[0] if args else None
+    if scenario_file and not os.path.isfile(scenario_file):
+        print(f"Scénario introuvable: {scenario_file}")
+        print("Usage: python3 main.py --simulation [scenario.json]")
+        sys.exit(2)
+
+    print("=== TimeVox - Simulation sans matériel ===")
+    from simulation import run_simulation
+    summary = run_simulation(scenario_file)
+    sys.exit(0 if summary["scenario_termine"] else 1)
+
+
+def rerender_archive_command(args):
+    """Re-rendu de l'archive avec le filtre configuré dans Parametres/config.json de la clé"""
+    from config import USB_MOUNT_PATH
+    from config_store import ConfigStore
+    from archive_renderer import rerender_archive
+
+    messages_dir = args[0] if args else os.path.join(USB_MOUNT_PATH, "Messages")
+    if not os.path.isdir(messages_dir):
+        print(f"Dossier Messages introuvable: {messages_dir}")
+        print("Usage: python3 main.py --rerender-archive [dossier Messages]")
+        sys.exit(2)
+
+    config_store = ConfigStore()
+    config_file = os.path.join(os.path.dirname(os.path.abspath(messages_dir)), "Parametres", "config.json")
+    if not config_store.load(config_file):
+        print(f"config.json illisible ({config_file}) - filtre par défaut")
+    summary = rerender_archive(messages_dir, config_store.get_filter_config())
+    sys.exit(1 if summary["failed"] else 0)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
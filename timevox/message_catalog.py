@@ -0,0 +1,269 @@
+# message_catalog.py
+"""
+Catalogue des messages enregistrés (base SQLite sur la clé, dans Messages/)
+Chaque message y est ajouté à sa sauvegarde (durée, filtre, présence de l'original et du master).
+Des déclencheurs SQLite tiennent à jour les totaux globaux et par jour: nombre de messages,
+durée totale et statistiques du jour se lisent sans parcourir la clé.
+Si la base est absente ou illisible, elle est reconstruite par un parcours rapide de Messages/
+(en-têtes WAV des masters, sinon durée estimée d'après la taille des MP3 à débit constant).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from config import CATALOG_FILE, FFMPEG_BITRATE, MASTER_SUFFIX, RAW_CAPTURE_SUFFIX
+from wav_utils import get_wav_duration
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    path TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    filter TEXT,
+    has_original INTEGER NOT NULL DEFAULT 0,
+    has_master INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_recorded_at ON messages(recorded_at);
+CREATE TABLE IF NOT EXISTS day_stats (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    duration REAL NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, count, duration) VALUES (0, 0, 0);
+
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO day_stats (day, count, duration) VALUES (NEW.day, 1, NEW.duration)
+        ON CONFLICT(day) DO UPDATE SET count = count + 1, duration = duration + NEW.duration;
+    UPDATE totals SET count = count + 1, duration = duration + NEW.duration WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    UPDATE day_stats SET count = count - 1, duration = duration - OLD.duration WHERE day = OLD.day;
+    DELETE FROM day_stats WHERE day = OLD.day AND count <= 0;
+    UPDATE totals SET count = count - 1, duration = duration - OLD.duration WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_update AFTER UPDATE OF duration ON messages BEGIN
+    UPDATE day_stats SET duration = duration - OLD.duration + NEW.duration WHERE day = NEW.day;
+    UPDATE totals SET duration = duration - OLD.duration + NEW.duration WHERE id = 0;
+END;
+"""
+
+# message_AAAAMMJJ_HHMMSS.mp3 (generate_message_filename)
+FILENAME_TIMESTAMP = re.compile(r"(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})")
+DERIVED_SUFFIXES = ("_original.mp3", f"{MASTER_SUFFIX}.mp3")
+
+
+def get_filter_label(config):
+    """Filtre appliqué à un message, tel qu'enregistré dans le catalogue"""
+    if not config["enabled"]:
+        return "aucun"
+    return f"{config['type']}:{config['intensity']:.2f}"
+
+
+class MessageCatalog:
+    def __init__(self, messages_dir):
+        self.messages_dir = messages_dir
+        self.db_file = os.path.join(messages_dir, CATALOG_FILE)
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def open(self):
+        """Ouvre la base; la reconstruit si elle est absente ou illisible. Retourne False si impossible"""
+        with self.lock:
+            if self.connection is not None:
+                return True
+            rebuild = not os.path.exists(self.db_file)
+            try:
+                self.connection = self.connect()
+                if not rebuild and self.connection.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                    raise sqlite3.DatabaseError("base corrompue")
+            except sqlite3.DatabaseError as e:
+                print(f"Catalogue des messages illisible ({e}) - reconstruction")
+                self.close_connection()
+                try:
+                    os.remove(self.db_file)
+                    self.connection = self.connect()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Erreur ouverture catalogue: {e}")
+                    self.connection = None
+                    return False
+                rebuild = True
+            except sqlite3.Error as e:
+                print(f"Erreur ouverture catalogue: {e}")
+                self.connection = None
+                return False
+
+        if rebuild:
+            self.rebuild()
+        return True
+
+    def connect(self):
+        # Clé FAT: journal classique (pas de WAL), écritures groupées par transaction
+        connection = sqlite3.connect(self.db_file, check_same_thread=False, timeout=5)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def close_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except sqlite3.Error:
+                pass
+            self.connection = None
+
+    def close(self):
+        with self.lock:
+            self.close_connection()
+
+    # --- Écriture ---------------------------------------------------------
+
+    def get_recorded_at(self, path):
+        """Horodatage du message d'après son nom, sinon sa date de modification"""
+        match = FILENAME_TIMESTAMP.search(os.path.basename(path))
+        if match:
+            year, month, day, hour, minute, second = match.groups()
+            return f"{year}-{month}-{day} {hour}:{minute}:{second}"
+        try:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(path)))
+        except OSError:
+            return time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def get_message_row(self, message_file, duration, filter_label):
+        base_name, _ = os.path.splitext(message_file)
+        relative_path = os.path.relpath(message_file, self.messages_dir)
+        day = os.path.dirname(relative_path) or self.get_recorded_at(message_file)[:10]
+        try:
+            size = os.path.getsize(message_file)
+        except OSError:
+            size = 0
+        has_master = any(os.path.exists(f"{base_name}{MASTER_SUFFIX}{ext}") for ext in (".wav", ".flac"))
+        return (relative_path, day, self.get_recorded_at(message_file), round(duration, 3), size,
+                filter_label, int(os.path.exists(f"{base_name}_original.mp3")), int(has_master))
+
+    def add_message(self, message_file, duration, filter_label=None):
+        """Ajoute ou met à jour un message sauvegardé"""
+        if not self.open():
+            return False
+        row = self.get_message_row(message_file, duration, filter_label)
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT INTO messages (path, day, recorded_at, duration, size, filter, has_original, has_master) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                    "duration = excluded.duration, size = excluded.size, filter = excluded.filter, "
+                    "has_original = excluded.has_original, has_master = excluded.has_master",
+                    row
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Erreur ajout au catalogue: {e}")
+            return False
+
+    def remove_message(self, message_file):
+        """Retire un message du catalogue (fichier supprimé)"""
+        if not self.open():
+            return False
+        try:
+            with self.lock, self.connection:
+                self.connection.execute("DELETE FROM messages WHERE path = ?",
+                                        (os.path.relpath(message_file, self.messages_dir),))
+            return True
+        except sqlite3.Error as e:
+            print(f"Erreur suppression du catalogue: {e}")
+            return False
+
+    # --- Reconstruction -----------------------------------------------------
+
+    def estimate_duration(self, message_file):
+        """Durée sans décodage: en-tête du master WAV, sinon taille du MP3 au débit constant FFMPEG_BITRATE"""
+        master_wav = f"{os.path.splitext(message_file)[0]}{MASTER_SUFFIX}.wav"
+        if os.path.exists(master_wav):
+            try:
+                return get_wav_duration(master_wav)
+            except Exception:
+                pass
+        bitrate = int(FFMPEG_BITRATE.rstrip("k")) * 1000
+        return os.path.getsize(message_file) * 8.0 / bitrate
+
+    def is_message_file(self, name):
+        return (name.lower().endswith(".mp3") and not name.endswith(DERIVED_SUFFIXES)
+                and not name.endswith(RAW_CAPTURE_SUFFIX))
+
+    def rebuild(self):
+        """Reconstruit le catalogue depuis le contenu de Messages/; retourne le nombre de messages"""
+        start = time.monotonic()
+        rows = []
+        for root, dirs, files in os.walk(self.messages_dir):
+            for name in files:
+                if not self.is_message_file(name):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    rows.append(self.get_message_row(path, self.estimate_duration(path), None))
+                except OSError as e:
+                    print(f"Message ignoré ({name}): {e}")
+
+        try:
+            with self.lock, self.connection:
+                self.connection.execute("DELETE FROM messages")
+                self.connection.executemany(
+                    "INSERT INTO messages (path, day, recorded_at, duration, size, filter, has_original, has_master) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            print(f"Erreur reconstruction catalogue: {e}")
+            return 0
+
+        print(f"📚 Catalogue des messages reconstruit: {len(rows)} message(s) en {time.monotonic() - start:.2f}s")
+        return len(rows)
+
+    # --- Requêtes -----------------------------------------------------------
+
+    def query(self, sql, params=()):
+        if not self.open():
+            return []
+        try:
+            with self.lock:
+                return self.connection.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Erreur lecture catalogue: {e}")
+            return []
+
+    def get_totals(self):
+        """(nombre de messages, durée totale en secondes)"""
+        rows = self.query("SELECT count, duration FROM totals WHERE id = 0")
+        return (rows[0][0], rows[0][1]) if rows else (0, 0.0)
+
+    def get_day_stats(self, day=None):
+        """Statistiques par jour [(jour, nombre, durée)], ou celles d'un seul jour"""
+        if day is not None:
+            return self.query("SELECT day, count, duration FROM day_stats WHERE day = ?", (day,))
+        return self.query("SELECT day, count, duration FROM day_stats ORDER BY day")
+
+    def get_latest(self, limit=5):
+        """Derniers messages [(chemin relatif, horodatage, durée, filtre)]"""
+        return self.query(
+            "SELECT path, recorded_at, duration, filter FROM messages ORDER BY recorded_at DESC LIMIT ?",
+            (limit,)
+        )
+
+    def get_summary(self):
+        """Résumé pour les diagnostics"""
+        count, duration = self.get_totals()
+        today = self.get_day_stats(time.strftime("%Y-%m-%d"))
+        return {
+            "count": count,
+            "duration": duration,
+            "today_count": today[0][1] if today else 0,
+            "days": len(self.get_day_stats())
+        }
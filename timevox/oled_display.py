@@ -1,36 +1,110 @@
 # oled_display.py
-from luma.core.interface.serial import i2c
-from luma.oled.device import sh1106
-from luma.core.render import canvas
+import threading
+from collections import OrderedDict
 from PIL import ImageFont
+from PIL import ImageDraw
 from PIL import Image
+from oled_renderer import FrameDiffRenderer
+from config import (
+    DEFAULT_FONT_SIZE, TIMEVOX_FONT_SIZE, CALLING_FONT_SIZE, COUNTDOWN_FONT_SIZE,
+    SAVING_FONT_SIZE, CALL_ENDED_FONT_SIZE, SIMULATION
+)
 
-serial = i2c(port=1, address=0x3C)
-device = sh1106(serial, width=128, height=64)
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+LINE_CACHE_SIZE = 128  # Nombre maximal de lignes rendues gardees en memoire
 
-def afficher(l1="", l2="", l3="", taille=12, align="gauche"):
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", taille)
-    except:
-        font = ImageFont.load_default()
+if SIMULATION:
+    # Ecran en memoire: garde chaque image envoyee par le rendu differentiel
+    from simulation import MemoryOLED
+    device = MemoryOLED(width=128, height=64)
+else:
+    from luma.core.interface.serial import i2c
+    from luma.oled.device import sh1106
+    serial = i2c(port=1, address=0x3C)
+    device = sh1106(serial, width=128, height=64)
+
+# Rendu differentiel: images identiques ignorees, seules les pages modifiees sont envoyees
+renderer = FrameDiffRenderer(device, on_frame=device.record_frame if SIMULATION else None)
+
+# Caches: police par taille, (largeur, bitmap) par (texte, taille)
+_polices = {}
+_lignes = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def obtenir_police(taille):
+    """Retourne la police DejaVuSans pour une taille donnee (chargee une seule fois)"""
+    font = _polices.get(taille)
+    if font is None:
+        try:
+            font = ImageFont.truetype(FONT_PATH, taille)
+        except:
+            font = ImageFont.load_default()
+        _polices[taille] = font
+    return font
+
+
+def rendre_ligne(texte, taille):
+    """
+    Retourne (largeur, bitmap) d'une ligne de texte, depuis le cache si deja rendue
+    Le bitmap est en mode "1", texte dessine en (0, 0) comme draw.text le ferait
+    """
+    cle = (texte, taille)
+    with _cache_lock:
+        ligne = _lignes.get(cle)
+        if ligne is not None:
+            _lignes.move_to_end(cle)
+            return ligne
+
+    font = obtenir_police(taille)
+    bbox = font.getbbox(texte)
+    largeur = bbox[2] - bbox[0]
+    bitmap = Image.new("1", (max(1, bbox[2]), max(1, bbox[3])), 0)
+    ImageDraw.Draw(bitmap).text((0, 0), texte, font=font, fill=255)
+    ligne = (largeur, bitmap)
+
+    with _cache_lock:
+        _lignes[cle] = ligne
+        if len(_lignes) > LINE_CACHE_SIZE:
+            _lignes.popitem(last=False)
+    return ligne
+
+
+def precharger_polices():
+    """Precharge les tailles de police utilisees par config.py (*_FONT_SIZE)"""
+    for taille in (DEFAULT_FONT_SIZE, TIMEVOX_FONT_SIZE, CALLING_FONT_SIZE,
+                   COUNTDOWN_FONT_SIZE, SAVING_FONT_SIZE, CALL_ENDED_FONT_SIZE):
+        obtenir_police(taille)
 
+
+def afficher(l1="", l2="", l3="", taille=12, align="gauche"):
     lignes = [l1, l2, l3]
-    with canvas(device) as draw:
-        for i, texte in enumerate(lignes):
-            bbox = draw.textbbox((0, 0), texte, font=font)
-            largeur_texte = bbox[2] - bbox[0]
-
-            if align == "centre":
-                x = (device.width - largeur_texte) // 2
-            elif align == "droite":
-                x = device.width - largeur_texte
-            else:  # alignement a gauche par defaut
-                x = 0
-
-            y = i * (taille + 4)
-            draw.text((x, y), texte, font=font, fill=255)
-
-        
+    # Un ecran vide deja affiche est ignore par le rendu differentiel (aucun envoi I2C)
+    image = Image.new(device.mode, device.size)
+    for i, texte in enumerate(lignes):
+        if not texte:
+            continue
+        largeur_texte, bitmap = rendre_ligne(texte, taille)
+
+        if align == "centre":
+            x = (device.width - largeur_texte) // 2
+        elif align == "droite":
+            x = device.width - largeur_texte
+        else:  # alignement a gauche par defaut
+            x = 0
+
+        y = i * (taille + 4)
+        # Le bitmap sert de masque: seuls les pixels du texte sont allumes
+        image.paste(255, (x, y), bitmap)
+
+    renderer.display(image)
+
+
+def stats_affichage():
+    """Retourne les statistiques I2C du rendu differentiel (images ignorees, octets envoyes)"""
+    return renderer.get_stats()
+
+
 def afficher_image(path):
     try:
         img = Image.open(path).convert("1")
@@ -49,7 +123,11 @@ def afficher_image(path):
         bg.paste(img, (x, y))
 
         # Afficher
-        device.display(bg)
+        renderer.display(bg)
 
     except Exception as e:
         afficher("Erreur image", str(e))
+
+
+# Chargement des polices au demarrage, hors du chemin critique d'affichage
+precharger_polices()
@@ -0,0 +1,96 @@
+# oled_renderer.py
+"""
+Rendu différentiel pour l'écran OLED SH1106
+Garde la dernière image envoyée, ignore les images identiques
+et n'envoie sur l'I2C que les colonnes modifiées de chaque page
+"""
+
+import threading
+from PIL import Image
+
+# Table d'inversion des bits d'un octet (MSB en haut -> LSB en haut, format des pages SH1106)
+_REVERSE_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+SH1106_SET_PAGE_ADDRESS = 0xB0
+SH1106_COLUMN_OFFSET = 2  # La RAM du SH1106 fait 132 colonnes, l'écran 128 est centré
+
+
+class FrameDiffRenderer:
+    def __init__(self, device, on_frame=None):
+        self.device = device
+        self.on_frame = on_frame  # Appelé après chaque image envoyée (écran simulé)
+        self.width = device.width
+        self.pages = device.height // 8
+        self.last_pages = None  # Contenu des pages déjà présent dans la RAM de l'écran
+        self.lock = threading.Lock()
+
+        # Statistiques I2C
+        self.frames_total = 0
+        self.frames_skipped = 0
+        self.pages_sent = 0
+        self.bytes_sent = 0
+
+    def frame_to_pages(self, image):
+        """Convertit une image 128x64 en 8 pages de 128 octets (1 bit par pixel, LSB en haut)"""
+        image = self.device.preprocess(image.convert("1"))
+        # Après transposition, chaque ligne = une colonne de l'écran, 8 octets de haut en bas
+        raw = image.transpose(Image.TRANSPOSE).tobytes().translate(_REVERSE_BITS)
+        return [raw[page::self.pages] for page in range(self.pages)]
+
+    def display(self, image):
+        """Affiche une image en n'envoyant que ce qui a changé depuis la dernière image"""
+        with self.lock:
+            self.frames_total += 1
+            pages = self.frame_to_pages(image)
+
+            if pages == self.last_pages:
+                self.frames_skipped += 1
+                return
+
+            try:
+                for page, data in enumerate(pages):
+                    if self.last_pages is None:
+                        start, end = 0, self.width
+                    else:
+                        previous = self.last_pages[page]
+                        if data == previous:
+                            continue
+                        # Plage de colonnes modifiées dans cette page
+                        start = next(x for x in range(self.width) if data[x] != previous[x])
+                        end = next(x for x in range(self.width, 0, -1) if data[x - 1] != previous[x - 1])
+
+                    column = start + SH1106_COLUMN_OFFSET
+                    self.device.command(
+                        SH1106_SET_PAGE_ADDRESS + page,
+                        column & 0x0F,          # Colonne, 4 bits de poids faible
+                        0x10 | (column >> 4)    # Colonne, 4 bits de poids fort
+                    )
+                    self.device.data(list(data[start:end]))
+                    self.pages_sent += 1
+                    self.bytes_sent += 3 + (end - start)
+
+                self.last_pages = pages
+                if self.on_frame:
+                    self.on_frame()
+            except Exception:
+                # État de la RAM de l'écran inconnu: tout renvoyer à la prochaine image
+                self.last_pages = None
+                raise
+
+    def invalidate(self):
+        """Force l'envoi complet de la prochaine image (ex. après réinitialisation de l'écran)"""
+        with self.lock:
+            self.last_pages = None
+
+    def get_stats(self):
+        """Retourne les statistiques d'envoi I2C"""
+        full_frame_bytes = self.pages * (3 + self.width)
+        frames_sent = self.frames_total - self.frames_skipped
+        return {
+            "frames_total": self.frames_total,
+            "frames_skipped": self.frames_skipped,
+            "frames_sent": frames_sent,
+            "pages_sent": self.pages_sent,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.frames_total * full_frame_bytes - self.bytes_sent
+        }
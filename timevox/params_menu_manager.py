@@ -10,18 +10,21 @@ import json
 import os
 from config import AVAILABLE_FILTERS, MSG_FILTER_CONFIG, MSG_FILTER_TYPE, MSG_FILTER_INTENSITY
 from audio_effects import AudioEffects
+from call_tracer import call_tracer, SPAN_LABELS
 from update_manager import UpdateManager
 
 
 class ParamsMenuManager:
-    def __init__(self, display_manager, dialer_manager, usb_manager, audio_manager, gpio_manager):
+    def __init__(self, display_manager, dialer_manager, usb_manager, audio_manager, gpio_manager,
+                 update_manager=None):
         self.display_manager = display_manager
         self.dialer_manager = dialer_manager
         self.usb_manager = usb_manager
         self.audio_manager = audio_manager
         self.gpio_manager = gpio_manager
         self.audio_effects = AudioEffects(usb_manager)
-        self.update_manager = UpdateManager(usb_manager)
+        # Gestionnaire de mises à jour partagé avec le contrôleur (un seul par application)
+        self.update_manager = update_manager or UpdateManager(usb_manager)
         
         # État du menu
         self.menu_active = False
@@ -86,7 +89,26 @@ class ParamsMenuManager:
             usb_status = "OK" if self.usb_manager.is_usb_available() else "NON"
             afficher("Clé USB:", usb_status, "", taille=12, align="centre")
             time.sleep(2)
-            
+
+            # Messages enregistrés (catalogue de la clé, sans parcourir les dossiers)
+            catalog = self.usb_manager.get_message_catalog()
+            if catalog:
+                summary = catalog.get_summary()
+                minutes, seconds = divmod(int(summary["duration"]), 60)
+                afficher(
+                    f"Messages: {summary['count']}",
+                    f"Total: {minutes // 60}h{minutes % 60:02d}m{seconds:02d}s",
+                    f"Aujourd'hui: {summary['today_count']}",
+                    taille=10, align="centre"
+                )
+                time.sleep(3)
+
+                latest = catalog.get_latest(1)
+                if latest:
+                    _, recorded_at, duration, _ = latest[0]
+                    afficher("Dernier message:", recorded_at[:16], f"{duration:.0f}s", taille=10, align="centre")
+                    time.sleep(3)
+
             # Afficher le volume configuré
             volume = self.usb_manager.get_volume_audio()
             afficher("Volume:", f"{volume}%", "", taille=12, align="centre")
@@ -98,6 +120,26 @@ class ParamsMenuManager:
             afficher("Numero princ.:", numero_principal, f"({longueur} chiffres)", taille=10, align="centre")
             time.sleep(3)
             
+            # Statistiques I2C de l'écran (rendu différentiel)
+            stats = self.display_manager.get_display_stats()
+            afficher(
+                "Ecran I2C:",
+                f"Ignorees: {stats['frames_skipped']}/{stats['frames_total']}",
+                f"Envoye: {stats['bytes_sent'] // 1024} Ko",
+                taille=10, align="centre"
+            )
+            time.sleep(3)
+
+            # Latences des derniers appels (p50/p95 en millisecondes)
+            for name, (p50, p95, count) in call_tracer.get_percentiles().items():
+                afficher(
+                    SPAN_LABELS.get(name, name),
+                    f"p50: {p50:.0f} ms",
+                    f"p95: {p95:.0f} ms ({count})",
+                    taille=10, align="centre"
+                )
+                time.sleep(2)
+
         except Exception as e:
             print(f"Erreur diagnostics: {e}")
     
@@ -420,6 +462,7 @@ class ParamsMenuManager:
             # Sauvegarder
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=2, ensure_ascii=False)
+            self.usb_manager.refresh_config()
             
             # Recharger la config dans le gestionnaire d'effets
             self.audio_effects = AudioEffects(self.usb_manager)
@@ -6,7 +6,9 @@ Version avec menu paramètres étendu et gestion des mises à jour
 Version avec support des numéros spéciaux (12, 13, 14, 17, 18)
 """
 
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from gpio_manager import GPIOManager
 from usb_manager import USBManager
 from audio_manager import AudioManager
@@ -14,55 +16,134 @@ from recording_manager import RecordingManager
 from display_manager import DisplayManager
 from dialer_manager import DialerManager
 from rtc_manager import RTCManager
-from config import TARGET_NUMBERS, SERVICE_NUMBERS
+from rtc_device import FakeRTCDevice
+from config import (
+    TARGET_NUMBERS, SERVICE_NUMBERS, HOOK_GPIO, HOOK_BOUNCE_TIME, TIMEOUT_RESET,
+    SHUTDOWN_POSTPROCESS_WAIT, SIMULATION
+)
 import subprocess
 from datetime import datetime
 from params_menu_manager import ParamsMenuManager  # Nouveau nom
 from update_manager import UpdateManager
 from special_audio_manager import SpecialAudioManager
+from startup_manager import StartupManager
+from call_tracer import call_tracer
 from config import is_special_audio_number
-import pygame
+
+# Événements du contrôleur (postés dans la file asyncio depuis les threads GPIO/audio)
+EVENT_HOOK = "hook"
+EVENT_DIAL = "dial"
+EVENT_DIAL_TIMEOUT = "dial_timeout"
+EVENT_SHUTDOWN_BUTTON = "shutdown_button"
+EVENT_PLAYBACK_FINISHED = "playback_finished"
+EVENT_RECORDING_FINISHED = "recording_finished"
+EVENT_UPDATE_AVAILABLE = "update_available"
+
+# États de la machine à états
+STATE_IDLE = "idle"          # Combiné raccroché
+STATE_READY = "ready"        # Décroché, en attente de composition
+STATE_BUSY = "busy"          # Traitement d'un numéro en cours
+STATE_SHUTDOWN = "shutdown"  # Arrêt système en cours
+
 
 class PhoneController:
     def __init__(self):
         print("Initialisation TimeVox...")
+        self.startup_manager = StartupManager()
+
+        # Configuration du bouton d'arrêt
+        self.shutdown_button_gpio = 26
+        self.shutdown_led_gpio = 16
+        self.shutdown_button_pressed_time = None
+        self.shutdown_in_progress = False
 
-        # Initialisation du gestionnaire RTC en premier
+        # Cœur asyncio: file d'événements, état et tâches en cours
+        self.loop = None
+        self.events = None
+        self.stop_event = None
+        self.state = STATE_IDLE
+        self.off_hook = False
+        self.call_task = None
+        self.hangup_task = None
+        self.shutdown_task = None
+        self.dial_timeout_handle = None
+        self.update_notice_handle = None
+
+        # Les appels bloquants (lecture, enregistrement, menus) passent par un worker unique
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timevox-worker")
+        self.worker_future = None
+
+        # Étape 1: sous-systèmes indépendants (RTC, GPIO, écran, clé USB) en parallèle
+        # Les téléchargements audio de la clé USB sont reportés en arrière-plan
+        self.startup_manager.run_stage("base", {
+            "rtc": self.init_rtc,
+            "gpio": self.init_gpio,
+            "ecran": self.init_display,
+            "usb": self.init_usb
+        })
+        self.usb_manager.set_rtc_manager(self.rtc_manager)
+        call_tracer.set_usb_manager(self.usb_manager)
+
+        # Étape 2: audio (sondage ALSA, mixer) et cadran, qui ne dépendent que de l'étape 1
+        self.startup_manager.run_stage("peripheriques", {
+            "audio": self.init_audio,
+            "cadran": self.init_dialer
+        })
+
+        # Étape 3: gestionnaires qui s'appuient sur les précédents (rapides, sans E/S lentes)
+        self.startup_manager.run_task("gestionnaires", self.init_managers)
+
+        self.print_configuration()
+
+        # Effacer le message d'initialisation: le téléphone est utilisable (écran de repos)
+        self.display_manager.clear_display()
+        self.startup_manager.mark_ready()
+        self.usb_manager.save_event_log("STARTUP", self.startup_manager.get_summary())
+
+        print("Prêt à détecter un numéro fait au cadran.")
+
+    def init_rtc(self):
+        """Initialise le RTC et synchronise l'heure système"""
         print("Initialisation du gestionnaire RTC...")
-        self.rtc_manager = RTCManager()
+        if SIMULATION:
+            # RTC en mémoire: l'horloge système du PC n'est jamais modifiée
+            self.rtc_manager = RTCManager(device=FakeRTCDevice(), set_system_clock=False)
+        else:
+            self.rtc_manager = RTCManager()
 
-        # Vérification de l'heure au démarrage
+        # Vérification de l'heure au démarrage (synchronisation réseau faite en arrière-plan)
         status_info = self.rtc_manager.get_status_info()
         print(f"État RTC: Disponible={status_info['rtc_available']}, "
               f"Heure valide={status_info['time_valid']}")
 
-        if not status_info['time_valid']:
-            print("ATTENTION: L'heure système semble incorrecte!")
-            print("Tentative de synchronisation réseau...")
-            self.rtc_manager.sync_time_if_network_available()
-
-        # Initialisation des gestionnaires de base
+    def init_gpio(self):
+        """Initialise les GPIO et le bouton d'arrêt"""
         self.gpio_manager = GPIOManager()
-        self.display_manager = DisplayManager()
-
-        # Passer le RTC au USBManager
-        self.usb_manager = USBManager(self.rtc_manager)
+        self.setup_shutdown_button()
 
-        # Afficher le message d'initialisation
+    def init_display(self):
+        """Initialise l'écran et affiche le message d'initialisation"""
+        self.display_manager = DisplayManager()
         self.display_manager.show_initialization()
 
-        # Configuration du bouton d'arrêt
-        self.shutdown_button_gpio = 26
-        self.shutdown_led_gpio = 16
-        self.shutdown_button_pressed_time = None
-        self.shutdown_in_progress = False
-
-        # Configurer les GPIO du bouton d'arrêt
-        self.setup_shutdown_button()
+    def init_usb(self):
+        """Détecte la clé USB et charge config.json (téléchargements audio reportés)"""
+        self.usb_manager = USBManager(download_audio=False)
 
-        # Initialiser AudioManager avec usb_manager pour la gestion du volume
+    def init_audio(self):
+        """Initialise AudioManager avec usb_manager pour la gestion du volume"""
         self.audio_manager = AudioManager(self.gpio_manager, self.usb_manager)
 
+    def init_dialer(self):
+        """Initialise le cadran (décodeur d'impulsions sur interruptions)"""
+        self.dialer_manager = DialerManager(
+            self.gpio_manager,
+            self.display_manager,
+            self.usb_manager  # Passer le gestionnaire USB au lieu de la liste
+        )
+
+    def init_managers(self):
+        """Crée les gestionnaires d'enregistrement, de menus et de mises à jour"""
         # Initialiser RecordingManager avec usb_manager
         self.recording_manager = RecordingManager(
             self.gpio_manager,
@@ -71,26 +152,19 @@ class PhoneController:
             self.usb_manager  # Passer le gestionnaire USB
         )
 
-        # IMPORTANT: Initialiser le DialerManager AVANT ParamsMenuManager
-        self.dialer_manager = DialerManager(
-            self.gpio_manager,
-            self.display_manager,
-            self.usb_manager  # Passer le gestionnaire USB au lieu de la liste
-        )
+        # Un seul gestionnaire de mises à jour, partagé avec le menu paramètres
+        self.update_manager = UpdateManager(self.usb_manager)
 
-        # MAINTENANT initialiser ParamsMenuManager (nouveau nom) après que dialer_manager existe
         self.params_menu_manager = ParamsMenuManager(
             self.display_manager,
             self.dialer_manager,
             self.usb_manager,
             self.audio_manager,
-            self.gpio_manager
+            self.gpio_manager,
+            self.update_manager
         )
 
-        # Initialiser le gestionnaire de mises à jour
-        self.update_manager = UpdateManager(self.usb_manager)
-        
-        # Gestionnaire des numéros spéciaux (ajouter après les autres gestionnaires)
+        # Gestionnaire des numéros spéciaux
         self.special_audio_manager = SpecialAudioManager(
             self.gpio_manager,
             self.display_manager, 
@@ -98,7 +172,8 @@ class PhoneController:
             self.audio_manager
         )
 
-        # Affichage des informations de configuration
+    def print_configuration(self):
+        """Affiche la configuration chargée"""
         config_info = self.usb_manager.get_config_info()
         print(f"=== CONFIGURATION TIMETVOX ===")
         print(
@@ -137,62 +212,90 @@ class PhoneController:
         print(f"Heure: {config_info.get('current_time', 'N/A')}")
         print(f"===============================")
 
-        print("Initialisation terminée. Attente stabilisation...")
-        time.sleep(5)
-
-        # Vérifier les mises à jour au démarrage
-        self.check_updates_at_startup()
-
-        # Effacer le message d'initialisation
-        self.display_manager.clear_display()
-
-        print("Prêt à détecter un numéro fait au cadran.")
+    def start_background_tasks(self):
+        """Tâches réseau non critiques, lancées une fois le téléphone utilisable"""
+        if not self.rtc_manager.check_time_validity():
+            print("ATTENTION: L'heure système semble incorrecte - synchronisation réseau en arrière-plan")
+            self.startup_manager.run_in_background("ntp", self.rtc_manager.sync_time_if_network_available)
+        self.startup_manager.run_in_background("audio_usb", self.usb_manager.download_missing_audio_files)
+        self.startup_manager.run_in_background("cache_sons", self.audio_manager.preload_clips)
+        self.startup_manager.run_in_background("catalogue", self.open_message_catalog)
+        if not SIMULATION:
+            self.startup_manager.run_in_background("mises_a_jour", self.check_updates_at_startup)
+
+    def open_message_catalog(self):
+        """Ouvre le catalogue des messages (reconstruit hors appel s'il manque sur la clé)"""
+        catalog = self.usb_manager.get_message_catalog()
+        if catalog and catalog.open():
+            count, duration = catalog.get_totals()
+            print(f"📚 Catalogue: {count} message(s), {duration / 60:.1f} min")
 
     def check_updates_at_startup(self):
-        """Vérifie s'il y a une mise à jour disponible au démarrage"""
+        """Vérifie s'il y a une mise à jour disponible au démarrage (thread de fond)"""
         try:
             print("🔄 Vérification des mises à jour au démarrage...")
             if self.update_manager.check_update_at_startup():
                 print("📢 Mise à jour disponible - affichage sur OLED")
-                from oled_display import afficher
-                afficher("", "MAJ disponible", "", taille=14, align="centre")
-                time.sleep(3)
+                self.post_event_threadsafe(EVENT_UPDATE_AVAILABLE)
             else:
                 print("✅ Aucune mise à jour disponible")
         except Exception as e:
             print(f"Erreur vérification MAJ au démarrage: {e}")
 
-    def handle_numero_principal(self):
+    def on_update_available(self):
+        """Affiche 'MAJ disponible' 3 secondes, seulement si le téléphone est au repos"""
+        if self.state != STATE_IDLE:
+            return
+        self.display_manager.show_message("", "MAJ disponible", "", size=14)
+        self.update_notice_handle = self.loop.call_later(3, self.clear_update_notice)
+
+    def clear_update_notice(self):
+        self.update_notice_handle = None
+        if self.state == STATE_IDLE:
+            self.display_manager.clear_display()
+
+    async def handle_numero_principal(self):
         """Traite l'appel au numéro principal (annonce + enregistrement)"""
         print("🎵 Activation du son...")
         self.gpio_manager.enable_sound()
-        time.sleep(0.5)  # Laisser le temps au son de s'activer
+        await asyncio.sleep(0.5)  # Laisser le temps au son de s'activer
 
-        # Lecture du fichier de recherche de correspondant
         search_path = self.audio_manager.get_search_correspondant_path()
-        if search_path:
-            print("📢 Fichier search_correspondant trouvé, lecture en cours...")
-            if not self.audio_manager.play_audio(search_path):
-                print("❌ Échec lecture search_correspondant")
-                self.gpio_manager.disable_sound()
-                return
-
-        # Lecture de l'annonce principale
         announce_path = self.usb_manager.get_announce_path()
         print(f"DEBUG: announce_path retourné = {announce_path}")
-        if announce_path:
-            print(f"📢 Lecture annonce principale: {announce_path}")
-            if not self.audio_manager.play_audio(announce_path):
-                print("❌ Échec lecture annonce principale")
-                self.gpio_manager.disable_sound()
-                return
-        else:
+        if not announce_path:
+            if search_path:
+                await self.play(search_path)
             print("❌ Annonce non disponible - clé USB non détectée")
             self.gpio_manager.disable_sound()
             return
 
-        print("🔇 Coupure du son...")
-        self.gpio_manager.disable_sound()
+        # Micro ouvert pendant l'annonce: il tourne déjà quand le bip se termine
+        await self.run_blocking(self.recording_manager.arm_capture)
+
+        # Tonalité de recherche -> annonce -> bip enchaînés sans blanc sur le mixer
+        bip_path = self.audio_manager.get_bip_path()
+        playlist = [path for path in (search_path, announce_path, bip_path) if path]
+        # Dans le worker: un son absent du cache est décodé ici (nouvelle annonce, son évincé)
+        sequence = await self.run_blocking(self.audio_manager.play_sequence, playlist, self.on_clip_finished)
+        if sequence is None:
+            if not await self.play_announcement(search_path, announce_path):
+                self.recording_manager.release_capture()
+                return
+            sequence_bip = None
+        else:
+            print(f"📢 Lecture annonce principale: {announce_path}")
+            # Fin de l'annonce = début du bip: l'enregistrement est armé à cet instant
+            announce_end = await self.run_blocking(sequence.wait_clip, playlist.index(announce_path))
+            if announce_end is None:
+                print("❌ Lecture de l'annonce interrompue")
+                self.gpio_manager.disable_sound()
+                self.recording_manager.release_capture()
+                return
+            sequence_bip = sequence if bip_path else None
+            if sequence_bip is None:
+                print("🔇 Coupure du son...")
+                self.gpio_manager.disable_sound()
 
         # Vérification que le téléphone est toujours décroché
         if self.gpio_manager.is_phone_off_hook():
@@ -202,14 +305,40 @@ class PhoneController:
                 # Utiliser la durée configurée depuis la clé USB
                 duree_config = self.usb_manager.get_duree_enregistrement()
                 print(f"🎙️ Début enregistrement: {nom_fichier} (durée: {duree_config}s)")
-                self.recording_manager.record_message(
-                    duration=duree_config,
-                    output_file=nom_fichier
-                )
-            else:
-                print("❌ Impossible d'enregistrer - clé USB non disponible")
+                await self.record(duree_config, nom_fichier, sequence_bip)
+                return
+            print("❌ Impossible d'enregistrer - clé USB non disponible")
         else:
             print("📞 Téléphone raccroché - pas d'enregistrement")
+        if sequence_bip is not None:
+            sequence_bip.stop()
+            self.gpio_manager.disable_sound()
+        self.recording_manager.release_capture()
+
+    async def play_announcement(self, search_path, announce_path):
+        """Lecture son par son (sons non décodables en mémoire); retourne False en cas d'échec"""
+        # Lecture du fichier de recherche de correspondant
+        if search_path:
+            print("📢 Fichier search_correspondant trouvé, lecture en cours...")
+            if not await self.play(search_path):
+                print("❌ Échec lecture search_correspondant")
+                self.gpio_manager.disable_sound()
+                return False
+
+        # Lecture de l'annonce principale
+        print(f"📢 Lecture annonce principale: {announce_path}")
+        if not await self.play(announce_path):
+            print("❌ Échec lecture annonce principale")
+            self.gpio_manager.disable_sound()
+            return False
+
+        print("🔇 Coupure du son...")
+        self.gpio_manager.disable_sound()
+        return True
+
+    def on_clip_finished(self, index, path, timestamp):
+        """Fin d'un son de la lecture enchaînée (thread du mixer)"""
+        self.post_event_threadsafe(EVENT_PLAYBACK_FINISHED, path)
 
     def handle_service_number(self, service_number):
         """
@@ -225,13 +354,13 @@ class PhoneController:
             if success:
                 print(f"✅ Numéro spécial {service_number} traité avec succès")
                 # Attendre un peu puis nettoyer l'affichage
-                pygame.time.wait(1000)
+                time.sleep(1)
                 self.display_manager.clear_display()
                 self.display_manager.show_timevox()
             else:
                 print(f"❌ Erreur lors du traitement du numéro spécial {service_number}")
                 # En cas d'erreur, retourner à l'état normal après un délai
-                pygame.time.wait(2000)
+                time.sleep(2)
                 self.display_manager.clear_display()
                 self.display_manager.show_timevox()
             
@@ -271,6 +400,7 @@ class PhoneController:
             else:
                 print("📞 Raccrochage avant début enregistrement")
                 self.recording_manager.recording_active = False
+        self.recording_manager.release_capture()
 
         # Arrêt de la musique si en cours
         self.audio_manager.stop_audio()
@@ -288,40 +418,42 @@ class PhoneController:
         print(f"🔘 Bouton d'arrêt configuré sur GPIO {self.shutdown_button_gpio}")
         print(f"💡 LED power allumée sur GPIO {self.shutdown_led_gpio}")
 
-    def check_shutdown_button(self):
-        """Vérifie l'état du bouton d'arrêt"""
-        if self.shutdown_in_progress:
-            return
-
-        button_pressed = not self.gpio_manager.gpio_read(self.shutdown_button_gpio)
-
-        if button_pressed:
-            if self.shutdown_button_pressed_time is None:
-                # Début de l'appui
-                self.shutdown_button_pressed_time = time.time()
-                self.display_manager.show_shutdown_message("Arret en cours...")
-                print("🔘 Bouton d'arrêt pressé - décompte démarré")
+    async def watch_shutdown_button(self):
+        """Suit un appui sur le bouton d'arrêt: clignotement LED puis arrêt après 3 secondes"""
+        self.shutdown_button_pressed_time = time.time()
+        self.display_manager.show_shutdown_message("Arret en cours...")
+        print("🔘 Bouton d'arrêt pressé - décompte démarré")
 
-            # Vérifier durée d'appui
-            press_duration = time.time() - self.shutdown_button_pressed_time
-
-            # Faire clignoter la LED pendant l'appui
-            if int(press_duration * 4) % 2 == 0:  # 2 Hz
-                self.gpio_manager.gpio_write(self.shutdown_led_gpio, True)
-            else:
-                self.gpio_manager.gpio_write(self.shutdown_led_gpio, False)
-
-            # Arrêt après 3 secondes
-            if press_duration >= 3:
-                self.initiate_shutdown()
+        try:
+            while True:
+                if self.gpio_manager.gpio_read(self.shutdown_button_gpio):
+                    # Bouton relâché avant 3 secondes
+                    self.gpio_manager.gpio_write(self.shutdown_led_gpio, True)  # LED fixe
+                    self.display_manager.clear_display()
+                    print("🔘 Bouton d'arrêt relâché - annulation")
+                    return
+
+                press_duration = time.time() - self.shutdown_button_pressed_time
+
+                # Arrêt après 3 secondes
+                if press_duration >= 3:
+                    await self.shutdown()
+                    return
+
+                # Faire clignoter la LED pendant l'appui (2 Hz)
+                self.gpio_manager.gpio_write(self.shutdown_led_gpio, int(press_duration * 4) % 2 == 0)
+                await asyncio.sleep(0.25)
+        finally:
+            self.shutdown_button_pressed_time = None
 
-        else:
-            if self.shutdown_button_pressed_time is not None:
-                # Bouton relâché avant 3 secondes
-                self.shutdown_button_pressed_time = None
-                self.gpio_manager.gpio_write(self.shutdown_led_gpio, True)  # LED fixe
-                self.display_manager.clear_display()
-                print("🔘 Bouton d'arrêt relâché - annulation")
+    async def shutdown(self):
+        """Lance l'arrêt système et arrête la boucle d'événements"""
+        self.state = STATE_SHUTDOWN
+        if (self.call_task and not self.call_task.done() and
+                self.call_task is not asyncio.current_task()):
+            self.call_task.cancel()
+        await self.loop.run_in_executor(None, self.initiate_shutdown)
+        self.stop_event.set()
 
     def initiate_shutdown(self):
         """Lance la procédure d'arrêt"""
@@ -337,6 +469,10 @@ class PhoneController:
 
         self.display_manager.show_shutdown_message("Sauvegarde...")
         time.sleep(1)
+        # Laisser finir les rendus en cours (les captures restantes seront reprises au redémarrage)
+        self.recording_manager.postprocess_queue.set_call_active(False)
+        if not self.recording_manager.postprocess_queue.wait_idle(timeout=SHUTDOWN_POSTPROCESS_WAIT):
+            print("⏳ Post-traitement inachevé - repris au prochain démarrage")
 
         self.display_manager.show_shutdown_message("Au revoir!")
         time.sleep(1)
@@ -347,7 +483,10 @@ class PhoneController:
         # Nettoyer et arrêter
         self.cleanup()
 
-        # Arrêt système
+        # Arrêt système (simulation: seul le programme s'arrête)
+        if SIMULATION:
+            print("Simulation: arrêt système ignoré")
+            return
         subprocess.run(["sudo", "shutdown", "-h", "now"])
 
     def get_system_status(self):
@@ -365,68 +504,296 @@ class PhoneController:
         return status
 
     def run(self):
-        """Boucle principale du contrôleur"""
+        """Boucle principale du contrôleur (cœur événementiel asyncio)"""
         try:
-            while True:
-                # Vérifier le bouton d'arrêt EN PREMIER
-                self.check_shutdown_button()
-
-                # Si arrêt en cours, sortir de la boucle
-                if self.shutdown_in_progress:
-                    break
-
-                phone_off_hook = self.gpio_manager.is_phone_off_hook()
-
-                if not phone_off_hook:
-                    # Téléphone raccroché
-                    self.handle_phone_hangup()
-                else:
-                    # Téléphone décroché
-                    if (not self.dialer_manager.is_composing() and
-                            not self.recording_manager.recording_active):
-                        # Afficher TIMEVOX si aucune activité
-                        self.display_manager.show_timevox()
-
-                    # Traitement du cadran avec la nouvelle logique
-                    completed_number = self.dialer_manager.process_dialing()
-                    if completed_number:
-                        # Maintenir l'affichage du numéro pendant le traitement
-                        self.display_manager.show_calling_number(completed_number)
-
-                        # Traitement selon le type de numéro reconnu
-                        numero_principal = self.usb_manager.get_numero_principal()
-
-                        if completed_number == numero_principal:
-                            print(f"📞 Appel numéro principal: {completed_number}")
-                            self.handle_numero_principal()
-                        elif is_special_audio_number(completed_number):
-                            print(f"🎵 Appel numéro spécial: {completed_number}")
-                            self.handle_service_number(completed_number)
-                        elif completed_number == "0000":
-                            print(f"🔧 Appel paramètres: {completed_number}")
-                            self.handle_number_0000()
-                        elif completed_number == "9999":
-                            print(f"🔴 Extinction système demandée via cadran: {completed_number}")
-                            # Afficher message sur écran
-                            self.display_manager.show_shutdown_message("Extinction...")
-                            time.sleep(1)
-                            # Lancer l'extinction immédiatement
-                            self.initiate_shutdown()
-                            break  # Sortir de la boucle principale
-                        else:
-                            print(f"❓ Numéro non géré: {completed_number}")
-
-                        # Effacer seulement après traitement complet (sauf pour 9999)
-                        if completed_number != "9999":
-                            self.display_manager.clear_display()
-
-                time.sleep(0.005)  # Petite pause pour éviter la surcharge CPU
-
+            asyncio.run(self.run_async())
         except KeyboardInterrupt:
             print("\n⛔ Arrêt demandé par l'utilisateur")
         finally:
             self.cleanup()
 
+    async def run_async(self):
+        """Branche les sources d'événements puis attend la demande d'arrêt"""
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+        self.stop_event = asyncio.Event()
+
+        background_tasks = []
+        if not self.setup_event_sources():
+            print("⚠️ Détection de fronts indisponible - surveillance des entrées toutes les 20 ms")
+            background_tasks.append(asyncio.create_task(self.poll_inputs()))
+
+        # État initial du combiné et du bouton d'arrêt (démarrage en mode repos)
+        self.enter_idle()
+        self.post_event(EVENT_HOOK)
+        self.post_event(EVENT_SHUTDOWN_BUTTON)
+
+        # Téléchargements, NTP et mises à jour sans retarder la disponibilité du téléphone
+        self.start_background_tasks()
+
+        dispatcher = asyncio.create_task(self.dispatch_events())
+        try:
+            await self.stop_event.wait()
+        finally:
+            dispatcher.cancel()
+            for task in background_tasks:
+                task.cancel()
+            self.dialer_manager.pulse_decoder.set_listener(None)
+            self.gpio_manager.remove_edge_callback(HOOK_GPIO)
+            self.gpio_manager.remove_edge_callback(self.shutdown_button_gpio)
+            self.worker.shutdown(wait=False)
+
+    def setup_event_sources(self):
+        """
+        Branche les fronts GPIO et le décodeur d'impulsions sur la file d'événements
+        Retourne False si la détection de fronts n'est pas disponible
+        """
+        self.dialer_manager.pulse_decoder.set_listener(
+            lambda: self.post_event_threadsafe(EVENT_DIAL)
+        )
+        hook_edges = self.gpio_manager.add_edge_callback(
+            HOOK_GPIO,
+            lambda channel: self.post_event_threadsafe(EVENT_HOOK),
+            bouncetime=HOOK_BOUNCE_TIME
+        )
+        button_edges = self.gpio_manager.add_edge_callback(
+            self.shutdown_button_gpio,
+            lambda channel: self.post_event_threadsafe(EVENT_SHUTDOWN_BUTTON),
+            bouncetime=HOOK_BOUNCE_TIME
+        )
+        return hook_edges and button_edges
+
+    async def poll_inputs(self):
+        """Repli sans détection de fronts: surveille le combiné et le bouton d'arrêt"""
+        last_hook = self.gpio_manager.is_phone_off_hook()
+        last_button = self.gpio_manager.gpio_read(self.shutdown_button_gpio)
+        while True:
+            # Combiné raccroché: seule une transition lente (décroché, appui 3s) est attendue
+            await asyncio.sleep(0.1 if self.state == STATE_IDLE else 0.02)
+            hook = self.gpio_manager.is_phone_off_hook()
+            if hook != last_hook:
+                last_hook = hook
+                self.post_event(EVENT_HOOK)
+            button = self.gpio_manager.gpio_read(self.shutdown_button_gpio)
+            if button != last_button:
+                last_button = button
+                self.post_event(EVENT_SHUTDOWN_BUTTON)
+
+    def post_event(self, event, value=None):
+        """Ajoute un événement dans la file (depuis la boucle asyncio)"""
+        self.events.put_nowait((event, value))
+
+    def post_event_threadsafe(self, event, value=None):
+        """Ajoute un événement depuis un thread GPIO, audio ou worker"""
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.post_event, event, value)
+
+    async def dispatch_events(self):
+        """Distribue les événements - chaque gestionnaire rend la main immédiatement"""
+        while True:
+            event, value = await self.events.get()
+
+            if self.state == STATE_SHUTDOWN:
+                continue
+
+            if event == EVENT_HOOK:
+                self.on_hook_event()
+            elif event == EVENT_SHUTDOWN_BUTTON:
+                self.on_shutdown_button_event()
+            elif event in (EVENT_DIAL, EVENT_DIAL_TIMEOUT):
+                self.on_dial_event()
+            elif event == EVENT_PLAYBACK_FINISHED:
+                print(f"⏹️ Lecture terminée: {value}")
+            elif event == EVENT_RECORDING_FINISHED:
+                print(f"⏹️ Enregistrement terminé: {value}")
+            elif event == EVENT_UPDATE_AVAILABLE:
+                self.on_update_available()
+
+    def on_hook_event(self):
+        """Transition décroché/raccroché"""
+        off_hook = self.gpio_manager.is_phone_off_hook()
+        if off_hook == self.off_hook:
+            return
+        self.off_hook = off_hook
+
+        # Revérifier après l'anti-rebond: un dernier front peut être masqué par bouncetime
+        self.loop.call_later(HOOK_BOUNCE_TIME / 1000.0 * 2, self.post_event, EVENT_HOOK)
+
+        if off_hook:
+            print("📞 Combiné décroché")
+            call_tracer.begin_call()
+            self.recording_manager.postprocess_queue.set_call_active(True)
+            self.dialer_manager.pulse_decoder.set_active(True)
+            self.spawn_call(self.on_off_hook())
+        else:
+            print("📞 Combiné raccroché")
+            call_tracer.mark("raccroche")
+            self.on_hang_up()
+
+    async def on_off_hook(self):
+        """Décroché: attendre la fin du raccrochage précédent puis passer en attente de numéro"""
+        if self.hangup_task and not self.hangup_task.done():
+            await self.hangup_task
+        self.enter_ready()
+
+    def enter_ready(self):
+        """Passe en attente de composition et affiche TIMEVOX"""
+        self.state = STATE_READY
+        self.display_manager.show_timevox()
+        if self.dialer_manager.has_pending_digits():
+            self.post_event(EVENT_DIAL)
+
+    def enter_idle(self):
+        """
+        Mode repos (combiné raccroché), entré uniquement sur la transition décroché -> raccroché
+        Plus aucun travail GPIO, audio ou I2C jusqu'au prochain front du combiné
+        """
+        self.state = STATE_IDLE
+        self.cancel_dial_timeout()
+        self.dialer_manager.pulse_decoder.set_active(False)
+
+    def on_hang_up(self):
+        """Raccroché: annule le traitement en cours au prochain tick de la boucle"""
+        self.enter_idle()
+        if self.call_task and not self.call_task.done():
+            self.call_task.cancel()
+        self.hangup_task = asyncio.create_task(self.hang_up())
+        self.hangup_task.add_done_callback(self.log_task_error)
+
+    async def hang_up(self):
+        """Arrête lecture/enregistrement puis attend la fin du travail bloquant en cours"""
+        saving = self.recording_manager.recording_started
+        await self.loop.run_in_executor(None, self.handle_phone_hangup)
+
+        # Laisser le worker terminer (ex. sauvegarde du message) avant le nettoyage final
+        if self.worker_future and not self.worker_future.done():
+            if saving:
+                self.display_manager.show_saving()
+            await asyncio.wait([asyncio.wrap_future(self.worker_future)])
+            if self.state == STATE_IDLE:
+                self.display_manager.clear_display()
+
+        # Téléphone au repos: les encodages différés (format_capture wav/flac) reprennent
+        if not self.off_hook:
+            call_tracer.end_call()
+            self.recording_manager.postprocess_queue.set_call_active(False)
+
+    def on_shutdown_button_event(self):
+        """Appui sur le bouton d'arrêt: démarre le suivi de l'appui"""
+        pressed = not self.gpio_manager.gpio_read(self.shutdown_button_gpio)
+        if pressed and (self.shutdown_task is None or self.shutdown_task.done()):
+            self.shutdown_task = asyncio.create_task(self.watch_shutdown_button())
+            self.shutdown_task.add_done_callback(self.log_task_error)
+
+    def on_dial_event(self):
+        """Chiffre décodé ou timeout de composition"""
+        call_tracer.mark("premier_chiffre", once=True)
+        if self.state != STATE_READY:
+            # Pendant un traitement, les chiffres sont consommés par le menu ou ignorés
+            return
+        if self.call_task and not self.call_task.done():
+            # La tâche de composition en cours consommera le chiffre
+            return
+        self.spawn_call(self.process_digits())
+
+    async def process_digits(self):
+        """Consomme les chiffres décodés et lance le traitement d'un numéro complet"""
+        self.cancel_dial_timeout()
+
+        while True:
+            completed_number = await self.run_blocking(self.dialer_manager.process_dialing)
+            if completed_number:
+                await self.handle_completed_number(completed_number)
+                return
+            if not self.dialer_manager.has_pending_digits():
+                break
+
+        if self.dialer_manager.get_composed_number():
+            # Réveil pour le timeout de composition (TIMEOUT_RESET)
+            self.dial_timeout_handle = self.loop.call_later(
+                TIMEOUT_RESET + 0.5, self.post_event, EVENT_DIAL_TIMEOUT
+            )
+        else:
+            self.display_manager.show_timevox()
+
+    async def handle_completed_number(self, completed_number):
+        """Traitement selon le type de numéro reconnu"""
+        self.state = STATE_BUSY
+        call_tracer.mark("dernier_chiffre")
+
+        # Maintenir l'affichage du numéro pendant le traitement
+        self.display_manager.show_calling_number(completed_number)
+
+        numero_principal = self.usb_manager.get_numero_principal()
+
+        if completed_number == numero_principal:
+            print(f"📞 Appel numéro principal: {completed_number}")
+            await self.handle_numero_principal()
+        elif is_special_audio_number(completed_number):
+            print(f"🎵 Appel numéro spécial: {completed_number}")
+            await self.run_blocking(self.handle_service_number, completed_number)
+        elif completed_number == "0000":
+            print(f"🔧 Appel paramètres: {completed_number}")
+            await self.run_blocking(self.handle_number_0000)
+        elif completed_number == "9999":
+            print(f"🔴 Extinction système demandée via cadran: {completed_number}")
+            # Afficher message sur écran
+            self.display_manager.show_shutdown_message("Extinction...")
+            await asyncio.sleep(1)
+            # Lancer l'extinction immédiatement
+            await self.shutdown()
+            return
+        else:
+            print(f"❓ Numéro non géré: {completed_number}")
+
+        # Effacer seulement après traitement complet, en ignorant les chiffres composés entre-temps
+        self.display_manager.clear_display()
+        self.dialer_manager.discard_pending_digits()
+        self.enter_ready()
+
+    async def run_blocking(self, func, *args):
+        """Exécute un appel bloquant dans le worker sans bloquer la boucle d'événements"""
+        self.worker_future = self.worker.submit(func, *args)
+        return await asyncio.wrap_future(self.worker_future)
+
+    async def play(self, path):
+        """Lit un fichier audio puis publie EVENT_PLAYBACK_FINISHED"""
+        result = await self.run_blocking(self.audio_manager.play_audio, path)
+        self.post_event(EVENT_PLAYBACK_FINISHED, path)
+        return result
+
+    async def record(self, duration, output_file, bip_sequence=None):
+        """Enregistre un message puis publie EVENT_RECORDING_FINISHED"""
+        result = await self.run_blocking(self.recording_manager.record_message, duration, output_file,
+                                         bip_sequence)
+        self.post_event(EVENT_RECORDING_FINISHED, output_file)
+        return result
+
+    def spawn_call(self, coro):
+        """Lance la tâche de traitement d'appel (annulée au raccrochage)"""
+        self.call_task = asyncio.create_task(coro)
+        self.call_task.add_done_callback(self.on_call_task_done)
+
+    def on_call_task_done(self, task):
+        """Revient en attente de numéro si le traitement d'appel a échoué"""
+        if task.cancelled():
+            return
+        if task.exception():
+            print(f"❌ Erreur traitement appel: {task.exception()}")
+            if self.off_hook and self.state == STATE_BUSY:
+                self.enter_ready()
+
+    def log_task_error(self, task):
+        """Affiche l'erreur d'une tâche de fond terminée en échec"""
+        if not task.cancelled() and task.exception():
+            print(f"❌ Erreur tâche contrôleur: {task.exception()}")
+
+    def cancel_dial_timeout(self):
+        """Annule le réveil de timeout de composition"""
+        if self.dial_timeout_handle:
+            self.dial_timeout_handle.cancel()
+            self.dial_timeout_handle = None
+
     def cleanup(self):
         """Nettoyage des ressources"""
         print("🧹 Nettoyage des ressources...")
@@ -440,6 +807,15 @@ class PhoneController:
         # Effacer l'écran
         self.display_manager.clear_display()
 
+        # Arrêter le décodeur d'impulsions avant de libérer les GPIO
+        self.dialer_manager.pulse_decoder.stop()
+
+        # Les captures non rendues restent sur la clé et seront reprises au démarrage
+        self.recording_manager.postprocess_queue.stop()
+
+        # Journaux en attente écrits et synchronisés sur la clé
+        self.usb_manager.flush_logs(sync=True)
+
         # Nettoyage GPIO original
         self.gpio_manager.cleanup()
 
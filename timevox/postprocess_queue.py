@@ -0,0 +1,183 @@
+# postprocess_queue.py
+"""
+File de post-traitement des messages enregistrés
+Les captures brutes (*_raw.wav) sont rendues en MP3 (coupe + effets) par des workers
+de faible priorité, pour que le combiné soit disponible dès le raccrochage.
+La file est persistante: une capture brute n'est supprimée qu'après un rendu réussi,
+et les captures restées sur la clé (arrêt, coupure) sont reprises au démarrage.
+Les rendus différés (format_capture wav/flac) sont mis de côté pendant un appel et remis
+en file au raccrochage: les rendus immédiats passent devant sans attendre.
+"""
+
+import os
+import queue
+import threading
+from config import RAW_CAPTURE_SUFFIX, POSTPROCESS_WORKERS, POSTPROCESS_NICE
+
+
+class PostProcessQueue:
+    def __init__(self, process_function, usb_manager=None, workers=POSTPROCESS_WORKERS):
+        self.process_function = process_function  # process_function(raw_file, output_file) -> fichier final ou None
+        self.usb_manager = usb_manager
+        self.workers = max(1, workers)
+
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = set()  # Captures brutes en file ou en cours de rendu
+        self.idle = threading.Event()
+        self.idle.set()
+        self.call_active = False  # Appel en cours: les rendus différés sont mis de côté
+        self.deferred_jobs = []  # Rendus différés en attente de la fin de l'appel (toujours dans pending)
+
+        self.processed_count = 0
+        self.failed_count = 0
+
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        """Démarre les workers et reprend les captures non traitées de la clé USB"""
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.worker_loop, name=f"timevox-postprocess-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.rescan()
+
+    def stop(self):
+        """Arrête les workers (les captures restantes seront reprises au prochain démarrage)"""
+        self.running = False
+        for _ in self.threads:
+            self.jobs.put(None)
+        self.threads = []
+
+    def get_output_path(self, raw_file):
+        """Retourne le MP3 final correspondant à une capture brute"""
+        return raw_file[:-len(RAW_CAPTURE_SUFFIX)] + ".mp3"
+
+    def rescan(self):
+        """Remet en file les captures brutes restées dans Messages/ (rendu interrompu)"""
+        if not self.usb_manager or not self.usb_manager.usb_path:
+            return 0
+
+        messages_dir = os.path.join(self.usb_manager.usb_path, "Messages")
+        found = 0
+        try:
+            for root, dirs, files in os.walk(messages_dir):
+                for name in sorted(files):
+                    if not name.endswith(RAW_CAPTURE_SUFFIX):
+                        continue
+                    raw_file = os.path.join(root, name)
+                    if self.enqueue(raw_file, self.get_output_path(raw_file), deferred=True):
+                        found += 1
+        except Exception as e:
+            print(f"Erreur recherche captures non traitées: {e}")
+
+        if found:
+            print(f"🔁 {found} capture(s) non traitée(s) remise(s) en file de post-traitement")
+        return found
+
+    def enqueue(self, raw_file, output_file, trim_start=None, trim_end=None, deferred=False):
+        """
+        Ajoute une capture brute à rendre; retourne False si elle est déjà en file
+        trim_start / trim_end: coupes mesurées (secondes), None pour les calculer au rendu
+        deferred: rendu seulement quand aucun appel n'est en cours
+        """
+        with self.lock:
+            if raw_file in self.pending:
+                return False
+            self.pending.add(raw_file)
+            self.idle.clear()
+        self.jobs.put((raw_file, output_file, trim_start, trim_end, deferred))
+        print(f"📥 Post-traitement en file: {os.path.basename(raw_file)} ({self.get_pending_count()} en attente)")
+        return True
+
+    def set_call_active(self, active):
+        """Combiné décroché/raccroché: les rendus différés sont suspendus pendant les appels"""
+        with self.lock:
+            self.call_active = active
+            if active:
+                return
+            jobs, self.deferred_jobs = self.deferred_jobs, []
+        for job in jobs:
+            self.jobs.put(job)
+
+    def lower_thread_priority(self):
+        """Passe le thread worker en priorité basse (les effets numpy sont calculés dans le processus)"""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), POSTPROCESS_NICE)
+        except (AttributeError, OSError) as e:
+            print(f"Priorité du post-traitement inchangée: {e}")
+
+    def worker_loop(self):
+        self.lower_thread_priority()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            raw_file, output_file, trim_start, trim_end, deferred = job
+            if deferred:
+                with self.lock:
+                    # Mis de côté sans occuper le worker: remis en file par set_call_active(False)
+                    if self.call_active:
+                        self.deferred_jobs.append(job)
+                        job = None
+                if job is None:
+                    print(f"⏸️ Encodage différé après l'appel: {os.path.basename(raw_file)}")
+                    continue
+            try:
+                if self.running:
+                    self.process_job(raw_file, output_file, trim_start, trim_end)
+            finally:
+                with self.lock:
+                    self.pending.discard(raw_file)
+                    if not self.pending:
+                        self.idle.set()
+
+    def process_job(self, raw_file, output_file, trim_start=None, trim_end=None):
+        """Rend une capture brute; elle reste sur la clé en cas d'échec"""
+        if not os.path.exists(raw_file):
+            return
+        if os.path.getsize(raw_file) == 0:
+            print(f"Capture vide supprimée: {raw_file}")
+            try:
+                os.remove(raw_file)
+            except OSError:
+                pass
+            return
+
+        try:
+            final_file = self.process_function(raw_file, output_file, trim_start, trim_end)
+        except Exception as e:
+            print(f"❌ Erreur post-traitement {raw_file}: {e}")
+            final_file = None
+
+        with self.lock:
+            if final_file:
+                self.processed_count += 1
+            else:
+                self.failed_count += 1
+
+        if final_file:
+            print(f"✅ Post-traitement terminé: {final_file}")
+
+    def get_pending_count(self):
+        """Nombre de captures en attente ou en cours de rendu"""
+        with self.lock:
+            return len(self.pending)
+
+    def wait_idle(self, timeout=None):
+        """Attend que la file soit vide; retourne True si tout est traité"""
+        return self.idle.wait(timeout)
+
+    def get_status(self):
+        """Retourne l'état de la file de post-traitement"""
+        with self.lock:
+            return {
+                "pending": len(self.pending),
+                "processed": self.processed_count,
+                "failed": self.failed_count,
+                "workers": self.workers
+            }
@@ -0,0 +1,176 @@
+# pulse_decoder.py
+"""
+Décodeur d'impulsions du cadran sur interruptions GPIO
+Les impulsions sont horodatées sur le front, les chiffres décodés sont placés dans une file
+"""
+
+import queue
+import threading
+import time
+from config import BUTTON_GPIO, REST_TIME, MIN_IMPULSE_TIME, PULSE_BOUNCE_TIME
+
+
+class PulseDecoder:
+    def __init__(self, gpio_manager, pin=BUTTON_GPIO):
+        self.gpio_manager = gpio_manager
+        self.pin = pin
+
+        # Chiffres décodés: (chiffre, horodatage première impulsion, horodatage dernière impulsion)
+        self.digits = queue.Queue()
+
+        # État du chiffre en cours (protégé par le verrou, modifié depuis le thread GPIO)
+        self.lock = threading.Lock()
+        self.edge_event = threading.Event()
+        self.count = 0
+        self.first_impulse_time = None
+        self.last_impulse_time = 0.0
+        self.last_edge_time = 0.0
+
+        # Notifié (depuis le thread de décodage) à chaque chiffre mis en file
+        self.listener = None
+
+        # Décodeur en pause quand le combiné est raccroché (mode repos)
+        self.active = threading.Event()
+        self.active.set()
+
+        self.running = False
+        self.edge_detection = False
+        self.worker_thread = None
+        self.sampler_thread = None
+
+    def start(self):
+        """Démarre la détection des fronts et le thread de décodage"""
+        if self.running:
+            return
+        self.running = True
+
+        # Détection matérielle des fronts avec anti-rebond; repli sur un échantillonneur dédié
+        self.edge_detection = self.gpio_manager.add_edge_callback(
+            self.pin, self.on_edge, bouncetime=PULSE_BOUNCE_TIME
+        )
+        if self.edge_detection:
+            print(f"Décodeur d'impulsions sur interruptions (GPIO {self.pin}, anti-rebond {PULSE_BOUNCE_TIME}ms)")
+        else:
+            print("⚠️ Détection de fronts indisponible - échantillonnage 1ms dans un thread dédié")
+            self.sampler_thread = threading.Thread(target=self.sample_loop, daemon=True)
+            self.sampler_thread.start()
+
+        self.worker_thread = threading.Thread(target=self.decode_loop, daemon=True)
+        self.worker_thread.start()
+
+    def stop(self):
+        """Arrête le décodeur"""
+        self.running = False
+        self.active.set()
+        self.edge_event.set()
+        if self.edge_detection:
+            self.gpio_manager.remove_edge_callback(self.pin)
+            self.edge_detection = False
+
+    def on_edge(self, channel=None):
+        """Callback GPIO: appelé sur chaque front de la ligne d'impulsions"""
+        if not self.active.is_set():
+            return
+
+        now = time.monotonic()
+        pressed = self.gpio_manager.is_button_pressed()
+
+        with self.lock:
+            self.last_edge_time = now
+            # Une impulsion = passage à l'état pressé, espacée d'au moins MIN_IMPULSE_TIME
+            if pressed and now - self.last_impulse_time > MIN_IMPULSE_TIME:
+                if not self.gpio_manager.is_phone_off_hook():
+                    return
+                self.count += 1
+                self.last_impulse_time = now
+                if self.count == 1:
+                    self.first_impulse_time = now
+
+        self.edge_event.set()
+
+    def sample_loop(self):
+        """Repli sans interruptions: détecte les fronts par échantillonnage rapide"""
+        last_state = self.gpio_manager.is_button_pressed()
+        while self.running:
+            if not self.active.is_set():
+                # Mode repos: aucun échantillonnage jusqu'au décroché
+                self.active.wait()
+                last_state = self.gpio_manager.is_button_pressed()
+            state = self.gpio_manager.is_button_pressed()
+            if state != last_state:
+                last_state = state
+                self.on_edge(self.pin)
+            time.sleep(0.001)
+
+    def decode_loop(self):
+        """Émet un chiffre quand la ligne reste au repos pendant REST_TIME"""
+        while self.running:
+            self.edge_event.wait()
+            self.edge_event.clear()
+
+            while self.running:
+                with self.lock:
+                    remaining = self.last_edge_time + REST_TIME - time.monotonic()
+                    if remaining <= 0 and not self.gpio_manager.is_button_pressed():
+                        self.emit_digit()
+                        break
+                # Attendre la fin du repos (ou un nouveau front)
+                self.edge_event.wait(max(remaining, 0.01))
+                self.edge_event.clear()
+
+    def emit_digit(self):
+        """Place le chiffre en cours dans la file (verrou déjà pris)"""
+        if self.count == 0:
+            return
+        digit = str(self.count % 10)
+        self.digits.put((digit, self.first_impulse_time, self.last_impulse_time))
+        self.count = 0
+        self.first_impulse_time = None
+        if self.listener:
+            self.listener()
+
+    def set_listener(self, listener):
+        """Définit la fonction appelée (sans argument) quand un chiffre est décodé"""
+        self.listener = listener
+
+    def set_active(self, active):
+        """Active/met en pause le décodage (pause = combiné raccroché)"""
+        if active:
+            self.active.set()
+        else:
+            self.active.clear()
+            self.clear()
+
+    def get_digit(self, timeout=None):
+        """
+        Retourne le prochain chiffre décodé (str) ou None
+        timeout=None: non bloquant, sinon attente maximale en secondes
+        """
+        try:
+            if timeout is None:
+                digit, _, _ = self.digits.get_nowait()
+            else:
+                digit, _, _ = self.digits.get(timeout=timeout)
+            return digit
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        """Vide les chiffres en attente et le chiffre en cours de composition"""
+        with self.lock:
+            self.count = 0
+            self.first_impulse_time = None
+        while True:
+            try:
+                self.digits.get_nowait()
+            except queue.Empty:
+                break
+
+    def has_pending_digits(self):
+        """Retourne True si des chiffres décodés attendent d'être consommés"""
+        return not self.digits.empty()
+
+    def is_dialing(self):
+        """Retourne True si un chiffre est en cours de composition"""
+        with self.lock:
+            return self.count > 0
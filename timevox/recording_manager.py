@@ -3,16 +3,24 @@
 Gestionnaire d'enregistrement des messages vocaux
 """
 
+import math
 import subprocess
 import threading
 import time
 import os
 import re
 from datetime import datetime
-from pydub import AudioSegment
-from config import RECORD_DURATION, AUDIO_CUT_DURATION
-from oled_display import afficher as afficher_texte
+from config import RECORD_DURATION, AUDIO_CUT_DURATION, RAW_CAPTURE_SUFFIX, POSTPROCESS_NICE, STREAMING_EFFECTS
+from config import CAPTURE_PREWARM, CAPTURE_PREROLL, VAD_ENABLED
+from config import DEFAULT_CAPTURE_FORMAT, DEFAULT_KEEP_MASTER, MASTER_SUFFIX
+from config import SIMULATION, SIMULATION_MIC_FILE
+from call_tracer import call_tracer
+from capture_service import CaptureService, get_capture_input_args
+from message_catalog import get_filter_label
 from audio_effects import AudioEffects
+from postprocess_queue import PostProcessQueue
+from stream_renderer import StreamingRenderer
+from wav_utils import read_wav_header, get_wav_duration
 
 
 class RecordingManager:
@@ -28,9 +36,20 @@ class RecordingManager:
         self.recording_started = False
         self.detected_micro = None
         self.detect_usb_micro_device()
+        self.capture_service = CaptureService()  # Micro ouvert pendant l'annonce (CAPTURE_PREWARM)
+        
+        # Rendu des messages en arrière-plan: le combiné est libre dès le raccrochage
+        self.postprocess_queue = PostProcessQueue(self.finalize_recording, usb_manager)
+        self.postprocess_queue.start()
     
     def detect_usb_micro_device(self):
         """Détection rapide du micro USB"""
+        if SIMULATION:
+            # Micro simulé: fichier WAV lu par ffmpeg
+            self.detected_micro = SIMULATION_MIC_FILE if os.path.exists(SIMULATION_MIC_FILE) else None
+            print(f"Micro simulé: {self.detected_micro}")
+            return self.detected_micro
+
         try:
             # Méthode rapide: lire directement /proc/asound/cards
             if os.path.exists("/proc/asound/cards"):
@@ -77,6 +96,8 @@ class RecordingManager:
             return False
 
         try:
+            from pydub import AudioSegment
+
             # Charger le MP3
             audio = AudioSegment.from_mp3(input_file)
 
@@ -96,6 +117,163 @@ class RecordingManager:
             print(f"Erreur lors de la coupe du fichier: {e}")
             return False
     
+    def get_raw_capture_path(self, output_file):
+        """Retourne le chemin de la capture PCM brute associée à un message"""
+        base_name, _ = os.path.splitext(output_file)
+        return f"{base_name}{RAW_CAPTURE_SUFFIX}"
+    
+    def get_capture_config(self):
+        """Format de capture (format_capture de config.json) et conservation du master"""
+        if self.usb_manager:
+            return self.usb_manager.get_capture_config()
+        return {"format": DEFAULT_CAPTURE_FORMAT, "keep_master": DEFAULT_KEEP_MASTER}
+    
+    def get_master_path(self, output_file, capture_config):
+        """Master sans perte à produire avec le MP3, None en format mp3 ou si le master n'est pas conservé"""
+        if capture_config["format"] == "mp3" or not capture_config["keep_master"]:
+            return None
+        base_name, _ = os.path.splitext(output_file)
+        return f"{base_name}{MASTER_SUFFIX}.{capture_config['format']}"
+    
+    def get_speech_cuts(self, raw_file, min_start):
+        """
+        Coupes début/fin d'après la parole détectée dans la capture brute (lecture du PCM)
+        min_start: le message ne commence pas avant (bip encore audible dans la capture)
+        Retourne (coupe de début, coupe de fin) en secondes; AUDIO_CUT_DURATION en fin si pas de parole
+        """
+        cut_seconds = AUDIO_CUT_DURATION / 1000.0
+        if not VAD_ENABLED:
+            return min_start, cut_seconds
+        try:
+            from speech_trimmer import analyze_wav
+            cuts = analyze_wav(raw_file)
+        except Exception as e:
+            print(f"Détection de parole impossible: {e}")
+            cuts = None
+        if cuts is None:
+            return min_start, cut_seconds
+        speech_start, speech_end, duration = cuts
+        print(f"Parole détectée de {speech_start:.2f}s à {speech_end:.2f}s (capture {duration:.2f}s)")
+        return max(min_start, speech_start), max(0.0, duration - speech_end)
+    
+    def finalize_recording(self, raw_file, output_file, trim_start=None, trim_end=None):
+        """
+        Transforme la capture brute en message final (coupe + effets, un seul encodage)
+        trim_start: coupe de début mesurée (fin du bip), None pour AUDIO_CUT_DURATION
+        trim_end: coupe de fin mesurée, None pour la calculer sur la parole (VAD_ENABLED)
+        La capture brute est supprimée si le rendu réussit
+        """
+        cut_seconds = AUDIO_CUT_DURATION / 1000.0
+        if trim_start is None:
+            trim_start = cut_seconds
+        if trim_end is None:
+            with call_tracer.measure("detection_parole", output_file):
+                trim_start, trim_end = self.get_speech_cuts(raw_file, trim_start)
+        # La capture brute est le master sans perte jusqu'à l'encodage; il n'en reste une
+        # copie coupée (wav/flac) que si conserver_master est actif
+        master_file = self.get_master_path(output_file, self.get_capture_config())
+        with call_tracer.measure("rendu", output_file):
+            final_file = self.audio_effects.render_message(
+                raw_file, output_file, trim_start=trim_start, trim_end=trim_end,
+                nice_level=POSTPROCESS_NICE, master_file=master_file
+            )
+        call_tracer.file_saved(output_file, saved=final_file is not None)
+        
+        if final_file:
+            self.catalog_message(final_file, self.get_rendered_duration(raw_file, trim_start, trim_end))
+            try:
+                os.remove(raw_file)
+            except OSError as e:
+                print(f"Erreur suppression capture brute: {e}")
+            return final_file
+        
+        print(f"Rendu impossible - capture brute conservée: {raw_file}")
+        return None
+    
+    def get_rendered_duration(self, raw_file, trim_start, trim_end):
+        """Durée du message final d'après l'en-tête de la capture brute (mêmes règles que render_message)"""
+        try:
+            duration = get_wav_duration(raw_file)
+        except Exception as e:
+            print(f"Durée de la capture illisible: {e}")
+            return 0.0
+        length = duration - max(0.0, trim_start) - max(0.0, trim_end)
+        return length if length > 0 else duration
+    
+    def catalog_message(self, message_file, duration, config=None):
+        """Ajoute le message sauvegardé au catalogue de la clé (config: filtre appliqué)"""
+        catalog = self.usb_manager.get_message_catalog() if self.usb_manager else None
+        if catalog:
+            config = config or self.audio_effects.get_filter_config()
+            catalog.add_message(message_file, duration, get_filter_label(config))
+    
+    def create_stream_renderer(self, output_file, trim_start):
+        """
+        Prépare le rendu pendant la capture (mode STREAMING_EFFECTS), None si non applicable
+        trim_start: coupe de début (secondes), None si elle sera fixée à la fin du bip (set_trim_start)
+        """
+        if not STREAMING_EFFECTS:
+            return None
+        capture_format = self.get_capture_config()["format"]
+        if capture_format != "mp3":
+            print(f"Format de capture {capture_format}: encodage MP3 après l'appel")
+            return None
+        config = self.audio_effects.get_filter_config()
+        if not self.audio_effects.can_stream_effects(config):
+            print(f"Filtre '{config['type']}': rendu après l'appel")
+            return None
+        cut_seconds = AUDIO_CUT_DURATION / 1000.0
+        return StreamingRenderer(self.audio_effects, config, output_file, trim_start, cut_seconds)
+    
+    def read_capture_stream(self, process, renderer):
+        """Lit le PCM envoyé par ffmpeg sur sa sortie standard et le transmet au rendu en continu"""
+        try:
+            sample_rate, channels = read_wav_header(process.stdout)
+            if renderer.start(sample_rate, channels):
+                while True:
+                    data = process.stdout.read1(65536)
+                    if not data:
+                        return
+                    renderer.feed(data)
+        except Exception as e:
+            print(f"Erreur lecture flux de capture: {e}")
+        
+        # Mode continu impossible: vider le flux pour ne pas bloquer la capture
+        try:
+            while process.stdout.read(65536):
+                pass
+        except Exception:
+            pass
+    
+    def cancel_stream(self, process, renderer, stream_thread):
+        """Abandonne le rendu en continu après un échec de capture"""
+        if process.poll() is None:
+            process.terminate()
+            process.wait()
+        if stream_thread:
+            stream_thread.join()
+        renderer.cancel()
+    
+    def complete_capture(self, raw_file, output_file, renderer, trim_start=None, trim_end=None):
+        """Termine le rendu en continu, ou met la capture brute en file de post-traitement"""
+        if renderer is not None:
+            if trim_start is not None:
+                renderer.set_trim_start(trim_start)
+            with call_tracer.measure("rendu", output_file):
+                final_file = renderer.finish(trim_end)
+            if final_file:
+                call_tracer.file_saved(output_file)
+                self.catalog_message(final_file, renderer.samples_out / float(renderer.sample_rate),
+                                     renderer.config)
+                try:
+                    os.remove(raw_file)
+                except OSError as e:
+                    print(f"Erreur suppression capture brute: {e}")
+                return True
+        # wav/flac: l'encodage MP3 attend que le téléphone soit au repos
+        deferred = self.get_capture_config()["format"] != "mp3"
+        return self.postprocess_queue.enqueue(raw_file, output_file, trim_start, trim_end, deferred)
+    
     def display_countdown(self, duration, output_file):
         """Affiche le compteur de temps restant pendant l'enregistrement"""
         for i in range(1, duration + 1):
@@ -122,56 +300,173 @@ class RecordingManager:
         self.recording_active = False
         print("Enregistrement arrêté")
     
-    def record_message(self, duration=None, output_file=None):
-        """Enregistre un message vocal"""
-        if duration is None:
-            duration = RECORD_DURATION
-        
-        # Utiliser le micro pré-détecté
-        device = self.detected_micro
-        if not device:
-            print("Aucun micro disponible.")
+    def wait_bip_end(self, bip_sequence, capture_ready):
+        """
+        Attend la fin du bip joué par la lecture enchaînée (annonce -> bip) puis coupe le son
+        Retourne la coupe de début: instant de fin du bip dans la capture, moins CAPTURE_PREROLL
+        """
+        bip_sequence.wait()
+        self.gpio_manager.disable_sound()
+        bip_end = bip_sequence.finished_at[-1]
+        if bip_end is None or capture_ready is None:
+            return None  # Lecture interrompue: coupe par défaut
+        # Le pré-enregistrement garde ce qui a été dit sur la fin du bip, si la capture le couvre
+        trim_start = max(0.0, bip_end - capture_ready - CAPTURE_PREROLL)
+        print(f"Fin du bip à {bip_end - capture_ready:.3f}s de capture, début du message à {trim_start:.3f}s")
+        return trim_start
+    
+    def arm_capture(self):
+        """Ouvre le micro pendant l'annonce (CAPTURE_PREWARM); False si la capture sera lancée au bip"""
+        if not CAPTURE_PREWARM or not self.detected_micro:
             return False
+        return self.capture_service.start(self.detected_micro)
+    
+    def release_capture(self):
+        """Ferme le micro pré-armé s'il n'écrit pas de message"""
+        if not self.capture_service.is_message_active():
+            self.capture_service.stop()
+    
+    def play_bip(self):
+        """Joue le bip (capture déjà prête) et retourne l'instant de sa fin"""
+        bip_path = self.audio_manager.get_bip_path()
+        if bip_path:
+            self.gpio_manager.enable_sound()
+            time.sleep(0.1)
+            print("Lecture du bip...")
+            self.audio_manager.play_audio(bip_path)
+            self.gpio_manager.disable_sound()
+        else:
+            print("Fichier bip.mp3 non trouvé - pas de bip")
+        return time.monotonic()
+    
+    def wait_recording_end(self, is_capturing):
+        """Attend la fin de la capture ou l'arrêt (raccrochage)"""
+        while is_capturing() and self.recording_active:
+            # Vérifier l'état du combiné pendant l'enregistrement
+            if self.gpio_manager.is_phone_on_hook():
+                print("Raccrochage détecté pendant enregistrement - arrêt")
+                self.display_manager.show_saving()
+                self.recording_active = False
+                break
+            time.sleep(0.1)
+    
+    def capture_with_service(self, duration, output_file, raw_file, bip_sequence):
+        """
+        Capture depuis le micro pré-armé: le message commence à l'échantillon de fin du bip
+        Retourne (renderer, coupe de début, coupe de fin), ou None si le micro pré-armé n'a pas pu servir
+        """
+        # Le fichier commence exactement où il faut (fin du bip - CAPTURE_PREROLL): pas de coupe
+        # de début, sauf le silence avant la parole si la détection est active
+        trimmer = self.create_speech_trimmer()
+        renderer = self.create_stream_renderer(output_file, None if trimmer else 0.0)
 
-        print(f"Micro prêt: {device}")
+        if bip_sequence is not None:
+            # Le bip est déjà en cours (enchaîné après l'annonce)
+            bip_sequence.wait()
+            self.gpio_manager.disable_sound()
+            start_time = bip_sequence.finished_at[-1] or time.monotonic()
+        else:
+            start_time = self.play_bip()
 
-        if os.path.exists(output_file):
-            os.remove(output_file)
+        # Pré-enregistrement: le message reprend les dernières fractions de seconde du bip
+        # depuis le tampon du micro, pour ne pas couper un invité qui parle déjà
+        if not self.capture_service.start_message(raw_file, start_time - CAPTURE_PREROLL,
+                                                  duration + CAPTURE_PREROLL, renderer, trimmer):
+            if renderer:
+                renderer.cancel()
+            return None
+        call_tracer.span("bip_capture", start_time)
 
-        print("Démarrage de l'enregistrement...")
-        self.recording_active = True
-        self.recording_started = True
+        print("Enregistrement en cours...")
+        compteur_thread = threading.Thread(
+            target=self.display_countdown,
+            args=(duration, output_file)
+        )
+        compteur_thread.start()
+
+        self.wait_recording_end(self.capture_service.is_message_active)
+        captured = self.capture_service.stop_message()
+        compteur_thread.join()
+        print(f"Message capturé: {captured:.2f}s")
 
+        cuts = trimmer.get_cut_points(hung_up=not self.recording_active) if trimmer else None
+        if cuts is None:
+            return renderer, 0.0, AUDIO_CUT_DURATION / 1000.0
+        print(f"Parole détectée de {cuts[0]:.2f}s à {cuts[1]:.2f}s")
+        return renderer, cuts[0], max(0.0, captured - cuts[1])
+    
+    def create_speech_trimmer(self):
+        """Détection de parole alimentée pendant la capture (VAD_ENABLED), None si indisponible"""
+        if not VAD_ENABLED:
+            return None
         try:
-            # Démarrer ffmpeg
-            self.recording_process = subprocess.Popen([
-                "ffmpeg", "-f", "alsa", "-ac", "1", "-i", device,
-                "-t", str(duration), "-acodec", "libmp3lame",
-                "-ab", "128k", "-loglevel", "error", output_file
-            ])
+            # numpy n'est chargé que lorsqu'un message est enregistré
+            from speech_trimmer import SpeechTrimmer
+            return SpeechTrimmer()
+        except Exception as e:
+            print(f"Détection de parole indisponible: {e}")
+            return None
+    
+    def capture_with_ffmpeg(self, device, duration, output_file, raw_file, bip_sequence):
+        """
+        Capture en lançant ffmpeg au moment de l'enregistrement
+        Retourne (renderer, coupe de début, None), ou None en cas d'échec
+        (la coupe de fin est calculée sur la parole au rendu en arrière-plan)
+        """
+        # Effets appliqués pendant la capture si le mode continu est actif
+        cut_seconds = AUDIO_CUT_DURATION / 1000.0
+        renderer = self.create_stream_renderer(output_file, None if bip_sequence is not None else cut_seconds)
+        stream_thread = None
+        trim_start = None
+
+        if bip_sequence is not None:
+            # La capture couvre la fin du bip, coupée ensuite: la durée du message reste la même
+            duration = int(math.ceil(duration + bip_sequence.get_remaining()))
+
+        try:
+            # Démarrer ffmpeg (référence locale: stop_recording() peut être appelé depuis un autre thread)
+            cmd = [
+                "ffmpeg", *get_capture_input_args(device),
+                "-t", str(duration), "-acodec", "pcm_s16le",
+                "-loglevel", "error", raw_file
+            ]
+            if renderer:
+                # Deuxième sortie: le même PCM sur stdout pour le rendu en continu
+                cmd += ["-t", str(duration), "-f", "wav", "-acodec", "pcm_s16le", "pipe:1"]
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE if renderer else None)
+            self.recording_process = process
+            if renderer:
+                stream_thread = threading.Thread(
+                    target=self.read_capture_stream, args=(process, renderer), daemon=True
+                )
+                stream_thread.start()
 
             # Attendre que ffmpeg soit vraiment prêt
             print("Attente initialisation enregistrement...")
             timeout = 0
-            while not os.path.exists(output_file) and timeout < 100:
-                time.sleep(0.1)
+            while not os.path.exists(raw_file) and timeout < 1000:
+                time.sleep(0.01)
                 timeout += 1
                 if not self.recording_active:
                     break
 
-            if os.path.exists(output_file):
+            if os.path.exists(raw_file):
+                capture_ready = time.monotonic()
                 print("Enregistrement initialisé")
 
-                # Lecture du bip APRÈS que l'enregistrement soit prêt
-                bip_path = self.audio_manager.get_bip_path()
-                if bip_path:
-                    self.gpio_manager.enable_sound()
-                    time.sleep(0.1)
-                    print("Lecture du bip...")
-                    self.audio_manager.play_audio(bip_path)
-                    self.gpio_manager.disable_sound()
+                if bip_sequence is not None:
+                    # Le bip est déjà en cours (enchaîné après l'annonce)
+                    trim_start = self.wait_bip_end(bip_sequence, capture_ready)
+                    if renderer and trim_start is not None:
+                        renderer.set_trim_start(trim_start)
+                    bip_end = bip_sequence.finished_at[-1]
+                    if bip_end is not None:
+                        # Capture lancée pendant le bip: 0 si elle était prête avant sa fin
+                        call_tracer.record("bip_capture", max(0.0, capture_ready - bip_end))
                 else:
-                    print("Fichier bip.mp3 non trouvé - pas de bip")
+                    # Lecture du bip APRÈS que l'enregistrement soit prêt
+                    self.play_bip()
+                    call_tracer.record("bip_capture", 0.0)
 
                 print("Enregistrement en cours...")
                 # Démarrer le compteur
@@ -183,68 +478,99 @@ class RecordingManager:
             else:
                 print("Échec initialisation enregistrement")
                 self.recording_active = False
-                return False
+                if bip_sequence is not None:
+                    bip_sequence.stop()
+                    self.gpio_manager.disable_sound()
+                if renderer:
+                    self.cancel_stream(process, renderer, stream_thread)
+                return None
 
             # Attendre la fin du processus ou l'arrêt
-            while self.recording_process.poll() is None and self.recording_active:
-                # Vérifier l'état du combiné pendant l'enregistrement
-                if self.gpio_manager.is_phone_on_hook():
-                    print("Raccrochage détecté pendant enregistrement - arrêt")
-                    self.display_manager.show_saving()
-                    self.recording_active = False
-                    break
-                time.sleep(0.1)
+            self.wait_recording_end(lambda: process.poll() is None)
 
             if not self.recording_active:
                 # Arrêt prématuré - terminer le processus
-                self.recording_process.terminate()
-                self.recording_process.wait()
+                process.terminate()
+                process.wait()
 
         except Exception as e:
             print("Erreur enregistrement :", e)
             self.recording_active = False
+            if bip_sequence is not None:
+                bip_sequence.stop()
+            if stream_thread:
+                self.cancel_stream(process, renderer, stream_thread)
+            return None
+
+        compteur_thread.join()
+        if stream_thread:
+            stream_thread.join()
+        return renderer, trim_start, None
+    
+    def record_message(self, duration=None, output_file=None, bip_sequence=None):
+        """
+        Enregistre un message vocal
+        bip_sequence: lecture enchaînée en cours dont le dernier son est le bip; la capture
+        démarre pendant le bip et le message commence exactement à sa fin
+        """
+        if duration is None:
+            duration = RECORD_DURATION
+        
+        # Utiliser le micro pré-détecté
+        device = self.detected_micro
+        if not device:
+            print("Aucun micro disponible.")
             return False
 
-        if 'compteur_thread' in locals():
-            compteur_thread.join()
+        print(f"Micro prêt: {device}")
+
+        # Capture en PCM brut: un seul encodage MP3 au moment du rendu final
+        raw_file = self.get_raw_capture_path(output_file)
+        for path in (output_file, raw_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+        print("Démarrage de l'enregistrement...")
+        call_tracer.attach_file(output_file)
+        self.recording_active = True
+        self.recording_started = True
+
+        capture = None
+        if self.capture_service.is_running():
+            capture = self.capture_with_service(duration, output_file, raw_file, bip_sequence)
+            self.release_capture()
+        if capture is None and self.recording_active:
+            capture = self.capture_with_ffmpeg(device, duration, output_file, raw_file, bip_sequence)
+        call_tracer.mark("fin_capture")
+        if capture is None:
+            call_tracer.file_saved(output_file, saved=False)
+            self.recording_active = False
+            self.recording_started = False
+            self.recording_process = None
+            return False
+        renderer, trim_start, trim_end = capture
 
         success = False
-        final_file = output_file
         
         if self.recording_active:
-            print(f"Fichier enregistré : {output_file}")
-            # 1. D'abord couper le début/fin
-            if self.trim_audio_file(output_file):
-                # 2. Ensuite appliquer les effets vintage si configurés
-                print("Application des effets vintage...")
-                processed_file = self.audio_effects.process_audio_file(output_file)
-                if processed_file:
-                    final_file = processed_file
-                    print(f"Fichier final avec effets: {final_file}")
-                    success = True
-                else:
-                    print("Erreur application effets - fichier original conservé")
-                    success = True  # On considère que c'est un succès même sans effets
-            else:
-                success = False
+            print(f"Capture terminée : {raw_file}")
+            # Coupe début/fin + effets vintage: déjà faits en continu, sinon en arrière-plan
+            success = self.complete_capture(raw_file, output_file, renderer, trim_start, trim_end)
         else:
             print("Enregistrement arrêté par raccrochage")
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                print(f"Fichier partiel sauvegardé : {output_file}")
+            if os.path.exists(raw_file) and os.path.getsize(raw_file) > 0:
+                print(f"Capture partielle : {raw_file}")
                 # Appliquer la coupe ET les effets même sur un fichier partiel
-                if self.trim_audio_file(output_file):
-                    processed_file = self.audio_effects.process_audio_file(output_file)
-                    if processed_file:
-                        final_file = processed_file
-                        print(f"Fichier partiel avec effets: {final_file}")
-                    success = True
+                success = self.complete_capture(raw_file, output_file, renderer, trim_start, trim_end)
             else:
                 print("Aucun fichier créé ou fichier vide")
             # Effacer l'écran si arrêt prématuré
             self.display_manager.clear_display()
 
+        if not success:
+            call_tracer.file_saved(output_file, saved=False)
         self.recording_active = False
         self.recording_started = False
         self.recording_process = None
         
-        return success
\ No newline at end of file
+        return success
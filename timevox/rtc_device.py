@@ -0,0 +1,155 @@
+# rtc_device.py
+"""
+Accès direct au module RTC DS3231, sans lancer hwclock
+- RTCIoctlDevice: /dev/rtc0 via les ioctls RTC_RD_TIME / RTC_SET_TIME du noyau
+- DS3231I2CDevice: registres du DS3231 en I2C (adresse 0x68), si /dev/rtc0 est inutilisable
+- FakeRTCDevice: horloge simulée en mémoire pour les tests sans matériel
+Les heures échangées sont des datetime naïfs en UTC (convention de hwclock sur le Pi)
+"""
+
+import os
+import fcntl
+import struct
+from datetime import datetime, timedelta, timezone
+from config import RTC_DEVICE_PATH, RTC_I2C_BUS, RTC_I2C_ADDRESS
+
+# struct rtc_time (linux/rtc.h): 9 int
+# tm_sec, tm_min, tm_hour, tm_mday, tm_mon, tm_year, tm_wday, tm_yday, tm_isdst
+_RTC_TIME = struct.Struct("9i")
+RTC_RD_TIME = 0x80247009   # _IOR('p', 0x09, struct rtc_time)
+RTC_SET_TIME = 0x4024700a  # _IOW('p', 0x0a, struct rtc_time)
+
+
+def _bcd_to_int(value):
+    return (value >> 4) * 10 + (value & 0x0F)
+
+
+def _int_to_bcd(value):
+    return ((value // 10) << 4) | (value % 10)
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+
+class RTCIoctlDevice:
+    """RTC du noyau (/dev/rtc0, pilote rtc-ds1307 chargé par l'overlay i2c-rtc,ds3231)"""
+
+    name = "ioctl"
+
+    def __init__(self, path=RTC_DEVICE_PATH):
+        self.path = path
+
+    def read_time(self):
+        """Lit l'heure du RTC (UTC)"""
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            buffer = fcntl.ioctl(fd, RTC_RD_TIME, bytes(_RTC_TIME.size))
+        finally:
+            os.close(fd)
+        sec, minute, hour, mday, mon, year = _RTC_TIME.unpack(buffer)[:6]
+        return datetime(year + 1900, mon + 1, mday, hour, minute, sec)
+
+    def set_time(self, dt):
+        """Écrit l'heure dans le RTC (dt en UTC)"""
+        buffer = _RTC_TIME.pack(
+            dt.second, dt.minute, dt.hour, dt.day, dt.month - 1, dt.year - 1900,
+            (dt.weekday() + 1) % 7, dt.timetuple().tm_yday - 1, 0
+        )
+        fd = os.open(self.path, os.O_WRONLY)
+        try:
+            fcntl.ioctl(fd, RTC_SET_TIME, buffer)
+        finally:
+            os.close(fd)
+
+
+class DS3231I2CDevice:
+    """DS3231 lu directement sur le bus I2C (registres 0x00-0x06 en BCD)"""
+
+    name = "i2c"
+
+    def __init__(self, bus=RTC_I2C_BUS, address=RTC_I2C_ADDRESS):
+        self.bus_number = bus
+        self.address = address
+
+    def open_bus(self):
+        from smbus2 import SMBus  # Importé uniquement si ce mode est utilisé
+        return SMBus(self.bus_number)
+
+    def read_time(self):
+        """Lit l'heure du DS3231 (UTC)"""
+        with self.open_bus() as bus:
+            # force=True: l'adresse est normalement réservée par le pilote noyau
+            regs = bus.read_i2c_block_data(self.address, 0x00, 7, force=True)
+        second = _bcd_to_int(regs[0] & 0x7F)
+        minute = _bcd_to_int(regs[1] & 0x7F)
+        if regs[2] & 0x40:
+            # Mode 12 heures
+            hour = _bcd_to_int(regs[2] & 0x1F) % 12
+            if regs[2] & 0x20:
+                hour += 12
+        else:
+            hour = _bcd_to_int(regs[2] & 0x3F)
+        day = _bcd_to_int(regs[4] & 0x3F)
+        month = _bcd_to_int(regs[5] & 0x1F)
+        year = 2000 + _bcd_to_int(regs[6]) + (100 if regs[5] & 0x80 else 0)
+        return datetime(year, month, day, hour, minute, second)
+
+    def set_time(self, dt):
+        """Écrit l'heure dans le DS3231 (dt en UTC, mode 24 heures)"""
+        century = 0x80 if dt.year >= 2100 else 0
+        regs = [
+            _int_to_bcd(dt.second),
+            _int_to_bcd(dt.minute),
+            _int_to_bcd(dt.hour),
+            dt.isoweekday(),
+            _int_to_bcd(dt.day),
+            _int_to_bcd(dt.month) | century,
+            _int_to_bcd(dt.year % 100)
+        ]
+        with self.open_bus() as bus:
+            bus.write_i2c_block_data(self.address, 0x00, regs, force=True)
+
+
+class FakeRTCDevice:
+    """RTC simulé: dérive fixe par rapport à l'horloge système, réglable comme un vrai module"""
+
+    name = "fake"
+
+    def __init__(self, initial_time=None, fail=False):
+        self.offset = timedelta(0)
+        self.fail = fail  # Simule un module absent ou défaillant
+        self.reads = 0
+        self.writes = 0
+        if initial_time is not None:
+            self.set_time(initial_time)
+            self.writes = 0
+
+    def read_time(self):
+        if self.fail:
+            raise OSError("RTC simulé indisponible")
+        self.reads += 1
+        return _utc_now() + self.offset
+
+    def set_time(self, dt):
+        if self.fail:
+            raise OSError("RTC simulé indisponible")
+        self.writes += 1
+        # Résolution d'une seconde, comme un vrai RTC
+        self.offset = timedelta(seconds=round((dt - _utc_now()).total_seconds()))
+
+
+def open_rtc_device(path=RTC_DEVICE_PATH):
+    """Retourne le premier accès RTC fonctionnel (ioctl puis I2C) ou None"""
+    candidates = []
+    if os.path.exists(path):
+        candidates.append(RTCIoctlDevice(path))
+    candidates.append(DS3231I2CDevice())
+
+    for device in candidates:
+        try:
+            device.read_time()
+            return device
+        except Exception as e:
+            print(f"Accès RTC {device.name} indisponible: {e}")
+    return None
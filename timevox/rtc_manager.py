@@ -6,16 +6,24 @@ Gestionnaire du module RTC (Real-Time Clock) pour TimeVox
 import subprocess
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+from config import RTC_DEVICE_PATH, RTC_STATUS_CACHE_TTL
+from rtc_device import open_rtc_device
 
 
 class RTCManager:
-    def __init__(self):
-        self.rtc_device = "/dev/rtc0"
+    def __init__(self, device=None, set_system_clock=True):
+        self.rtc_device = RTC_DEVICE_PATH
+        self.device = device  # Accès RTC (ioctl, I2C ou simulé), détecté si None
+        self.set_system_clock = set_system_clock  # False: ne jamais toucher l'horloge système (tests)
+        
+        # Dernière lecture du RTC: (heure RTC UTC, instant monotonic de la lecture)
+        self.last_rtc_read = None
+        
         self.is_rtc_available = self.check_rtc_availability()
         
         if self.is_rtc_available:
-            print("Module RTC détecté et disponible")
+            print(f"Module RTC détecté et disponible (accès {self.device.name})")
             self.sync_system_from_rtc()
         else:
             print("Module RTC non disponible - utilisation de l'heure système")
@@ -23,11 +31,21 @@ class RTCManager:
     def check_rtc_availability(self):
         """Vérifie si le module RTC est disponible"""
         try:
-            return os.path.exists(self.rtc_device)
+            if self.device is None:
+                self.device = open_rtc_device(self.rtc_device)
+            else:
+                self.device.read_time()  # Accès fourni: vérifier qu'il répond
+            return self.device is not None
         except Exception as e:
             print(f"Erreur vérification RTC: {e}")
             return False
     
+    def read_rtc_time(self):
+        """Lit l'heure du RTC (datetime UTC) et met à jour le cache de statut"""
+        rtc_time = self.device.read_time()
+        self.last_rtc_read = (rtc_time, time.monotonic())
+        return rtc_time
+    
     def sync_system_from_rtc(self):
         """Synchronise l'heure système depuis le RTC au démarrage"""
         if not self.is_rtc_available:
@@ -35,24 +53,20 @@ class RTCManager:
         
         try:
             # Lire l'heure du RTC et l'appliquer au système
-            result = subprocess.run(
-                ["sudo", "hwclock", "-r", "-f", self.rtc_device], 
-                capture_output=True, text=True, timeout=5
-            )
+            rtc_time = self.read_rtc_time()
+            print(f"Heure RTC: {rtc_time} UTC")
             
-            if result.returncode == 0:
-                print(f"Heure RTC: {result.stdout.strip()}")
-                
-                # Appliquer l'heure RTC au système
-                subprocess.run(
-                    ["sudo", "hwclock", "-s", "-f", self.rtc_device], 
-                    timeout=5
-                )
-                print("Heure système synchronisée depuis le RTC")
-                return True
-            else:
-                print(f"Erreur lecture RTC: {result.stderr}")
+            if rtc_time.year < 2020:
+                print("Heure RTC invalide (pile vide ou module jamais réglé) - heure système conservée")
                 return False
+            
+            if not self.set_system_clock:
+                return True
+            
+            timestamp = rtc_time.replace(tzinfo=timezone.utc).timestamp()
+            time.clock_settime(time.CLOCK_REALTIME, timestamp)
+            print("Heure système synchronisée depuis le RTC")
+            return True
                 
         except Exception as e:
             print(f"Erreur synchronisation RTC: {e}")
@@ -65,10 +79,9 @@ class RTCManager:
         
         try:
             # Écrire l'heure système vers le RTC
-            subprocess.run(
-                ["sudo", "hwclock", "-w", "-f", self.rtc_device], 
-                timeout=5
-            )
+            now_utc = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+            self.device.set_time(now_utc)
+            self.last_rtc_read = (now_utc, time.monotonic())
             print("RTC synchronisé depuis l'heure système")
             return True
             
@@ -137,8 +150,11 @@ class RTCManager:
         
         return False
     
-    def get_status_info(self):
-        """Retourne des informations sur l'état du RTC"""
+    def get_status_info(self, force_refresh=False):
+        """
+        Retourne des informations sur l'état du RTC
+        L'heure RTC est extrapolée depuis la dernière lecture (relue après RTC_STATUS_CACHE_TTL)
+        """
         info = {
             "rtc_available": self.is_rtc_available,
             "system_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -146,14 +162,17 @@ class RTCManager:
         }
         
         if self.is_rtc_available:
+            info["rtc_backend"] = self.device.name
             try:
-                result = subprocess.run(
-                    ["sudo", "hwclock", "-r", "-f", self.rtc_device],
-                    capture_output=True, text=True, timeout=5
-                )
-                if result.returncode == 0:
-                    info["rtc_time"] = result.stdout.strip()
-            except:
+                if (force_refresh or self.last_rtc_read is None or
+                        time.monotonic() - self.last_rtc_read[1] > RTC_STATUS_CACHE_TTL):
+                    self.read_rtc_time()
+                
+                rtc_time, read_at = self.last_rtc_read
+                elapsed = time.monotonic() - read_at
+                rtc_now = rtc_time.replace(tzinfo=timezone.utc).timestamp() + elapsed
+                info["rtc_time"] = datetime.fromtimestamp(rtc_now).strftime("%Y-%m-%d %H:%M:%S")
+            except Exception:
                 info["rtc_time"] = "Erreur lecture"
         
-        return info
\ No newline at end of file
+        return info
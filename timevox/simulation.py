@@ -0,0 +1,378 @@
+# simulation.py
+"""
+Simulation sans matériel: le téléphone complet tourne sur un PC Linux ordinaire (développement, CI)
+Activée par TIMEVOX_SIMULATION=1 (python3 main.py --simulation [scenario.json]):
+- SimulatedGPIO: API de RPi.GPIO en mémoire; un scénario rejoue décroché, impulsions du cadran,
+  raccroché et bouton d'arrêt avec des fronts aux timings d'un vrai cadran
+- MemoryOLED: écran SH1106 en mémoire (mêmes commandes que luma), garde chaque image affichée
+- Audio: le mixer pygame écrit dans un fichier (pilote SDL "disk"), le micro est un WAV lu par ffmpeg
+- RTC: FakeRTCDevice de rtc_device, sans toucher à l'horloge système
+Tout est rangé dans SIMULATION_DIR: clé USB simulée, sortie audio, micro et images de l'écran
+"""
+
+import json
+import math
+import os
+import random
+import shutil
+import threading
+import time
+import wave
+from array import array
+from collections import deque
+from PIL import Image
+from oled_renderer import SH1106_COLUMN_OFFSET
+from config import (
+    BASE_DIR, BUTTON_GPIO, HOOK_GPIO, SIMULATION_DIR, SIMULATION_USB_PATH, SIMULATION_AUDIO_OUT,
+    SIMULATION_MIC_FILE, SIMULATION_FRAMES_DIR, SIMULATION_MAX_FRAMES, SIMULATION_PULSE_LOW,
+    SIMULATION_PULSE_HIGH, SIMULATION_DIGIT_PAUSE, SIMULATION_SHUTDOWN_HOLD, SIMULATION_READY_TIMEOUT,
+    PYGAME_FREQUENCY, PYGAME_CHANNELS, PYGAME_SIZE, SPECIAL_NUMBERS_DIR
+)
+
+SHUTDOWN_BUTTON_GPIO = 26  # Bouton d'arrêt (PhoneController.shutdown_button_gpio)
+
+
+class SimulatedGPIO:
+    """Remplaçant de RPi.GPIO: niveaux en mémoire, fronts et anti-rebond comme la bibliothèque"""
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.levels = {}  # GPIO -> niveau actuel
+        self.directions = {}  # GPIO -> IN/OUT
+        self.detections = {}  # GPIO -> [front, callback, anti-rebond (s), dernier front accepté]
+        self.outputs = deque(maxlen=1000)  # (horodatage, GPIO, niveau) des écritures en sortie
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, enabled):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self.lock:
+            self.directions[pin] = direction
+            if direction == self.OUT:
+                self.levels[pin] = self.LOW if initial is None else initial
+            elif pin not in self.levels:
+                # Entrée au repos: niveau imposé par la résistance de tirage
+                self.levels[pin] = self.LOW if pull_up_down == self.PUD_DOWN else self.HIGH
+
+    def input(self, pin):
+        with self.lock:
+            if pin not in self.directions:
+                raise RuntimeError(f"GPIO {pin} non configuré")
+            return self.levels.get(pin, self.HIGH)
+
+    def output(self, pin, value):
+        with self.lock:
+            if self.directions.get(pin) != self.OUT:
+                raise RuntimeError(f"GPIO {pin} n'est pas configuré en sortie")
+            self.levels[pin] = self.HIGH if value else self.LOW
+            self.outputs.append((time.monotonic(), pin, self.levels[pin]))
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self.lock:
+            if pin in self.detections:
+                raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+            self.detections[pin] = [edge, callback, (bouncetime or 0) / 1000.0, None]
+            self.lock.notify_all()
+
+    def remove_event_detect(self, pin):
+        with self.lock:
+            self.detections.pop(pin, None)
+
+    def cleanup(self):
+        with self.lock:
+            self.detections.clear()
+            self.directions.clear()
+
+    # --- Côté scénario ----------------------------------------------------
+
+    def set_input(self, pin, level):
+        """Impose le niveau d'une entrée (contact du combiné, du cadran...) et déclenche son front"""
+        now = time.monotonic()
+        with self.lock:
+            previous = self.levels.get(pin, self.HIGH)
+            self.levels[pin] = level
+            detection = self.detections.get(pin)
+            if previous == level or detection is None:
+                return
+            edge, callback, bouncetime, last_edge = detection
+            rising = level == self.HIGH
+            if (edge == self.RISING and not rising) or (edge == self.FALLING and rising):
+                return
+            if last_edge is not None and now - last_edge < bouncetime:
+                return
+            detection[3] = now
+        # Comme RPi.GPIO: callback appelé hors verrou, depuis un autre thread que la boucle asyncio
+        if callback:
+            callback(pin)
+
+    def wait_for_detection(self, pin, timeout):
+        """Attend qu'une détection de fronts soit branchée sur pin; retourne False à l'expiration"""
+        with self.lock:
+            return self.lock.wait_for(lambda: pin in self.detections, timeout)
+
+
+# Instance utilisée à la place du module RPi.GPIO (gpio_manager)
+simulated_gpio = SimulatedGPIO()
+
+
+class MemoryOLED:
+    """
+    Écran SH1106 en mémoire: reçoit les mêmes commandes I2C que luma (page, colonne, données)
+    dans une RAM de 132 colonnes x 8 pages; chaque image terminée est gardée (record_frame)
+    """
+
+    RAM_COLUMNS = 132
+
+    def __init__(self, width=128, height=64, max_frames=SIMULATION_MAX_FRAMES):
+        self.width = width
+        self.height = height
+        self.mode = "1"
+        self.size = (width, height)
+        self.ram = [bytearray(self.RAM_COLUMNS) for _ in range(height // 8)]
+        self.page = 0
+        self.column = 0
+        self.frames = deque(maxlen=max_frames)  # (horodatage, image)
+        self.frame_count = 0
+        self.lock = threading.Lock()
+
+    def preprocess(self, image):
+        return image
+
+    def command(self, *commands):
+        for value in commands:
+            if 0xB0 <= value <= 0xB7:
+                self.page = value - 0xB0
+            elif value <= 0x0F:
+                self.column = (self.column & 0xF0) | value
+            elif 0x10 <= value <= 0x1F:
+                self.column = (self.column & 0x0F) | ((value & 0x0F) << 4)
+
+    def data(self, values):
+        row = self.ram[self.page]
+        for value in values:
+            if self.column < self.RAM_COLUMNS:
+                row[self.column] = value
+            self.column += 1
+
+    def get_image(self):
+        """Image actuellement en RAM (ce que l'écran affiche)"""
+        image = Image.new("1", self.size)
+        pixels = image.load()
+        for page, row in enumerate(self.ram):
+            for x in range(self.width):
+                value = row[x + SH1106_COLUMN_OFFSET]
+                for bit in range(8):
+                    if value >> bit & 1:
+                        pixels[x, page * 8 + bit] = 255
+        return image
+
+    def record_frame(self):
+        """Appelé par le rendu différentiel après chaque image envoyée"""
+        with self.lock:
+            self.frame_count += 1
+            self.frames.append((time.monotonic(), self.get_image()))
+
+    def save_frames(self, directory):
+        """Écrit les images gardées en PNG (numéro_millisecondes.png); retourne leur nombre"""
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".png"):
+                os.remove(os.path.join(directory, name))
+        with self.lock:
+            frames = list(self.frames)
+        if not frames:
+            return 0
+        origin = frames[0][0]
+        first_number = self.frame_count - len(frames) + 1
+        for index, (timestamp, image) in enumerate(frames):
+            image.save(os.path.join(directory, f"{first_number + index:04d}_{int((timestamp - origin) * 1000):07d}.png"))
+        return len(frames)
+
+
+class ScenarioPlayer:
+    """
+    Rejoue un scénario sur les GPIO simulés, une étape après l'autre:
+    {"action": "decroche"}, {"action": "compose", "numero": "1972"}, {"action": "attente", "secondes": 5},
+    {"action": "raccroche"}, {"action": "arret"} (appui long sur le bouton d'arrêt)
+    """
+
+    def __init__(self, steps, gpio=simulated_gpio):
+        self.steps = steps
+        self.gpio = gpio
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.finished = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="timevox-scenario", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            # Le scénario commence quand le contrôleur écoute le combiné (téléphone prêt)
+            if not self.gpio.wait_for_detection(HOOK_GPIO, SIMULATION_READY_TIMEOUT):
+                print("❌ Simulation: le contrôleur n'écoute pas le combiné - scénario abandonné")
+                return
+            for number, step in enumerate(self.steps, 1):
+                if self.stop_event.is_set():
+                    return
+                print(f"🎬 Étape {number}/{len(self.steps)}: {json.dumps(step, ensure_ascii=False)}")
+                self.play_step(step)
+            print("🎬 Scénario terminé")
+        except Exception as e:
+            print(f"Erreur scénario: {e}")
+        finally:
+            self.finished.set()
+
+    def play_step(self, step):
+        action = step.get("action")
+        if action == "decroche":
+            self.gpio.set_input(HOOK_GPIO, SimulatedGPIO.LOW)
+        elif action == "raccroche":
+            self.gpio.set_input(HOOK_GPIO, SimulatedGPIO.HIGH)
+        elif action == "compose":
+            for digit in str(step["numero"]):
+                self.dial_digit(digit)
+        elif action == "attente":
+            self.stop_event.wait(float(step.get("secondes", 1)))
+        elif action == "arret":
+            self.gpio.set_input(SHUTDOWN_BUTTON_GPIO, SimulatedGPIO.LOW)
+            self.stop_event.wait(float(step.get("secondes", SIMULATION_SHUTDOWN_HOLD)))
+            self.gpio.set_input(SHUTDOWN_BUTTON_GPIO, SimulatedGPIO.HIGH)
+        else:
+            print(f"⚠️ Étape de scénario inconnue: {action}")
+
+    def dial_digit(self, digit):
+        """Train d'impulsions d'un chiffre (0 = 10 impulsions) puis retour du cadran"""
+        pulses = 10 if digit == "0" else int(digit)
+        for _ in range(pulses):
+            self.gpio.set_input(BUTTON_GPIO, SimulatedGPIO.LOW)
+            time.sleep(SIMULATION_PULSE_LOW)
+            self.gpio.set_input(BUTTON_GPIO, SimulatedGPIO.HIGH)
+            time.sleep(SIMULATION_PULSE_HIGH)
+        self.stop_event.wait(SIMULATION_DIGIT_PAUSE)
+
+
+def get_default_scenario(numero):
+    """Un appel complet: décroché, numéro principal, message, raccroché, puis arrêt"""
+    return [
+        {"action": "attente", "secondes": 1},
+        {"action": "decroche"},
+        {"action": "attente", "secondes": 1},
+        {"action": "compose", "numero": numero},
+        {"action": "attente", "secondes": 30},  # Tonalité et annonce (~22 s), bip, puis ~8 s de message
+        {"action": "raccroche"},
+        {"action": "attente", "secondes": 5},
+        {"action": "arret"},
+    ]
+
+
+def load_scenario(path):
+    """Lit un scénario JSON: liste d'étapes, ou {"etapes": [...]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    return scenario["etapes"] if isinstance(scenario, dict) else scenario
+
+
+def write_test_microphone(path, sample_rate=16000):
+    """Micro simulé par défaut: 1 s de bruit de fond, 3 s de 'parole' (tonalité modulée), 1 s de bruit"""
+    rng = random.Random(0)
+    samples = array("h")
+    for i in range(sample_rate * 5):
+        t = i / sample_rate
+        value = rng.uniform(-30, 30)
+        if 1.0 <= t < 4.0:
+            # Syllabes à 3 Hz autour de -15 dBFS
+            value += 6000 * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * t)) * math.sin(2 * math.pi * 220 * t)
+        samples.append(int(value))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def prepare_simulation_dir():
+    """Crée la clé USB simulée (annonces et config.json du dépôt) et le micro simulé"""
+    repo_dir = os.path.dirname(BASE_DIR)
+    for dir_name in ["Annonce", "Messages", "Parametres", "Logs", SPECIAL_NUMBERS_DIR]:
+        os.makedirs(os.path.join(SIMULATION_USB_PATH, dir_name), exist_ok=True)
+
+    # Fichiers par défaut du dépôt (ceux que la vraie clé télécharge depuis GitHub)
+    copies = [
+        (os.path.join(repo_dir, "config.json"), os.path.join(SIMULATION_USB_PATH, "Parametres")),
+        (os.path.join(repo_dir, "annonce"), os.path.join(SIMULATION_USB_PATH, "Annonce")),
+        (os.path.join(repo_dir, "annonces_speciaux"), os.path.join(SIMULATION_USB_PATH, SPECIAL_NUMBERS_DIR)),
+    ]
+    for source, destination in copies:
+        files = [source] if os.path.isfile(source) else (
+            [os.path.join(source, name) for name in sorted(os.listdir(source))] if os.path.isdir(source) else [])
+        for file_path in files:
+            target = os.path.join(destination, os.path.basename(file_path))
+            if not os.path.exists(target):
+                shutil.copy2(file_path, target)
+
+    if not os.path.exists(SIMULATION_MIC_FILE):
+        write_test_microphone(SIMULATION_MIC_FILE)
+        print(f"🎙️ Micro simulé créé: {SIMULATION_MIC_FILE}")
+
+
+def run_simulation(scenario_file=None):
+    """Lance le contrôleur complet sur les périphériques simulés et rejoue le scénario; retourne un résumé"""
+    prepare_simulation_dir()
+    if os.path.exists(SIMULATION_AUDIO_OUT):
+        os.remove(SIMULATION_AUDIO_OUT)
+
+    from phone_controller import PhoneController
+    import oled_display
+    from call_tracer import call_tracer
+
+    controller = PhoneController()
+    steps = load_scenario(scenario_file) if scenario_file else get_default_scenario(
+        controller.usb_manager.get_numero_principal())
+    player = ScenarioPlayer(steps)
+    player.start()
+    start = time.monotonic()
+    try:
+        controller.run()
+    finally:
+        player.stop()
+
+    # Résumé: images de l'écran, audio produit, messages et latences mesurées
+    frames = oled_display.device.save_frames(SIMULATION_FRAMES_DIR)
+    audio_bytes = os.path.getsize(SIMULATION_AUDIO_OUT) if os.path.exists(SIMULATION_AUDIO_OUT) else 0
+    messages = []
+    for root, _, files in os.walk(os.path.join(SIMULATION_USB_PATH, "Messages")):
+        messages += [name for name in files if name.endswith(".mp3") and not name.endswith("_original.mp3")]
+    summary = {
+        "duree": round(time.monotonic() - start, 1),
+        "scenario_termine": player.finished.is_set(),
+        "images_ecran": frames,
+        "ecran": oled_display.stats_affichage(),
+        "audio_secondes": round(audio_bytes / (PYGAME_FREQUENCY * PYGAME_CHANNELS * abs(PYGAME_SIZE) // 8), 1),
+        "messages": len(messages),
+        "latences": {name: {"p50": p50, "p95": p95} for name, (p50, p95, _) in call_tracer.get_percentiles().items()},
+    }
+    print("=== RÉSUMÉ SIMULATION ===")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"Fichiers: {SIMULATION_DIR}")
+    return summary
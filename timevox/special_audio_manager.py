@@ -5,7 +5,7 @@ Gere les numeros 12, 13, 14, 17 et 18
 """
 
 import os
-import pygame
+import time
 from config import (
     get_special_audio_file_path, 
     is_special_audio_number,
@@ -13,6 +13,9 @@ from config import (
     MSG_PLAYING_AUDIO,
     MSG_CALL_ENDED
 )
+from lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
 
 class SpecialAudioManager:
     def __init__(self, gpio_manager, display_manager, usb_manager, audio_manager):
@@ -94,13 +97,13 @@ class SpecialAudioManager:
     def display_error_and_hangup(self, line1, line2):
         """Affiche un message d'erreur puis le message d'appel termine"""
         self.display_manager.show_message(line1, line2, "", size=12)
-        pygame.time.wait(2000)  # Attendre 2 secondes
+        time.sleep(2)  # Attendre 2 secondes
         self.display_call_ended()
     
     def display_call_ended(self):
         """Affiche le message d'appel termine"""
         self.display_manager.show_message(MSG_CALL_ENDED, "", "", size=14)
-        pygame.time.wait(2000)  # Attendre 2 secondes avant de nettoyer l'affichage
+        time.sleep(2)  # Attendre 2 secondes avant de nettoyer l'affichage
     
     def check_special_numbers_availability(self):
         """
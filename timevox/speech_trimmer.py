@@ -0,0 +1,161 @@
+# speech_trimmer.py
+"""
+Détection de la parole sur le PCM brut pour couper le début et la fin des messages
+Le niveau de chaque trame de VAD_FRAME_MS est calculé au fil de la capture (aucun décodage).
+Au raccrochage, début et fin sont calculés sur toutes les trames, la fin en ignorant les
+dernières (choc du combiné reposé sur sa fourche). Pour le rendu en continu seulement, le début
+est fixé dès qu'il est détecté, avec un bruit de fond estimé au fil de l'eau (histogramme).
+Les points de coupe remplacent le retrait aveugle de AUDIO_CUT_DURATION.
+"""
+
+import wave
+import numpy as np
+from config import (
+    VAD_FRAME_MS, VAD_MARGIN_DB, VAD_MIN_LEVEL_DB, VAD_MIN_SPEECH_MS,
+    VAD_PADDING_MS, VAD_HANGUP_GUARD_MS
+)
+
+PCM_FULL_SCALE = 32768.0
+SILENCE_DB = -96.0
+NOISE_HISTOGRAM_STEP_DB = 0.1  # Résolution du bruit de fond estimé au fil de la capture
+NOISE_PERCENTILE = 10
+
+
+class SpeechTrimmer:
+    def __init__(self):
+        self.min_speech_frames = max(1, int(round(VAD_MIN_SPEECH_MS / VAD_FRAME_MS)))
+        self.padding_frames = int(round(VAD_PADDING_MS / VAD_FRAME_MS))
+        self.guard_frames = int(round(VAD_HANGUP_GUARD_MS / VAD_FRAME_MS))
+        self.sample_rate = None
+        self.frame_samples = 1
+
+        self.pending = b""
+        self.levels = []  # Niveau (dBFS) de chaque trame complète
+        self.total_samples = 0
+        self.lock_start = False
+        self.speech_start = None  # Début de parole (secondes, marge comprise), fixé une fois détecté
+
+        # Bruit de fond au fil de la capture: histogramme des niveaux, mis à jour par trame
+        self.noise_histogram = np.zeros(int(-SILENCE_DB / NOISE_HISTOGRAM_STEP_DB) + 1, dtype=np.int64)
+        self.run_begin = 0  # Première trame du passage au-dessus du seuil en cours
+        self.run_length = 0
+
+    def start(self, sample_rate, lock_start=False):
+        """
+        Débit connu au démarrage du flux de capture
+        lock_start: le début de parole est fixé dès sa détection (rendu en continu, qui démarre à cet endroit)
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+        self.lock_start = lock_start
+
+    def feed(self, pcm):
+        """Ajoute des octets PCM 16 bits mono; retourne le début de parole s'il est connu"""
+        data = self.pending + pcm
+        frame_bytes = self.frame_samples * 2
+        usable = len(data) - len(data) % frame_bytes
+        self.pending = data[usable:]
+        self.total_samples += len(pcm) // 2
+        if usable:
+            samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float64)
+            rms = np.sqrt(np.mean(samples.reshape(-1, self.frame_samples) ** 2, axis=1))
+            levels = 20 * np.log10(np.maximum(rms, 1.0) / PCM_FULL_SCALE)
+            first_frame = len(self.levels)
+            self.levels.extend(levels.tolist())
+            if self.lock_start and self.speech_start is None:
+                self.scan_speech_start(levels, first_frame)
+        return self.speech_start
+
+    def get_threshold(self, levels):
+        """Seuil de parole: bruit de fond (10e centile des trames) + VAD_MARGIN_DB"""
+        noise_floor = float(np.percentile(levels, NOISE_PERCENTILE)) if len(levels) else SILENCE_DB
+        return max(noise_floor + VAD_MARGIN_DB, VAD_MIN_LEVEL_DB)
+
+    def get_running_threshold(self):
+        """Seuil de parole d'après l'histogramme des niveaux reçus (sans retrier toutes les trames)"""
+        counts = np.cumsum(self.noise_histogram)
+        index = int(np.searchsorted(counts, counts[-1] * NOISE_PERCENTILE / 100.0))
+        noise_floor = SILENCE_DB + index * NOISE_HISTOGRAM_STEP_DB
+        return max(noise_floor + VAD_MARGIN_DB, VAD_MIN_LEVEL_DB)
+
+    def scan_speech_start(self, levels, first_frame):
+        """Rendu en continu: cherche le début de parole dans les seules nouvelles trames"""
+        bins = np.round((levels - SILENCE_DB) / NOISE_HISTOGRAM_STEP_DB).astype(np.int64)
+        self.noise_histogram += np.bincount(np.clip(bins, 0, len(self.noise_histogram) - 1),
+                                            minlength=len(self.noise_histogram))
+        threshold = self.get_running_threshold()
+        for offset, level in enumerate(levels):
+            if level <= threshold:
+                self.run_length = 0
+                continue
+            if self.run_length == 0:
+                self.run_begin = first_frame + offset
+            self.run_length += 1
+            if self.run_length >= self.min_speech_frames:
+                self.speech_start = self.frames_to_seconds(max(0, self.run_begin - self.padding_frames))
+                return
+
+    def find_speech_runs(self, levels):
+        """Retourne les (début, fin) en trames des passages au-dessus du seuil assez longs pour être de la parole"""
+        if len(levels) < self.min_speech_frames:
+            return []
+        active = np.asarray(levels) > self.get_threshold(levels)
+        # Fronts montants/descendants du masque de parole
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return [(start, end) for start, end in zip(starts, ends) if end - start >= self.min_speech_frames]
+
+    def frames_to_seconds(self, frames):
+        return float(frames * self.frame_samples / self.sample_rate)
+
+    def get_cut_points(self, hung_up=True):
+        """
+        Retourne (début, fin) de la parole en secondes depuis le début de la capture,
+        ou None si aucune parole n'a été détectée (l'appelant garde alors la coupe par défaut)
+        hung_up: le message s'est terminé par un raccrochage, dont le bruit est ignoré
+        """
+        levels = self.levels
+        if hung_up and self.guard_frames:
+            levels = levels[:max(0, len(levels) - self.guard_frames)]
+        runs = self.find_speech_runs(levels)
+        if not runs:
+            return None
+        if not self.lock_start or self.speech_start is None:
+            # Bruit de fond estimé sur toute la capture; un début déjà fixé est gardé car le rendu
+            # en continu a commencé à cet endroit
+            self.speech_start = self.frames_to_seconds(max(0, runs[0][0] - self.padding_frames))
+
+        end = self.frames_to_seconds(min(len(levels), runs[-1][1] + self.padding_frames))
+        if end <= self.speech_start:
+            return None
+        return self.speech_start, end
+
+    def get_duration(self):
+        return self.total_samples / self.sample_rate
+
+
+def analyze_wav(wav_file, hung_up=True, block_frames=65536):
+    """
+    Points de coupe de parole d'une capture WAV 16 bits (lecture directe du PCM, sans décodage)
+    Retourne (début, fin, durée) en secondes, ou None si aucune parole n'est détectée
+    """
+    with wave.open(wav_file, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            return None
+        channels = wav.getnchannels()
+        trimmer = SpeechTrimmer()
+        trimmer.start(wav.getframerate())
+        while True:
+            data = wav.readframes(block_frames)
+            if not data:
+                break
+            if channels > 1:
+                samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels).mean(axis=1)
+                data = samples.astype("<i2").tobytes()
+            trimmer.feed(data)
+
+    cuts = trimmer.get_cut_points(hung_up)
+    if cuts is None:
+        return None
+    return cuts[0], cuts[1], trimmer.get_duration()
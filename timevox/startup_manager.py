@@ -0,0 +1,97 @@
+# startup_manager.py
+"""
+Démarrage par étapes de TimeVox
+Chaque étape lance ses sous-systèmes indépendants en parallèle et les chronomètre;
+les tâches réseau (téléchargements, NTP, mises à jour) tournent en arrière-plan
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import STARTUP_TIME_BUDGET
+
+
+class StartupManager:
+    def __init__(self, budget=STARTUP_TIME_BUDGET):
+        self.budget = budget  # Secondes visées entre le lancement et l'état prêt
+        self.start_time = time.monotonic()
+        self.ready_time = None
+        self.timings = []  # (nom, durée en secondes) des étapes et tâches
+        self.lock = threading.Lock()
+
+    def elapsed(self):
+        """Secondes écoulées depuis le début du démarrage"""
+        return time.monotonic() - self.start_time
+
+    def record_timing(self, name, duration):
+        with self.lock:
+            self.timings.append((name, duration))
+
+    def run_task(self, name, func):
+        """Exécute une tâche en la chronométrant"""
+        start = time.monotonic()
+        try:
+            return func()
+        finally:
+            duration = time.monotonic() - start
+            self.record_timing(name, duration)
+            print(f"⏱️ {name}: {duration:.2f}s")
+
+    def run_stage(self, stage_name, tasks):
+        """
+        Lance les tâches d'une étape en parallèle et attend qu'elles soient toutes terminées
+        tasks: dictionnaire nom -> fonction sans argument; retourne les résultats par nom
+        La première erreur est relancée une fois l'étape terminée
+        """
+        print(f"🚀 Étape '{stage_name}' ({', '.join(tasks)})")
+        stage_start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="timevox-startup") as pool:
+            futures = {
+                name: pool.submit(self.run_task, f"{stage_name}/{name}", func)
+                for name, func in tasks.items()
+            }
+            results = {}
+            error = None
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"❌ Erreur démarrage {stage_name}/{name}: {e}")
+                    error = error or e
+
+        duration = time.monotonic() - stage_start
+        self.record_timing(stage_name, duration)
+        print(f"⏱️ Étape '{stage_name}' terminée en {duration:.2f}s")
+
+        if error:
+            raise error
+        return results
+
+    def run_in_background(self, name, func):
+        """Lance une tâche non critique dans un thread de fond chronométré"""
+        def runner():
+            try:
+                self.run_task(f"arrière-plan/{name}", func)
+            except Exception as e:
+                print(f"❌ Erreur tâche de fond {name}: {e}")
+
+        thread = threading.Thread(target=runner, name=f"timevox-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_ready(self):
+        """Note l'instant où le téléphone est utilisable et vérifie le budget"""
+        self.ready_time = self.elapsed()
+        if self.ready_time > self.budget:
+            print(f"⚠️ Démarrage en {self.ready_time:.2f}s - budget de {self.budget}s dépassé")
+        else:
+            print(f"✅ Démarrage en {self.ready_time:.2f}s (budget {self.budget}s)")
+        return self.ready_time
+
+    def get_summary(self):
+        """Résumé des durées sur une ligne (pour les logs)"""
+        with self.lock:
+            parts = [f"{name}={duration:.2f}s" for name, duration in self.timings]
+        ready = f"{self.ready_time:.2f}s" if self.ready_time is not None else "N/A"
+        return f"prêt en {ready} (budget {self.budget}s) - " + ", ".join(parts)
@@ -0,0 +1,232 @@
+# stream_renderer.py
+"""
+Rendu des messages pendant l'enregistrement (mode STREAMING_EFFECTS)
+Le PCM capturé traverse la chaîne d'effets numpy bloc par bloc pendant que l'invité parle
+et part directement vers l'encodeur MP3: au raccrochage il ne reste qu'à vider la chaîne
+et terminer l'encodage. La coupe début/fin (AUDIO_CUT_DURATION) est appliquée au vol,
+la fin étant retenue dans une ligne à retard jusqu'au raccrochage. La coupe de début peut
+n'être connue qu'après le démarrage de la capture (fin du bip mesurée): set_trim_start().
+"""
+
+import os
+import queue
+import threading
+from config import DSP_BLOCK_DURATION, POSTPROCESS_NICE
+
+
+class StreamingRenderer:
+    def __init__(self, audio_effects, config, output_file, trim_start=0.0, trim_end=0.0,
+                 nice_level=POSTPROCESS_NICE):
+        self.audio_effects = audio_effects
+        self.config = config
+        self.output_file = output_file
+        self.trim_start = None if trim_start is None else max(0.0, trim_start)
+        self.trim_end = max(0.0, trim_end)
+        self.nice_level = nice_level
+
+        base_name, ext = os.path.splitext(output_file)
+        self.original_file = f"{base_name}_original{ext}"
+
+        self.filter_chain = None
+        if config["enabled"]:
+            self.filter_chain = audio_effects.build_filter_chain(config["type"], config["intensity"])
+        self.keep_original = self.filter_chain is not None and config["keep_original"]
+
+        self.np = None
+        self.dsp = None
+        self.chain = None
+        self.encoder = None
+        self.original_encoder = None
+        self.blocks = queue.Queue()  # Octets PCM reçus de la capture
+        self.thread = None
+        self.error = None
+
+        self.sample_rate = None
+        self.channels = 1
+        self.start_known = threading.Event()  # Coupe de début connue (sinon les blocs attendent)
+        self.block_samples = 0
+        self.skip_samples = 0  # Reste à couper au début
+        self.hold_samples = 0  # Retenus pour la coupe de fin
+        self.samples_received = 0  # Échantillons reçus, coupe de début comprise
+        self.delay = None
+        self.samples_out = 0
+
+    def start(self, sample_rate, channels=1):
+        """Prépare la chaîne d'effets et les encodeurs; retourne False si le mode continu est impossible"""
+        try:
+            # numpy n'est chargé que si le rendu en continu est utilisé
+            import numpy
+            import vintage_dsp
+            self.np = numpy
+            self.dsp = vintage_dsp
+            if self.filter_chain:
+                self.chain = vintage_dsp.DSPChain(self.filter_chain, sample_rate,
+                                                  self.audio_effects.get_dsp_texture(self.config))
+        except Exception as e:
+            print(f"Rendu en continu indisponible: {e}")
+            return False
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_samples = max(1, int(sample_rate * DSP_BLOCK_DURATION))
+        if self.trim_start is not None:
+            self.set_trim_start(self.trim_start)
+        self.hold_samples = int(round(self.trim_end * sample_rate))
+        self.delay = numpy.zeros(0)
+
+        nice_prefix = [] if self.nice_level is None else ["nice", "-n", str(self.nice_level)]
+        output_rate = self.chain.output_rate if self.chain else sample_rate
+        try:
+            self.encoder = self.audio_effects.start_pcm_encoder(output_rate, self.output_file, nice_prefix)
+            if self.keep_original:
+                self.original_encoder = self.audio_effects.start_pcm_encoder(sample_rate, self.original_file,
+                                                                             nice_prefix)
+        except Exception as e:
+            print(f"Erreur démarrage encodeur: {e}")
+            self.abort()
+            return False
+
+        self.thread = threading.Thread(target=self.process_loop, name="timevox-stream-render", daemon=True)
+        self.thread.start()
+        print(f"🎛️ Rendu en continu: {self.config['type'] if self.chain else 'sans effet'} "
+              f"({sample_rate} Hz, blocs de {DSP_BLOCK_DURATION:.1f}s)")
+        return True
+
+    def set_trim_start(self, seconds):
+        """Fixe la coupe de début (secondes depuis le début de la capture) et libère le traitement"""
+        if self.start_known.is_set():
+            return
+        self.trim_start = max(0.0, seconds)
+        if self.sample_rate:
+            self.skip_samples = int(round(self.trim_start * self.sample_rate))
+        self.start_known.set()
+
+    def feed(self, pcm):
+        """Transmet des octets PCM capturés (appel non bloquant depuis le lecteur de capture)"""
+        self.blocks.put(pcm)
+
+    def process_loop(self):
+        try:
+            # Même priorité basse que le post-traitement: la capture reste prioritaire
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), POSTPROCESS_NICE)
+        except (AttributeError, OSError):
+            pass
+
+        frame_bytes = 2 * self.channels
+        block_bytes = self.block_samples * frame_bytes
+        pending = bytearray()
+        while True:
+            data = self.blocks.get()
+            if data is not None:
+                pending += data
+            # Blocs complets pendant la capture, puis le reste à la fin
+            while len(pending) >= block_bytes or (data is None and len(pending) >= frame_bytes):
+                size = min(len(pending), block_bytes)
+                size -= size % frame_bytes
+                samples = self.np.frombuffer(bytes(pending[:size]), dtype="<i2")
+                del pending[:size]
+                if self.channels > 1:
+                    samples = samples.reshape(-1, self.channels).mean(axis=1)
+                if self.error is None:
+                    try:
+                        self.push(samples / self.dsp.PCM_SCALE)
+                    except Exception as e:
+                        self.error = e
+                        print(f"❌ Erreur rendu en continu: {e}")
+            if data is None:
+                return
+
+    def push(self, samples):
+        """Coupe le début, retient la fin, et envoie le reste dans la chaîne"""
+        self.start_known.wait()
+        self.samples_received += len(samples)
+        if self.skip_samples:
+            skipped = min(self.skip_samples, len(samples))
+            samples = samples[skipped:]
+            self.skip_samples -= skipped
+
+        delay = self.np.concatenate((self.delay, samples))
+        ready = max(0, len(delay) - self.hold_samples)
+        self.delay = delay[ready:]
+        if ready:
+            self.encode(delay[:ready])
+
+    def encode(self, samples):
+        self.samples_out += len(samples)
+        if self.original_encoder:
+            self.original_encoder.stdin.write(self.dsp.to_pcm16(samples))
+        output = self.chain.process(samples) if self.chain else samples
+        if len(output):
+            self.encoder.stdin.write(self.dsp.to_pcm16(output))
+
+    def finish(self, trim_end=None):
+        """
+        Termine le rendu après la fin de la capture (vidage de la chaîne + fin d'encodage)
+        trim_end: coupe de fin mesurée (secondes); seule la partie encore dans la ligne à retard
+        peut être rendue, une coupe plus longue s'arrête à trim_end du constructeur
+        Retourne le fichier final, ou None si le message doit être rendu par la file de post-traitement
+        """
+        if self.thread is None:
+            return None
+        self.set_trim_start(0.0)  # Sans effet si la coupe a déjà été fixée
+        self.blocks.put(None)
+        self.thread.join()
+
+        if self.error is None and trim_end is not None:
+            # Fin de parole dans la ligne à retard: on en garde le début
+            delay_start = self.samples_received - len(self.delay)
+            keep = self.samples_received - int(round(trim_end * self.sample_rate)) - delay_start
+            keep = min(len(self.delay), keep)
+            if keep > 0:
+                try:
+                    self.encode(self.delay[:keep])
+                except Exception as e:
+                    self.error = e
+
+        if self.error is None and self.samples_out == 0:
+            self.error = ValueError("message trop court pour la coupe")
+        if self.error is None:
+            try:
+                # La ligne à retard (fin du message) est abandonnée: c'est la coupe de fin
+                tail = self.chain.flush() if self.chain else []
+                if len(tail):
+                    self.encoder.stdin.write(self.dsp.to_pcm16(tail))
+                for encoder in (self.encoder, self.original_encoder):
+                    if encoder:
+                        _, stderr = encoder.communicate(timeout=60)
+                        if encoder.returncode != 0:
+                            raise RuntimeError(f"encodeur ffmpeg: {stderr.decode(errors='replace')}")
+            except Exception as e:
+                self.error = e
+
+        if self.error is not None or not os.path.exists(self.output_file) or os.path.getsize(self.output_file) == 0:
+            print(f"Rendu en continu abandonné: {self.error}")
+            self.abort()
+            return None
+
+        if self.keep_original:
+            print(f"Original sauvegardé: {self.original_file}")
+        print(f"✅ Message final (rendu en continu): {self.output_file}")
+        return self.output_file
+
+    def cancel(self):
+        """Abandonne le rendu (capture en échec)"""
+        if self.thread is not None:
+            self.error = self.error or ValueError("capture abandonnée")
+            self.start_known.set()
+            self.blocks.put(None)
+            self.thread.join()
+        self.abort()
+
+    def abort(self):
+        """Arrête les encodeurs et supprime les fichiers partiels"""
+        for encoder in (self.encoder, self.original_encoder):
+            if encoder and encoder.poll() is None:
+                encoder.kill()
+                encoder.wait()
+        for path in (self.output_file, self.original_file if self.keep_original else None):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -6,13 +6,16 @@ Vérifie, télécharge et installe les mises à jour depuis GitHub
 
 import json
 import os
-import requests
 import subprocess
 import tempfile
 import shutil
 import time
 from datetime import datetime
 from config import BASE_DIR
+from lazy_import import lazy_import
+
+# requests n'est utile que pour les vérifications/téléchargements de mises à jour
+requests = lazy_import("requests")
 
 
 class UpdateManager:
@@ -278,6 +281,7 @@ class UpdateManager:
                     
                     with open(user_config_path, 'w', encoding='utf-8') as f:
                         json.dump(merged_config, f, indent=2, ensure_ascii=False)
+                    self.usb_manager.refresh_config()
                     
                     print("Configuration fusionnée et sauvegardée sur clé USB")
                     
@@ -288,6 +292,7 @@ class UpdateManager:
                     
                     with open(user_config_path, 'w', encoding='utf-8') as f:
                         json.dump(new_config_template, f, indent=2, ensure_ascii=False)
+                    self.usb_manager.refresh_config()
                     
                     print("Template de configuration installé sur clé USB")
                 else:
@@ -0,0 +1,140 @@
+# usb_logger.py
+"""
+Journaux de la clé USB (dossier Logs/) écrits par un seul thread de fond
+Les appels de log ne font que ranger la ligne dans une file en mémoire: le thread
+d'écriture regroupe les lignes et les écrit par lots (au plus toutes les LOG_FLUSH_INTERVAL
+secondes, ou dès LOG_FLUSH_BYTES en attente), une ouverture de fichier par lot au lieu
+d'une par ligne. Rotation par taille (fichier.1, fichier.2...) et fsync à l'arrêt.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from config import LOG_FLUSH_INTERVAL, LOG_FLUSH_BYTES, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_QUEUE_SIZE
+
+_FLUSH = object()  # Demande d'écriture immédiate (flush/close)
+
+
+class USBLogger:
+    def __init__(self, get_log_dir):
+        """get_log_dir(): dossier Logs/ de la clé, None si elle est absente (lignes abandonnées)"""
+        self.get_log_dir = get_log_dir
+        self.entries = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0  # Lignes perdues file pleine
+        self.thread = None
+        self.closed = False
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.writer_loop, name="timevox-logs", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def log(self, file_name, line):
+        """Ajoute une ligne à Logs/file_name sans attendre l'écriture"""
+        if self.closed:
+            return
+        if self.thread is None:
+            self.start()
+        try:
+            self.entries.put_nowait((file_name, line if line.endswith("\n") else f"{line}\n"))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5, sync=False):
+        """Écrit tout ce qui est en attente; retourne False si l'écriture n'a pas abouti à temps"""
+        if self.thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self.entries.put((_FLUSH, (sync, done)), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self):
+        """Écriture finale avec fsync (arrêt du téléphone)"""
+        if self.closed:
+            return
+        if not self.flush(sync=True):
+            print("⚠️ Journaux USB: écriture finale incomplète")
+        self.closed = True
+
+    # --- Thread d'écriture ------------------------------------------------
+
+    def writer_loop(self):
+        pending = {}  # Nom de fichier -> lignes
+        pending_bytes = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                file_name, line = self.entries.get(timeout=timeout)
+            except queue.Empty:
+                file_name = None
+
+            sync, done = False, None
+            if file_name is _FLUSH:
+                sync, done = line
+            elif file_name is not None:
+                pending.setdefault(file_name, []).append(line)
+                pending_bytes += len(line)
+                if deadline is None:
+                    deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+                if pending_bytes < LOG_FLUSH_BYTES and time.monotonic() < deadline:
+                    continue
+
+            if pending or sync:
+                self.write_batch(pending, sync)
+            pending = {}
+            pending_bytes = 0
+            deadline = None
+            if done is not None:
+                done.set()
+
+    def write_batch(self, pending, sync):
+        log_dir = self.get_log_dir()
+        if not log_dir:
+            return
+        if self.dropped:
+            pending.setdefault("timevox.log", []).append(
+                f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {self.dropped} ligne(s) de journal perdue(s) (file pleine)\n")
+            self.dropped = 0
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Erreur dossier Logs: {e}")
+            return
+
+        for file_name, lines in pending.items():
+            data = "".join(lines).encode("utf-8")
+            log_file = os.path.join(log_dir, file_name)
+            try:
+                self.rotate(log_file, len(data))
+                with open(log_file, "ab") as f:
+                    f.write(data)
+                    if sync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Erreur écriture journal {file_name}: {e}")
+
+    def rotate(self, log_file, incoming):
+        """Décale fichier -> fichier.1 -> fichier.2... quand LOG_MAX_BYTES serait dépassé"""
+        try:
+            size = os.path.getsize(log_file)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= LOG_MAX_BYTES:
+            return
+        for index in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            older = f"{log_file}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{log_file}.{index + 1}")
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(log_file, f"{log_file}.1")
+        else:
+            os.remove(log_file)
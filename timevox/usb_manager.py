@@ -6,36 +6,47 @@ Version avec montage automatique et point de montage fixe
 
 import os
 import json
-import random
 import subprocess
 from datetime import datetime
-from config import RECORD_DURATION
-import requests
+from config import USB_MOUNT_PATH, SIMULATION
+from config_store import ConfigStore
+from message_catalog import MessageCatalog
+from announce_index import AnnounceIndex
+from usb_logger import USBLogger
 
 
 class USBManager:
-    def __init__(self, rtc_manager=None):
+    def __init__(self, rtc_manager=None, download_audio=True):
         self.rtc_manager = rtc_manager  # Gestionnaire RTC optionnel
+        # False: le téléchargement des fichiers audio manquants est lancé à part (arrière-plan)
+        self.download_audio = download_audio
         
         # Point de montage fixe pour TimeVox
-        self.usb_mount_point = "/media/timevox/usb"
+        self.usb_mount_point = USB_MOUNT_PATH
         self.usb_path = None
         
-        # Configuration par défaut
-        self.numero_principal = "1234567890"  # Valeur par défaut (10 chiffres)
-        self.longueur_numero_principal = 10  # Valeur par défaut
-        self.duree_enregistrement = RECORD_DURATION  # Valeur par défaut
-        self.volume_audio = 2  # Valeur par défaut en pourcentage (2%)
+        # Configuration typée en mémoire (valeurs par défaut tant que config.json n'est pas lu)
+        self.config_store = ConfigStore()
+        
+        # Catalogue SQLite des messages de la clé (ouvert à la première utilisation)
+        self.message_catalog = None
+        
+        # Index des annonces (dossier listé une fois, puis surveillé)
+        self.announce_index = None
+        
+        # Journaux Logs/ écrits par lots en arrière-plan
+        self.usb_logger = USBLogger(self.get_log_dir)
         
         # Détection et configuration
         self.detect_usb_drive()
         self.load_config()
+        self.get_announce_index()
     
     def detect_usb_drive(self):
         """Détecte la clé USB au point de montage fixe"""
         try:
             # Vérifier si le point de montage existe et est monté
-            if os.path.exists(self.usb_mount_point) and os.path.ismount(self.usb_mount_point):
+            if os.path.exists(self.usb_mount_point) and self.is_mount_point():
                 # Vérifier la structure TimeVox
                 annonce_dir = os.path.join(self.usb_mount_point, "Annonce")
                 messages_dir = os.path.join(self.usb_mount_point, "Messages")
@@ -44,7 +55,6 @@ class USBManager:
                     print(f"✅ Clé USB TimeVox détectée: {self.usb_mount_point}")
                     self.usb_path = self.usb_mount_point
                     self.ensure_usb_structure()
-                    self.download_missing_audio_files()
                     return self.usb_mount_point
                 else:
                     print(f"⚠️ Clé USB montée mais structure TimeVox incomplète")
@@ -95,7 +105,7 @@ class USBManager:
                             timeout=10
                         )
                         # Vérifier si le montage a réussi
-                        if os.path.ismount(self.usb_mount_point):
+                        if self.is_mount_point():
                             print(f"✅ Montage réussi pour {device}")
                             self.detect_usb_drive()  # Re-détecter
                             break
@@ -125,8 +135,9 @@ class USBManager:
             
             print("✅ Structure USB TimeVox vérifiée")
             
-            # NOUVEAU: Télécharger les fichiers audio manquants après avoir créé la structure
-            self.download_missing_audio_files()
+            # Télécharger les fichiers audio manquants après avoir créé la structure
+            if self.download_audio:
+                self.download_missing_audio_files()
             
             return True
             
@@ -178,36 +189,19 @@ class USBManager:
         self.detect_usb_drive()
         
         if old_path != self.usb_path:
+            self.close_message_catalog()
+            self.close_announce_index()
             if self.usb_path:
                 print(f"🔄 Nouvelle clé USB détectée: {self.usb_path}")
                 self.load_config()  # Recharger la config
             else:
                 print("🔄 Clé USB déconnectée")
     
-    def validate_numero_principal_config(self, numero, longueur):
-        """Valide la cohérence entre le numéro principal et sa longueur déclarée"""
-        numero_str = str(numero)
-        actual_length = len(numero_str)
-        
-        # Vérifier que le numéro ne contient que des chiffres
-        if not numero_str.isdigit():
-            print(f"ERREUR CONFIG: Le numéro principal '{numero}' doit contenir uniquement des chiffres")
-            return False
-        
-        # Vérifier la cohérence de longueur
-        if actual_length != longueur:
-            print(f"ERREUR CONFIG: Le numéro principal '{numero}' fait {actual_length} chiffres")
-            print(f"                mais longueur_numero_principal est configuré à {longueur}")
-            print(f"                Ces valeurs doivent être cohérentes!")
-            return False
-        
-        # Vérifier que la longueur est dans une plage raisonnable
-        if longueur < 4 or longueur > 15:
-            print(f"ERREUR CONFIG: longueur_numero_principal ({longueur}) doit être entre 4 et 15")
-            return False
-        
-        print(f"✅ Configuration numéro principal valide: {numero} ({longueur} chiffres)")
-        return True
+    def get_config_file(self):
+        """Retourne le chemin du fichier config.json de la clé USB (ou None)"""
+        if not self.usb_path:
+            return None
+        return os.path.join(self.usb_path, "Parametres", "config.json")
     
     def load_config(self):
         """Charge la configuration depuis le fichier config.json de la clé USB"""
@@ -215,107 +209,21 @@ class USBManager:
             print("Clé USB non disponible - utilisation des valeurs par défaut")
             return
         
-        config_file = os.path.join(self.usb_path, "Parametres", "config.json")
+        config_file = self.get_config_file()
         
-        try:
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    
-                # Charger le numéro principal et sa longueur
-                numero_config = None
-                longueur_config = None
-                
-                if 'numero_principal' in config_data:
-                    numero_config = str(config_data['numero_principal'])
-                else:
-                    print("Clé 'numero_principal' non trouvée dans config.json")
-                
-                if 'longueur_numero_principal' in config_data:
-                    try:
-                        longueur_config = int(config_data['longueur_numero_principal'])
-                    except (ValueError, TypeError):
-                        print("Valeur longueur_numero_principal invalide (doit être un entier)")
-                        longueur_config = None
-                else:
-                    print("Clé 'longueur_numero_principal' non trouvée dans config.json")
-                
-                # Valider la cohérence si les deux valeurs sont présentes
-                if numero_config is not None and longueur_config is not None:
-                    if self.validate_numero_principal_config(numero_config, longueur_config):
-                        self.numero_principal = numero_config
-                        self.longueur_numero_principal = longueur_config
-                        print(f"Configuration numéro principal chargée: {self.numero_principal} ({self.longueur_numero_principal} chiffres)")
-                    else:
-                        print("Utilisation des valeurs par défaut à cause d'erreurs de configuration")
-                elif numero_config is not None:
-                    # Seulement le numéro est présent, calculer la longueur automatiquement
-                    if numero_config.isdigit():
-                        self.numero_principal = numero_config
-                        self.longueur_numero_principal = len(numero_config)
-                        print(f"Numéro principal chargé: {self.numero_principal}")
-                        print(f"Longueur calculée automatiquement: {self.longueur_numero_principal}")
-                        print("⚠️  Ajoutez 'longueur_numero_principal' dans config.json pour expliciter cette valeur")
-                    else:
-                        print(f"Numéro principal invalide: {numero_config}")
-                
-                # Charger la durée d'enregistrement
-                if 'duree_enregistrement' in config_data:
-                    self.duree_enregistrement = int(config_data['duree_enregistrement'])
-                    print(f"Durée d'enregistrement chargée depuis USB: {self.duree_enregistrement}s")
-                else:
-                    print("Clé 'duree_enregistrement' non trouvée dans config.json - utilisation valeur par défaut")
-                
-                # Charger le volume audio
-                if 'volume_audio' in config_data:
-                    volume_value = config_data['volume_audio']
-                    # Valider que c'est un nombre entre 0 et 100
-                    if isinstance(volume_value, (int, float)) and 0 <= volume_value <= 100:
-                        self.volume_audio = volume_value
-                        print(f"Volume audio chargé depuis USB: {self.volume_audio}%")
-                    else:
-                        print(f"Valeur volume_audio invalide ({volume_value}) - doit être entre 0 et 100%")
-                        print("Utilisation de la valeur par défaut (2%)")
-                else:
-                    print("Clé 'volume_audio' non trouvée dans config.json - utilisation valeur par défaut (2%)")
-                    
-                # Charger les paramètres de filtre vintage (code existant inchangé)
-                if 'filtre_vintage' in config_data:
-                    filtre_value = config_data['filtre_vintage']
-                    if isinstance(filtre_value, bool):
-                        print(f"Filtre vintage chargé depuis USB: {'Activé' if filtre_value else 'Désactivé'}")
-                    else:
-                        print(f"Valeur filtre_vintage invalide ({filtre_value}) - doit être true/false")
-                
-                if 'type_filtre' in config_data:
-                    type_filtre = config_data['type_filtre']
-                    valid_types = ["aucun", "radio_50s", "telephone", "gramophone"]
-                    if type_filtre in valid_types:
-                        print(f"Type de filtre chargé depuis USB: {type_filtre}")
-                    else:
-                        print(f"Type de filtre invalide ({type_filtre}) - types valides: {valid_types}")
-                
-                if 'intensite_filtre' in config_data:
-                    intensite_value = config_data['intensite_filtre']
-                    if isinstance(intensite_value, (int, float)) and 0.0 <= intensite_value <= 1.0:
-                        print(f"Intensité filtre chargée depuis USB: {intensite_value}")
-                    else:
-                        print(f"Valeur intensite_filtre invalide ({intensite_value}) - doit être entre 0.0 et 1.0")
-                
-                if 'conserver_original' in config_data:
-                    conserver_value = config_data['conserver_original']
-                    if isinstance(conserver_value, bool):
-                        print(f"Conserver original chargé depuis USB: {'Oui' if conserver_value else 'Non'}")
-                    else:
-                        print(f"Valeur conserver_original invalide ({conserver_value}) - doit être true/false")
-                    
-            else:
-                print(f"Fichier config.json non trouvé: {config_file}")
-                print("Création du dossier Parametres et du fichier config.json par défaut...")
-                self.create_default_config()
-        except Exception as e:
-            print(f"Erreur lecture config.json: {e}")
-            print("Utilisation des valeurs par défaut")
+        if not os.path.exists(config_file):
+            print(f"Fichier config.json non trouvé: {config_file}")
+            print("Création du dossier Parametres et du fichier config.json par défaut...")
+            self.create_default_config()
+        
+        # Lecture unique, puis rechargement uniquement quand le fichier change
+        self.config_store.stop_watching()
+        self.config_store.load(config_file)
+        self.config_store.start_watching()
+    
+    def refresh_config(self):
+        """Recharge config.json s'il a été modifié (à appeler après une écriture du fichier)"""
+        return self.config_store.check_for_changes()
     
     def create_default_config(self):
         """Crée un fichier config.json par défaut"""
@@ -345,7 +253,11 @@ class USBManager:
                 "filtre_vintage_description": "Active/désactive les effets vintage (true/false)",
                 "type_filtre_description": "Type d'effet: 'aucun', 'radio_50s', 'telephone', 'gramophone'",
                 "intensite_filtre_description": "Intensité de l'effet (0.0 à 1.0). 0.7 = fort, 0.5 = modéré, 0.3 = léger",
-                "conserver_original_description": "Garde une copie du fichier original sans effet (true/false)"
+                "conserver_original_description": "Garde une copie du fichier original sans effet (true/false)",
+                "format_capture": "mp3",
+                "conserver_master": True,
+                "format_capture_description": "'mp3': message encodé dès le raccrochage. 'wav' ou 'flac': master sans perte, MP3 encodé quand le téléphone est raccroché",
+                "conserver_master_description": "Garde le master wav/flac après l'encodage MP3 (true/false)"
             }
             
             with open(config_file, 'w', encoding='utf-8') as f:
@@ -357,101 +269,98 @@ class USBManager:
     
     def get_numero_principal(self):
         """Retourne le numéro principal configuré"""
-        return self.numero_principal
+        return self.config_store.numero_principal
     
     def get_longueur_numero_principal(self):
         """Retourne la longueur du numéro principal configurée"""
-        return self.longueur_numero_principal
+        return self.config_store.longueur_numero_principal
     
     def get_duree_enregistrement(self):
         """Retourne la durée d'enregistrement configurée"""
-        return self.duree_enregistrement
+        return self.config_store.duree_enregistrement
     
     def get_volume_audio(self):
         """Retourne le volume audio configuré en pourcentage"""
-        return self.volume_audio
+        return self.config_store.volume_audio
+    
+    def get_capture_config(self):
+        """Retourne le format de capture configuré et la conservation du master"""
+        return self.config_store.get_capture_config()
     
     def get_config_info(self):
-        """Retourne un dictionnaire avec toutes les informations de configuration"""
-        config_info = {
-            "numero_principal": self.numero_principal,
-            "longueur_numero_principal": self.longueur_numero_principal,
-            "duree_enregistrement": self.duree_enregistrement,
-            "volume_audio": self.volume_audio,
+        """
+        Retourne un dictionnaire avec toutes les informations de configuration
+        Valeurs lues en mémoire: ni lecture de config.json ni processus externe
+        """
+        config_info = self.config_store.as_dict()
+        
+        # Les paramètres de filtre ne sont exposés que si config.json a été lu
+        if not self.config_store.loaded:
+            for key in ("filtre_vintage", "type_filtre", "intensite_filtre", "conserver_original",
+                        "format_capture", "conserver_master"):
+                config_info.pop(key)
+        
+        config_info.update({
             "usb_path": self.usb_path,
             "usb_available": self.is_usb_available(),
             "usb_mount_point": self.usb_mount_point
-        }
-        
-        # Ajouter les paramètres de filtre depuis le fichier config
-        if self.usb_path:
-            config_file = os.path.join(self.usb_path, "Parametres", "config.json")
-            try:
-                if os.path.exists(config_file):
-                    with open(config_file, 'r', encoding='utf-8') as f:
-                        config_data = json.load(f)
-                        
-                    # Ajouter les paramètres de filtre s'ils existent
-                    config_info.update({
-                        "filtre_vintage": config_data.get("filtre_vintage", False),
-                        "type_filtre": config_data.get("type_filtre", "radio_50s"),
-                        "intensite_filtre": config_data.get("intensite_filtre", 0.7),
-                        "conserver_original": config_data.get("conserver_original", True)
-                    })
-            except Exception as e:
-                print(f"Erreur lecture config pour get_config_info: {e}")
+        })
         
-        # Ajouter les informations RTC si disponible
+        # Ajouter les informations RTC si disponible (sans lecture hwclock)
         if self.rtc_manager:
-            rtc_status = self.rtc_manager.get_status_info()
             config_info.update({
-                "rtc_available": rtc_status['rtc_available'],
-                "time_valid": rtc_status['time_valid'],
-                "current_time": rtc_status['system_time']
+                "rtc_available": self.rtc_manager.is_rtc_available,
+                "time_valid": self.rtc_manager.check_time_validity(),
+                "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
         
         return config_info
     
+    def is_mount_point(self):
+        """Vérifie que la clé est montée (simulation: la clé est un simple dossier)"""
+        if SIMULATION:
+            return os.path.isdir(self.usb_mount_point)
+        return os.path.ismount(self.usb_mount_point)
+    
     def is_usb_available(self):
         """Vérifie si la clé USB est disponible"""
-        return self.usb_path is not None and os.path.ismount(self.usb_mount_point)
+        return self.usb_path is not None and self.is_mount_point()
+    
+    def get_announce_index(self):
+        """Retourne l'index des annonces de la clé (créé et surveillé au premier appel), None sans clé"""
+        if not self.is_usb_available():
+            return None
+        announce_dir = os.path.join(self.usb_path, "Annonce")
+        if self.announce_index is None or self.announce_index.announce_dir != announce_dir:
+            self.close_announce_index()
+            if not os.path.isdir(announce_dir):
+                print(f"Dossier Annonce non trouvé dans {self.usb_path}")
+                return None
+            self.announce_index = AnnounceIndex(announce_dir)
+            self.announce_index.start_watching()
+        return self.announce_index
+    
+    def close_announce_index(self):
+        if self.announce_index is not None:
+            self.announce_index.stop_watching()
+            self.announce_index = None
     
     def get_announce_path(self):
-        """Retourne le chemin vers un fichier d'annonce choisi au hasard"""
+        """Retourne le chemin de l'annonce suivante (rotation mélangée, sans lister le dossier)"""
         if not self.is_usb_available():
             self.reload_usb_detection()
         
-        if self.usb_path:
-            announce_dir = os.path.join(self.usb_path, "Annonce")
-            if os.path.exists(announce_dir):
-                # Lister tous les fichiers MP3 dans le dossier Annonce
-                mp3_files = []
-                print(f"DEBUG: Contenu du dossier {announce_dir}:")
-                for file in os.listdir(announce_dir):
-                    print(f"  - {file}")
-                    if file.lower().endswith('.mp3'):
-                        full_path = os.path.join(announce_dir, file)
-                        if os.path.isfile(full_path):
-                            mp3_files.append(full_path)
-                
-                print(f"DEBUG: Fichiers MP3 trouvés: {len(mp3_files)}")
-                for i, mp3_file in enumerate(mp3_files):
-                    print(f"  {i+1}. {mp3_file}")
-                
-                if mp3_files:
-                    # Choisir un fichier au hasard
-                    selected_file = random.choice(mp3_files)
-                    print(f"Fichier d'annonce sélectionné au hasard: {selected_file}")
-                    return selected_file
-                else:
-                    print(f"Aucun fichier MP3 trouvé dans {announce_dir}")
-                    return None
-            else:
-                print(f"Dossier Annonce non trouvé dans {self.usb_path}")
-                return None
-
-        print("Clé USB non détectée - pas d'annonce disponible")
-        return None
+        index = self.get_announce_index()
+        if index is None:
+            print("Clé USB non détectée - pas d'annonce disponible")
+            return None
+        
+        selected_file = index.get_path()
+        if selected_file:
+            print(f"Annonce sélectionnée: {os.path.basename(selected_file)} ({index.get_count()} disponibles)")
+        else:
+            print(f"Aucun fichier MP3 trouvé dans {index.announce_dir}")
+        return selected_file
     
     def generate_message_filename(self, prefix="message", extension=".mp3"):
         """Génère un nom de fichier avec horodatage dans le dossier USB du jour"""
@@ -498,70 +407,44 @@ class USBManager:
             print("Clé USB non détectée - impossible d'enregistrer")
             return None
     
+    def get_log_dir(self):
+        """Dossier Logs/ de la clé, None si elle est absente"""
+        return os.path.join(self.usb_path, "Logs") if self.usb_path else None
+    
+    def get_log_time(self):
+        """Horodatage des journaux (RTC si disponible)"""
+        if self.rtc_manager:
+            return self.rtc_manager.get_current_datetime()
+        return datetime.now()
+    
+    def log_line(self, file_name, message):
+        """Ajoute une ligne horodatée à Logs/file_name (écriture différée, ne bloque pas)"""
+        if not self.usb_path:
+            return
+        timestamp = self.get_log_time().strftime("%Y-%m-%d %H:%M:%S")
+        self.usb_logger.log(file_name, f"{timestamp} - {message}")
+    
+    def flush_logs(self, sync=False):
+        """Écrit les journaux en attente (sync: fsync, avant un arrêt)"""
+        if sync:
+            self.usb_logger.close()
+        else:
+            self.usb_logger.flush()
+    
     def save_time_sync_log(self, sync_info):
         """Sauvegarde un log des synchronisations d'heure et événements temporels sur la clé USB"""
         if not self.usb_path:
             return
-        
-        try:
-            log_dir = os.path.join(self.usb_path, "Logs")
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-                print(f"Dossier Logs créé: {log_dir}")
-            
-            log_file = os.path.join(log_dir, "time_sync.log")
-            
-            # Utiliser le RTC pour l'horodatage du log si disponible
-            if self.rtc_manager:
-                current_time = self.rtc_manager.get_current_datetime().strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            log_entry = f"{current_time} - {sync_info}\n"
-            
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-            
-            print(f"Log sauvegardé: {sync_info}")
-                
-        except Exception as e:
-            print(f"Erreur sauvegarde log: {e}")
+        self.log_line("time_sync.log", sync_info)
+        print(f"Log sauvegardé: {sync_info}")
     
     def save_event_log(self, event_type, details=""):
-        """Sauvegarde un log d'événements générique sur la clé USB"""
+        """Sauvegarde un log d'événements générique sur la clé USB (un fichier par jour)"""
         if not self.usb_path:
             return
-        
-        try:
-            log_dir = os.path.join(self.usb_path, "Logs")
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-            
-            # Utiliser le RTC pour l'horodatage si disponible
-            if self.rtc_manager:
-                current_time = self.rtc_manager.get_current_datetime()
-                timestamp = current_time.strftime("%Y-%m-%d %H:%M:%S")
-                date_for_file = current_time.strftime("%Y-%m-%d")
-            else:
-                current_time = datetime.now()
-                timestamp = current_time.strftime("%Y-%m-%d %H:%M:%S")
-                date_for_file = current_time.strftime("%Y-%m-%d")
-            
-            # Créer un fichier de log par jour
-            log_file = os.path.join(log_dir, f"events_{date_for_file}.log")
-            
-            log_entry = f"{timestamp} - {event_type}"
-            if details:
-                log_entry += f" - {details}"
-            log_entry += "\n"
-            
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-            
-            print(f"Événement loggé: {event_type}")
-                
-        except Exception as e:
-            print(f"Erreur sauvegarde événement: {e}")
+        date_for_file = self.get_log_time().strftime("%Y-%m-%d")
+        self.log_line(f"events_{date_for_file}.log", f"{event_type} - {details}" if details else event_type)
+        print(f"Événement loggé: {event_type}")
     
     def get_rtc_manager(self):
         """Retourne le gestionnaire RTC associé"""
@@ -576,11 +459,26 @@ class USBManager:
         """Retourne le chemin de montage USB"""
         return self.usb_path
     
+    def get_message_catalog(self):
+        """Retourne le catalogue des messages de la clé, None si la clé est absente"""
+        if not self.is_usb_available():
+            return None
+        messages_dir = os.path.join(self.usb_path, "Messages")
+        if self.message_catalog is None or self.message_catalog.messages_dir != messages_dir:
+            self.close_message_catalog()
+            self.message_catalog = MessageCatalog(messages_dir)
+        return self.message_catalog
+    
+    def close_message_catalog(self):
+        if self.message_catalog is not None:
+            self.message_catalog.close()
+            self.message_catalog = None
+    
     def get_usb_status(self):
         """Retourne le statut détaillé de la clé USB"""
         status = {
             "mount_point": self.usb_mount_point,
-            "is_mounted": os.path.ismount(self.usb_mount_point) if os.path.exists(self.usb_mount_point) else False,
+            "is_mounted": self.is_mount_point() if os.path.exists(self.usb_mount_point) else False,
             "usb_path": self.usb_path,
             "is_available": self.is_usb_available(),
             "has_structure": False
@@ -597,18 +495,14 @@ class USBManager:
             
             # Compter les fichiers
             try:
-                annonce_dir = os.path.join(self.usb_path, "Annonce")
-                if os.path.exists(annonce_dir):
-                    mp3_count = len([f for f in os.listdir(annonce_dir) if f.lower().endswith('.mp3')])
-                    status["announce_files"] = mp3_count
+                announce_index = self.get_announce_index()
+                if announce_index:
+                    status["announce_files"] = announce_index.get_count()
                 
-                messages_dir = os.path.join(self.usb_path, "Messages")
-                if os.path.exists(messages_dir):
-                    # Compter récursivement les fichiers de messages
-                    message_count = 0
-                    for root, dirs, files in os.walk(messages_dir):
-                        message_count += len([f for f in files if f.lower().endswith('.mp3')])
-                    status["message_files"] = message_count
+                # Messages: totaux tenus à jour par le catalogue (pas de parcours de la clé)
+                catalog = self.get_message_catalog()
+                if catalog and os.path.exists(catalog.messages_dir):
+                    status["message_files"], status["message_duration"] = catalog.get_totals()
                     
             except Exception as e:
                 print(f"Erreur comptage fichiers: {e}")
@@ -730,10 +624,10 @@ class USBManager:
         Télécharge un fichier depuis une URL
         Retourne True si succès, False sinon
         """
+        import tempfile
+        
         try:
-            import requests
-            import tempfile
-            
+            import requests  # Import différé: uniquement utile aux téléchargements
             print(f"📥 Téléchargement {description}...")
             
             # Télécharger avec timeout
@@ -767,6 +661,10 @@ class USBManager:
             print(f"✅ {description} téléchargé avec succès")
             return True
             
+        except ImportError as e:
+            # Avant requests.exceptions: le nom requests n'existe pas si l'import a échoué
+            print(f"❌ Téléchargement {description} impossible (requests absent): {e}")
+            return False
         except requests.exceptions.RequestException as e:
             print(f"❌ Erreur réseau pour {description}: {e}")
             return False
@@ -0,0 +1,636 @@
+# vintage_dsp.py
+"""
+Moteur DSP vintage en processus (NumPy)
+Reproduit les chaînes de filtres ffmpeg de audio_effects.py: passe-haut / passe-bas et
+égaliseurs biquad, compand, compresseur, rééchantillonnage et volume, plus saturation
+et bruit rose pour la texture vintage.
+Le signal est traité par blocs d'une seconde, l'état des filtres étant conservé entre blocs;
+compare_with_ffmpeg() vérifie l'écart avec ffmpeg, sur une capture réelle ou sur une
+capture de référence générée (toujours la même, write_fixture_wav).
+Usage: python3 main.py --check-dsp [capture.wav]
+"""
+
+import math
+import os
+import subprocess
+import tempfile
+import time
+import wave
+import numpy as np
+from config import DSP_BLOCK_DURATION, DSP_MATCH_TOLERANCE_DB, DSP_MATCH_DEFAULT_TOLERANCE_DB, DSP_FIXTURE_SEED
+
+PCM_SCALE = 32768.0
+IMPULSE_GRID = 1 << 16  # Points de la grille de réponse en fréquence des biquads
+IMPULSE_TAIL = 1e-12  # Énergie relative négligée en fin de réponse impulsionnelle
+ENVELOPE_PRECISION = 1e-6  # Atténuation max d'un segment du suiveur d'enveloppe (stabilité numérique)
+ENVELOPE_SEGMENT_MAX = 1024
+ENVELOPE_ITERATIONS = 12
+RESAMPLER_HALF_WIDTH = 16  # Lobes du sinc fenêtré de chaque côté
+RESAMPLER_BETA = 8.0  # Fenêtre de Kaiser
+RESAMPLER_CHUNK = 4096  # Échantillons de sortie calculés à la fois (mémoire du Pi Zero)
+
+
+# ---------------------------------------------------------------------------
+# Biquads (formules RBJ, identiques à celles de af_biquads de ffmpeg)
+# ---------------------------------------------------------------------------
+
+def biquad_coefficients(kind, sample_rate, frequency, width=0.707, width_type="q", gain=0.0):
+    """
+    Retourne les coefficients normalisés (b, a) d'un biquad ffmpeg
+    kind: "highpass", "lowpass" ou "equalizer"
+    """
+    w0 = 2 * math.pi * frequency / sample_rate
+    cos_w0 = math.cos(w0)
+    sin_w0 = math.sin(w0)
+    A = 10 ** (gain / 40.0)
+
+    if width_type == "h":
+        alpha = sin_w0 / (2 * frequency / width)
+    elif width_type == "k":
+        alpha = sin_w0 / (2 * frequency / (width * 1000))
+    elif width_type == "o":
+        alpha = sin_w0 * math.sinh(math.log(2.0) / 2 * width * w0 / sin_w0)
+    elif width_type == "q":
+        alpha = sin_w0 / (2 * width)
+    else:
+        raise ValueError(f"Type de largeur non supporté: {width_type}")
+
+    if kind == "highpass":
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == "equalizer":
+        b = [1 + alpha * A, -2 * cos_w0, 1 - alpha * A]
+        a = [1 + alpha / A, -2 * cos_w0, 1 - alpha / A]
+    else:
+        raise ValueError(f"Biquad non supporté: {kind}")
+
+    return np.array(b) / a[0], np.array(a) / a[0]
+
+
+def biquad_impulse_response(sections):
+    """
+    Réponse impulsionnelle d'une cascade de biquads, calculée depuis la réponse
+    en fréquence exacte puis tronquée quand son énergie devient négligeable
+    """
+    z = np.exp(-1j * np.linspace(0.0, np.pi, IMPULSE_GRID // 2 + 1))  # z^-1 sur la grille
+    response = np.ones_like(z)
+    for b, a in sections:
+        response *= (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+    impulse = np.fft.irfft(response, IMPULSE_GRID)[:IMPULSE_GRID // 2]
+    energy = np.cumsum(impulse[::-1] ** 2)[::-1]  # Énergie restante à partir de chaque échantillon
+    length = int(np.count_nonzero(energy > energy[0] * IMPULSE_TAIL)) + 1
+    return impulse[:length]
+
+
+class FIRFilter:
+    """Convolution par FFT (overlap-add), la queue est reportée sur le bloc suivant"""
+
+    def __init__(self, impulse):
+        self.impulse = np.asarray(impulse, dtype=np.float64)
+        self.tail = np.zeros(len(self.impulse) - 1)
+        self.spectra = {}  # Spectre de la réponse par taille de FFT
+
+    def process(self, x):
+        if len(x) == 0:
+            return x
+        size = len(x) + len(self.impulse) - 1
+        nfft = 1 << (size - 1).bit_length()
+        spectrum = self.spectra.get(nfft)
+        if spectrum is None:
+            spectrum = self.spectra[nfft] = np.fft.rfft(self.impulse, nfft)
+
+        y = np.fft.irfft(np.fft.rfft(x, nfft) * spectrum, nfft)[:size]
+        y[:len(self.tail)] += self.tail
+        self.tail = y[len(x):].copy()
+        return y[:len(x)]
+
+
+# ---------------------------------------------------------------------------
+# Dynamique
+# ---------------------------------------------------------------------------
+
+class EnvelopeFollower:
+    """
+    Suiveur d'enveloppe à deux constantes de temps (montée / descente), comme compand
+    et acompressor: v[n] = v[n-1] + c[n] * (r[n] - v[n-1]), c = attaque si r[n] > v[n-1]
+    Le choix attaque/descente est estimé puis corrigé par itérations; à choix fixés
+    la récurrence est linéaire et se résout par produits cumulés sur des segments.
+    """
+
+    def __init__(self, attack_coeff, release_coeff, initial=0.0):
+        self.attack_coeff = min(1.0, attack_coeff)
+        self.release_coeff = min(1.0, release_coeff)
+        self.value = initial
+
+        # Longueur des segments: le produit cumulé ne doit pas sous-passer ENVELOPE_PRECISION
+        keep_min = max(1.0 - max(self.attack_coeff, self.release_coeff), 1e-9)
+        self.segment = max(1, min(ENVELOPE_SEGMENT_MAX, int(math.log(ENVELOPE_PRECISION) / math.log(keep_min))))
+
+    def solve(self, r, c):
+        """Résout la récurrence linéaire pour des coefficients c donnés"""
+        n = len(r)
+        segment = self.segment
+        count = -(-n // segment)
+        pad = count * segment - n
+
+        # Un coefficient nul (remplissage) laisse l'enveloppe inchangée
+        r2 = np.pad(r, (0, pad)).reshape(count, segment)
+        c2 = np.pad(c, (0, pad)).reshape(count, segment)
+        keep = np.cumprod(np.maximum(1.0 - c2, 1e-9), axis=1)
+        local = keep * np.cumsum(c2 * r2 / keep, axis=1)  # Réponse de chaque segment partant de 0
+
+        starts = np.empty(count)
+        value = self.value
+        for i, (keep_end, local_end) in enumerate(zip(keep[:, -1].tolist(), local[:, -1].tolist())):
+            starts[i] = value
+            value = keep_end * value + local_end
+
+        return (keep * starts[:, None] + local).reshape(-1)[:n]
+
+    def process(self, r):
+        if len(r) == 0:
+            return r
+        previous = np.full(len(r), self.value)
+        c = None
+        for _ in range(ENVELOPE_ITERATIONS):
+            new_c = np.where(r > previous, self.attack_coeff, self.release_coeff)
+            if c is not None and np.array_equal(new_c, c):
+                break
+            c = new_c
+            envelope = self.solve(r, c)
+            previous = np.concatenate(([self.value], envelope[:-1]))
+
+        self.value = float(envelope[-1])
+        return envelope
+
+
+class Compand:
+    """Équivalent de compand (sans délai): gain interpolé en dB selon le niveau d'enveloppe"""
+
+    def __init__(self, sample_rate, attacks=0.0, decays=0.8, points=((-70, -70), (-60, -20), (1, 0)),
+                 initial_volume=0.0):
+        def coefficient(duration):
+            return 1.0 - math.exp(-1.0 / (sample_rate * duration)) if duration > 1.0 / sample_rate else 1.0
+
+        self.follower = EnvelopeFollower(coefficient(attacks), coefficient(decays),
+                                         10 ** (initial_volume / 20.0))
+        self.levels = np.array([p[0] for p in points], dtype=np.float64)
+        self.gains = np.array([p[1] - p[0] for p in points], dtype=np.float64)
+
+    def process(self, x):
+        envelope = self.follower.process(np.abs(x))
+        level_db = 20 * np.log10(np.maximum(envelope, 1e-20))
+        return x * 10 ** (np.interp(level_db, self.levels, self.gains) / 20.0)
+
+
+class Compressor:
+    """Équivalent de acompressor (détection RMS, genou arrondi par interpolation d'Hermite)"""
+
+    def __init__(self, sample_rate, threshold=0.125, ratio=2.0, attack=20.0, release=250.0,
+                 knee=2.82843, makeup=1.0):
+        self.follower = EnvelopeFollower(4000.0 / (attack * sample_rate), 4000.0 / (release * sample_rate))
+        self.ratio = ratio
+        self.knee = knee
+        self.makeup = makeup
+        self.threshold = math.log(threshold)
+        self.knee_start = math.log(threshold / math.sqrt(knee))
+        self.knee_stop = math.log(threshold * math.sqrt(knee))
+        self.detect_start = (threshold / math.sqrt(knee)) ** 2  # Niveau quadratique (RMS)
+        self.compressed_knee_stop = (self.knee_stop - self.threshold) / ratio + self.threshold
+
+    def process(self, x):
+        envelope = self.follower.process(x * x)
+        gain = np.ones(len(x))
+        detected = envelope > self.detect_start
+        if np.any(detected):
+            slope = 0.5 * np.log(envelope[detected])
+            out = (slope - self.threshold) / self.ratio + self.threshold
+            if self.knee > 1.0:
+                in_knee = slope < self.knee_stop
+                out[in_knee] = self.hermite(slope[in_knee])
+            gain[detected] = np.exp(out - slope)
+        return x * gain * self.makeup
+
+    def hermite(self, slope):
+        """Raccord du genou entre pente 1 et pente 1/ratio"""
+        width = self.knee_stop - self.knee_start
+        t = (slope - self.knee_start) / width
+        p0, p1 = self.knee_start, self.compressed_knee_stop
+        m0, m1 = width, width / self.ratio
+        return ((2 * p0 + m0 - 2 * p1 + m1) * t ** 3
+                + (-3 * p0 - 2 * m0 + 3 * p1 - m1) * t ** 2
+                + m0 * t + p0)
+
+
+# ---------------------------------------------------------------------------
+# Texture vintage et gain
+# ---------------------------------------------------------------------------
+
+class Volume:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def process(self, x):
+        return x * self.gain
+
+
+class Saturation:
+    """Saturation douce (tanh), gain unitaire à bas niveau"""
+
+    def __init__(self, level):
+        self.drive = 1.0 + 4.0 * level
+
+    def process(self, x):
+        return np.tanh(self.drive * x) / self.drive
+
+
+class PinkNoise:
+    """
+    Ajoute un bruit rose (pente -3 dB/octave) d'amplitude level
+    Bruit blanc filtré par un FIR, donc continu d'un bloc à l'autre
+    """
+
+    def __init__(self, sample_rate, level, seed=None):
+        self.level = level
+        self.random = np.random.default_rng(seed)
+        size = 4096
+        frequencies = np.fft.rfftfreq(size, 1.0 / sample_rate)
+        shape = 1.0 / np.sqrt(np.maximum(frequencies, 20.0) / 20.0)
+        impulse = np.fft.fftshift(np.fft.irfft(shape, size)) * np.hanning(size)
+        # RMS du bruit = celui d'un bruit blanc uniforme d'amplitude level
+        self.filter = FIRFilter(impulse / np.sqrt(np.sum(impulse ** 2)))
+
+    def process(self, x):
+        white = self.random.uniform(-self.level, self.level, len(x))
+        return x + self.filter.process(white)
+
+
+# ---------------------------------------------------------------------------
+# Rééchantillonnage
+# ---------------------------------------------------------------------------
+
+class Resampler:
+    """
+    Rééchantillonneur polyphase sinc fenêtré (Kaiser), sans retard
+    Les débits étant entiers, les noyaux des rate_out / pgcd phases sont précalculés
+    """
+
+    def __init__(self, rate_in, rate_out):
+        self.rate_in = rate_in
+        self.rate_out = rate_out
+        divisor = math.gcd(rate_in, rate_out)
+        self.step = rate_in // divisor  # Avance par échantillon de sortie, en 1/phases d'échantillon d'entrée
+        self.phases = rate_out // divisor
+        self.cutoff = min(1.0, rate_out / float(rate_in)) * 0.97  # Anti-repliement
+        self.half_width = int(math.ceil(RESAMPLER_HALF_WIDTH / self.cutoff))
+
+        offsets = np.arange(-self.half_width + 1, self.half_width + 1)
+        distance = offsets[None, :] - (np.arange(self.phases) / float(self.phases))[:, None]
+        window = np.i0(RESAMPLER_BETA * np.sqrt(np.clip(1.0 - (distance / self.half_width) ** 2, 0.0, 1.0)))
+        self.kernels = self.cutoff * np.sinc(self.cutoff * distance) * window / np.i0(RESAMPLER_BETA)
+
+        # L'historique commence par des zéros: la sortie n correspond à l'entrée n * rate_in / rate_out
+        self.buffer = np.zeros(self.half_width)
+        self.position = self.half_width * self.phases  # En 1/phases d'échantillon d'entrée
+        self.samples_in = 0
+        self.samples_out = 0
+
+    def process(self, x, limit=None):
+        self.samples_in += len(x)
+        buffer = np.concatenate((self.buffer, x))
+        last = (len(buffer) - self.half_width - 1) * self.phases  # Dernière position au noyau complet
+        count = (last - self.position) // self.step + 1 if last >= self.position else 0
+        if limit is not None:
+            count = min(count, limit)
+
+        outputs = []
+        if count > 0:
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, 2 * self.half_width)
+        for first in range(0, count, RESAMPLER_CHUNK):
+            positions = self.position + self.step * np.arange(first, min(count, first + RESAMPLER_CHUNK))
+            base, phase = np.divmod(positions, self.phases)
+            outputs.append(np.einsum("ij,ij->i", windows[base - self.half_width + 1], self.kernels[phase]))
+
+        self.position += self.step * count
+        drop = max(0, self.position // self.phases - self.half_width)
+        self.buffer = buffer[drop:]
+        self.position -= drop * self.phases
+        self.samples_out += count
+        return np.concatenate(outputs) if outputs else np.zeros(0)
+
+    def flush(self):
+        """Termine le signal (zéros après la fin) et rend les derniers échantillons"""
+        expected = int(round(self.samples_in * self.rate_out / float(self.rate_in)))
+        remaining = expected - self.samples_out
+        if remaining <= 0:
+            return np.zeros(0)
+        samples_in = self.samples_in
+        padding = self.half_width + (remaining * self.step) // self.phases + 2
+        tail = self.process(np.zeros(padding), remaining)
+        self.samples_in = samples_in
+        return tail
+
+
+# ---------------------------------------------------------------------------
+# Chaîne d'effets
+# ---------------------------------------------------------------------------
+
+def parse_filter_chain(filter_chain):
+    """
+    Découpe une chaîne ffmpeg "nom=a=1:b=2,nom2=valeur" en liste (nom, options)
+    Une valeur sans clé (volume=1.4, aresample=8000) est rangée sous la clé ""
+    """
+    filters = []
+    for item in filter_chain.split(","):
+        name, _, arguments = item.strip().partition("=")
+        options = {}
+        for argument in arguments.split(":") if arguments else []:
+            key, sep, value = argument.partition("=")
+            if sep:
+                options[key] = value
+            else:
+                options[""] = key
+        filters.append((name, options))
+    return filters
+
+
+def parse_compand_points(points):
+    """"-80/-80|-30/-20" -> [(-80.0, -80.0), (-30.0, -20.0)]"""
+    return [tuple(float(v) for v in point.split("/")) for point in points.split("|")]
+
+
+def parse_volume(value):
+    """Volume ffmpeg: facteur linéaire ou valeur en dB ("-3.20dB")"""
+    if value.lower().endswith("db"):
+        return 10 ** (float(value[:-2]) / 20.0)
+    return float(value)
+
+
+class DSPChain:
+    """
+    Chaîne d'effets construite depuis une chaîne de filtres ffmpeg (voir build_filter_chain)
+    process() prend des blocs float (-1..1) au débit d'entrée et rend des blocs au débit de sortie
+    """
+
+    def __init__(self, filter_chain, sample_rate, texture=None):
+        self.sample_rate = sample_rate
+        self.output_rate = sample_rate
+        self.stages = []
+        self.texture = texture
+
+        sections = []  # Biquads consécutifs regroupés en un seul FIR
+
+        def close_sections():
+            if sections:
+                self.stages.append(FIRFilter(biquad_impulse_response(sections)))
+                del sections[:]
+
+        for name, options in parse_filter_chain(filter_chain):
+            rate = self.output_rate
+            if name in ("highpass", "lowpass"):
+                sections.append(biquad_coefficients(
+                    name, rate, float(options.get("f", options.get("frequency", 3000 if name == "highpass" else 500))),
+                    float(options.get("width", options.get("w", 0.707))), options.get("width_type", options.get("t", "q"))
+                ))
+                continue
+            if name == "equalizer":
+                sections.append(biquad_coefficients(
+                    name, rate, float(options.get("f", options.get("frequency", 0))),
+                    float(options.get("width", options.get("w", 1))), options.get("width_type", options.get("t", "q")),
+                    float(options.get("g", options.get("gain", 0)))
+                ))
+                continue
+
+            close_sections()
+            if name == "compand":
+                self.stages.append(Compand(
+                    rate, float(options.get("attacks", 0)), float(options.get("decays", 0.8)),
+                    parse_compand_points(options["points"]) if "points" in options else ((-70, -70), (-60, -20), (1, 0)),
+                    float(options.get("volume", 0))
+                ))
+            elif name == "acompressor":
+                self.stages.append(Compressor(
+                    rate, float(options.get("threshold", 0.125)), float(options.get("ratio", 2)),
+                    float(options.get("attack", 20)), float(options.get("release", 250)),
+                    float(options.get("knee", 2.82843)), float(options.get("makeup", 1))
+                ))
+            elif name == "volume":
+                self.stages.append(Volume(parse_volume(options.get("volume", options.get("", "1")))))
+            elif name in ("aresample", "aformat"):
+                target = options.get("sample_rates", options.get("", rate))
+                self.add_resampler(int(target))
+            else:
+                raise ValueError(f"Filtre non supporté par le moteur DSP: {name}")
+        close_sections()
+
+        if texture:
+            saturation_level, noise_level = texture
+            if saturation_level > 0:
+                self.stages.append(Saturation(saturation_level))
+            if noise_level > 0:
+                self.stages.append(PinkNoise(self.output_rate, noise_level))
+
+    def add_resampler(self, rate):
+        if rate != self.output_rate:
+            self.stages.append(Resampler(self.output_rate, rate))
+            self.output_rate = rate
+
+    def process(self, block):
+        for stage in self.stages:
+            block = stage.process(block)
+        return block
+
+    def flush(self):
+        """Vide les rééchantillonneurs en fin de signal"""
+        output = np.zeros(0)
+        for stage in self.stages:
+            if isinstance(stage, Resampler):
+                output = np.concatenate((stage.process(output), stage.flush()))
+            elif len(output):
+                output = stage.process(output)
+        return output
+
+
+def to_pcm16(block):
+    """Float -1..1 -> octets PCM 16 bits little-endian (écrêtage comme ffmpeg)"""
+    return np.clip(np.rint(block * PCM_SCALE), -32768, 32767).astype("<i2").tobytes()
+
+
+def read_wav_blocks(wav_file, start=0.0, length=None, block_duration=DSP_BLOCK_DURATION):
+    """
+    Lit un WAV PCM 16 bits par blocs (float mono, -1..1)
+    Retourne (débit, générateur de blocs); start/length en secondes
+    """
+    wav = wave.open(wav_file, "rb")
+    sample_rate = wav.getframerate()
+    channels = wav.getnchannels()
+    if wav.getsampwidth() != 2:
+        wav.close()
+        raise ValueError("Capture non PCM 16 bits")
+
+    first = min(int(round(start * sample_rate)), wav.getnframes())
+    total = wav.getnframes() - first
+    if length is not None:
+        total = min(total, int(round(length * sample_rate)))
+    wav.setpos(first)
+    block_frames = max(1, int(sample_rate * block_duration))
+
+    def blocks():
+        remaining = total
+        try:
+            while remaining > 0:
+                frames = wav.readframes(min(block_frames, remaining))
+                if not frames:
+                    break
+                samples = np.frombuffer(frames[:len(frames) - len(frames) % (2 * channels)], dtype="<i2")
+                samples = samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples
+                remaining -= len(samples)
+                yield samples / PCM_SCALE
+        finally:
+            wav.close()
+
+    return sample_rate, blocks()
+
+
+def render_pcm(wav_file, filter_chain, start=0.0, length=None, texture=None):
+    """
+    Applique une chaîne d'effets à un WAV, bloc par bloc
+    Retourne (chaîne, générateur d'octets PCM 16 bits mono au débit chain.output_rate)
+    """
+    sample_rate, blocks = read_wav_blocks(wav_file, start, length)
+    chain = DSPChain(filter_chain, sample_rate, texture)
+
+    def pcm():
+        for block in blocks:
+            output = chain.process(block)
+            if len(output):
+                yield to_pcm16(output)
+        tail = chain.flush()
+        if len(tail):
+            yield to_pcm16(tail)
+
+    return chain, pcm()
+
+
+# ---------------------------------------------------------------------------
+# Vérification par rapport à ffmpeg
+# ---------------------------------------------------------------------------
+
+def align_signals(reference, candidate, max_lag):
+    """Retourne le décalage (en échantillons) qui aligne candidate sur reference"""
+    size = min(len(reference), len(candidate))
+    nfft = 1 << (2 * size - 1).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(reference[:size], nfft) * np.conj(np.fft.rfft(candidate[:size], nfft)), nfft)
+    lags = np.concatenate((np.arange(0, max_lag + 1), np.arange(-max_lag, 0)))
+    return int(lags[np.argmax(correlation[lags])])
+
+
+def compare_with_ffmpeg(wav_file, filter_chain, start=0.0, length=None, ffmpeg_binary="ffmpeg",
+                        tolerance_db=DSP_MATCH_DEFAULT_TOLERANCE_DB):
+    """
+    Rend la même capture avec ffmpeg et avec le moteur DSP puis mesure l'écart
+    Écart = énergie de la différence relative au signal ffmpeg (dB), après alignement
+    Retourne un dictionnaire de mesures, ou None si ffmpeg échoue
+    """
+    cmd = [ffmpeg_binary, "-loglevel", "error", "-ss", f"{start:.3f}"]
+    if length is not None:
+        cmd += ["-t", f"{length:.3f}"]
+    cmd += ["-i", wav_file, "-af", filter_chain, "-ac", "1", "-f", "s16le", "-"]
+
+    ffmpeg_start = time.monotonic()
+    result = subprocess.run(cmd, capture_output=True, timeout=300)
+    ffmpeg_time = time.monotonic() - ffmpeg_start
+    if result.returncode != 0:
+        print(f"❌ Erreur ffmpeg: {result.stderr.decode(errors='replace')}")
+        return None
+    reference = np.frombuffer(result.stdout, dtype="<i2") / PCM_SCALE
+
+    dsp_start = time.monotonic()
+    chain, pcm = render_pcm(wav_file, filter_chain, start, length)
+    candidate = np.frombuffer(b"".join(pcm), dtype="<i2") / PCM_SCALE
+    dsp_time = time.monotonic() - dsp_start
+
+    lag = align_signals(reference, candidate, max_lag=chain.output_rate // 20)
+    if lag >= 0:
+        reference_part, candidate_part = reference[lag:], candidate
+    else:
+        reference_part, candidate_part = reference, candidate[-lag:]
+    size = min(len(reference_part), len(candidate_part))
+    difference = reference_part[:size] - candidate_part[:size]
+
+    signal_power = np.mean(reference_part[:size] ** 2) if size else 0.0
+    error_power = np.mean(difference ** 2) if size else 0.0
+    if signal_power <= 0:
+        error_db = 0.0 if error_power > 0 else -120.0
+    else:
+        error_db = 10 * math.log10(max(error_power / signal_power, 1e-12))
+
+    return {
+        "error_db": error_db,
+        "lag": lag,
+        "samples_ffmpeg": len(reference),
+        "samples_dsp": len(candidate),
+        "ffmpeg_time": ffmpeg_time,
+        "dsp_time": dsp_time,
+        "ok": error_db <= tolerance_db
+    }
+
+
+def write_fixture_wav(path, sample_rate=16000, duration=6.0, seed=DSP_FIXTURE_SEED):
+    """
+    Capture de référence: voyelles synthétiques (fondamentale glissante et 15 harmoniques),
+    syllabes et pauses, plus un bruit de fond. Même graine, même fichier à chaque appel
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    fundamental = 140 + 30 * np.sin(2 * math.pi * 0.7 * t)
+    phase = 2 * math.pi * np.cumsum(fundamental) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 16))
+    envelope = np.sqrt(np.clip(np.sin(2 * math.pi * 1.3 * t), 0, None)) * (0.3 + 0.7 * (t % 2 < 1.4))
+    signal = voice * envelope + 0.03 * rng.standard_normal(len(t))
+    # Crête à -2 dBFS
+    pcm = np.round(signal * (0.8 * 32767 / np.max(np.abs(signal)))).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return path
+
+
+def check_dsp_engine(wav_file=None, ffmpeg_binary="ffmpeg", intensities=(0.3, 0.7, 0.9)):
+    """
+    Compare le moteur DSP à ffmpeg pour chaque filtre disponible; retourne True si tout est conforme
+    Sans fichier, la vérification porte sur la capture de référence (résultat reproductible)
+    """
+    if wav_file is None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fixture = write_fixture_wav(os.path.join(temp_dir, "reference.wav"))
+            return check_dsp_engine(fixture, ffmpeg_binary, intensities)
+
+    from audio_effects import AudioEffects
+
+    effects = AudioEffects()
+    _, peak_db = effects.get_wav_info(wav_file)
+    print(f"=== Vérification du moteur DSP sur {wav_file} ===")
+
+    all_ok = True
+    for filter_type in effects.get_available_filters():
+        tolerance_db = DSP_MATCH_TOLERANCE_DB.get(filter_type, DSP_MATCH_DEFAULT_TOLERANCE_DB)
+        for intensity in intensities:
+            filter_chain = effects.build_filter_chain(filter_type, intensity, peak_gain_db=-0.1 - peak_db)
+            report = compare_with_ffmpeg(wav_file, filter_chain, ffmpeg_binary=ffmpeg_binary,
+                                         tolerance_db=tolerance_db)
+            if report is None:
+                all_ok = False
+                continue
+            status = "✅" if report["ok"] else "❌"
+            print(f"{status} {filter_type:<11} {intensity:.1f}: écart {report['error_db']:6.1f} dB "
+                  f"(tolérance {tolerance_db} dB) "
+                  f"(décalage {report['lag']}, ffmpeg {report['ffmpeg_time']:.2f}s, numpy {report['dsp_time']:.2f}s)")
+            all_ok = all_ok and report["ok"]
+    return all_ok
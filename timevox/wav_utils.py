@@ -0,0 +1,58 @@
+# wav_utils.py
+"""
+Lecture des WAV PCM 16 bits sans décodage: en-tête d'un flux (pipe ffmpeg ou fichier)
+et durée réelle d'une capture, même interrompue
+"""
+
+import os
+import struct
+import wave
+
+
+def read_exact(stream, size):
+    """Lit exactement size octets d'un flux (pipe), EOFError si le flux se termine avant"""
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise EOFError("Flux terminé")
+        data += chunk
+    return data
+
+
+def read_wav_header(stream):
+    """
+    Lit l'en-tête WAV d'un flux ffmpeg (-f wav pipe:1)
+    Retourne (débit, canaux); le flux est ensuite positionné sur les données PCM
+    """
+    riff = read_exact(stream, 12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("Flux WAV invalide")
+
+    sample_rate = channels = None
+    while True:
+        chunk_id, size = struct.unpack("<4sI", read_exact(stream, 8))
+        if chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("Bloc fmt absent du flux WAV")
+            return sample_rate, channels
+        data = read_exact(stream, size + (size & 1))
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", data[:16])
+            if bits != 16:
+                raise ValueError(f"Capture {bits} bits non supportée")
+
+
+def get_wav_duration(wav_file):
+    """
+    Durée (secondes) d'un WAV PCM 16 bits d'après la taille réelle de ses données
+    Une capture interrompue (ffmpeg tué, coupure de courant) garde dans son en-tête la taille
+    provisoire 0xFFFFFFFF: le nombre d'échantillons annoncé est seulement un plafond
+    """
+    with wave.open(wav_file, "rb") as wav:
+        frame_count = wav.getnframes()
+    with open(wav_file, "rb") as f:
+        sample_rate, channels = read_wav_header(f)
+        data_offset = f.tell()
+    available = (os.path.getsize(wav_file) - data_offset) // (channels * 2)
+    return min(frame_count, max(0, available)) / float(sample_rate) if sample_rate else 0.0